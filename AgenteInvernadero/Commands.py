@@ -2,6 +2,8 @@
 Contiene la lógica y la estructura para manejar los comandos del sistema.
 """
 
+from analogias import mostrar_evaluacion
+
 
 class CommandHandler:
     """
@@ -20,6 +22,7 @@ class CommandHandler:
             "simular": self.simulacion,
             "simulamanual": self.simulacion_manual,
             "analogia": self.realizar_analogia_cmd,
+            "evaluar": self.evaluar_analogias_cmd,
             "salir": self.salir,
             "help": self.help,
         }
@@ -142,20 +145,46 @@ class CommandHandler:
             while duracion_seg <= 0:
                 try:
                     duracion_input = input(
-                        "Agente: Ingrese la duración de la simulación en segundos: "
+                        "Agente: Ingrese la duración de la simulación en segundos simulados "
+                        "(Enter para 24 h): "
                     )
-                    duracion_seg = int(duracion_input)
+                    duracion_seg = int(duracion_input) if duracion_input else 86400
                     if duracion_seg <= 0:
                         self.responder("La duración debe ser un número positivo.")
                 except ValueError:
                     self.responder("Por favor, ingrese un número entero válido.")
 
-            # 4. Configurar el agente y ejecutar la simulación.
+            # 4. Pedir el paso del reloj simulado.
+            paso_seg = 0
+            while paso_seg <= 0:
+                try:
+                    paso_input = input(
+                        "Agente: Ingrese los segundos simulados por paso (Enter para 60): "
+                    )
+                    paso_seg = float(paso_input) if paso_input else 60
+                    if paso_seg <= 0:
+                        self.responder("El paso debe ser un número positivo.")
+                except ValueError:
+                    self.responder("Por favor, ingrese un número válido.")
+
+            # 5. Elegir entre modo acelerado o tiempo real (demostración).
+            modo = input(
+                "Agente: ¿Ejecutar en tiempo real para demostración? (s/N): "
+            ).lower()
+            tiempo_real = modo in ("s", "si", "sí")
+
+            # 6. Configurar el agente y ejecutar la simulación.
             self.responder(
                 f"\nConfigurando agente para simular el cultivo de '{tipo_cultivo_elegido}'..."
             )
             self.agente.set_cultivo(tipo_cultivo_elegido)
-            self.agente.simular_un_dia(duracion_simulacion_seg=duracion_seg)
+            # En la demostración cada paso dura medio segundo real.
+            self.agente.simular_un_dia(
+                duracion_simulacion_seg=duracion_seg,
+                paso_seg=paso_seg,
+                tiempo_real=tiempo_real,
+                aceleracion=paso_seg / 0.5,
+            )
 
             return False
         except KeyboardInterrupt:
@@ -220,3 +249,34 @@ class CommandHandler:
             self.responder(f"Ocurrió un error inesperado durante la analogía: {e}")
 
         return False
+
+    def evaluar_analogias_cmd(self):
+        """
+        Evalúa el modelo de lenguaje con un archivo de analogías con respuesta.
+        """
+        try:
+            ruta = input(
+                "Agente: Ingrese la ruta del archivo de analogías "
+                "(formato 'a b c d' por línea, o 'cancelar'): "
+            ).strip()
+            if not ruta or ruta.lower() == "cancelar":
+                self.responder("Evaluación cancelada.")
+                return False
+
+            topn_input = input(
+                "Agente: ¿Entre cuántas respuestas buscar la esperada? (Enter para 1): "
+            )
+            topn = int(topn_input) if topn_input.strip() else 1
+
+            reporte = self.agente.evaluar_analogias(ruta, topn)
+            if reporte is not None:
+                mostrar_evaluacion(reporte)
+                self.responder("Evaluación finalizada.")
+
+        except KeyboardInterrupt:
+            print("\n")
+            self.responder("Evaluación cancelada por el usuario.")
+        except (OSError, ValueError) as e:
+            self.responder(f"No se pudo evaluar el archivo: {e}")
+
+        return False
@@ -1,4 +1,5 @@
 from agente import Invernadero, AgenteInvernadero
+from bitacora import configurar_bitacora
 from Commands import CommandHandler
 
 
@@ -7,6 +8,9 @@ def main():
     Función principal para configurar y ejecutar la simulación del invernadero
     y demostrar la capacidad de razonamiento por analogía del agente.
     """
+    # Guardar las decisiones del agente en logs/Agente_<fecha>.jsonl.
+    configurar_bitacora("logs")
+
     # Crear el entorno del invernadero.
     invernadero_simulado = Invernadero()
 
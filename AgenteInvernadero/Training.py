@@ -1,4 +1,392 @@
+"""
+Entrenamiento del modelo Word2Vec del agente a partir de los documentos de
+``DataSets``.
+
+El texto de cada documento (.pdf o .txt) se extrae en paralelo a un fragmento
+propio (ver ``extraccion.py``) y se tokeniza una sola vez a una caché en disco
+(``.cache_tokens``), con una oración tokenizada por línea. Ambas cachés se
+identifican por el SHA-256 del contenido, así que los documentos que no
+cambiaron no se vuelven a procesar. El corpus es un iterable que vuelve a leer
+la caché de tokens en cada época, de modo que la memoria usada no crece con el
+tamaño de ``DataSets``.
+
+Junto al modelo se guarda un manifiesto (``<modelo>.manifiesto.json``) con el
+SHA-256 de cada documento con el que se entrenó. Con ``--incremental`` se
+carga el modelo existente, se amplía su vocabulario con los documentos nuevos o
+modificados y se entrena solo con ellos durante ``--epocas-incremental`` épocas,
+en lugar de volver a entrenar todo el corpus. Solo se anotan los documentos de
+los que salió texto, así que uno que falló se vuelve a intentar. Un modelo sin
+manifiesto (p. ej. el entrenado en el notebook) no se actualiza salvo con
+``--forzar``: todos sus documentos parecerían nuevos.
+
+Uso::
+
+    python Training.py --datasets ../DataSets --salida ../Models/invernadero.model
+    python Training.py --epocas 50 --checkpoints ../Models/checkpoints --cada 5
+    python Training.py --reanudar ../Models/checkpoints/invernadero_epoca20.model
+    python Training.py --incremental --epocas-incremental 5
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
 from gensim.models import Word2Vec
-from gensim.utils import simple_preprocess
 from gensim.models.callbacks import CallbackAny2Vec
-import os
+from gensim.utils import simple_preprocess
+
+from extraccion import CACHE_TEXTO, documentos, extraer_documentos
+
+PATH = "../Models"
+DATASETS = "../DataSets"
+MODEL = os.path.join(PATH, "invernadero.model")
+CACHE_TOKENS = ".cache_tokens"
+EXTENSION_MANIFIESTO = ".manifiesto.json"
+
+
+class EpochLogger(CallbackAny2Vec):
+    """
+    Callback para mostrar el progreso del entrenamiento al final de cada época.
+    """
+
+    def __init__(self, epoca_inicial=0):
+        self.epoch = epoca_inicial
+        self._inicio = time.perf_counter()
+
+    def on_epoch_end(self, model):
+        self.epoch += 1
+        duracion = time.perf_counter() - self._inicio
+        print(f"Época {self.epoch} finalizada ({duracion:.1f} s).")
+        self._inicio = time.perf_counter()
+
+
+class Checkpoint(CallbackAny2Vec):
+    """
+    Guarda el modelo completo cada ``cada`` épocas en ``directorio`` y conserva
+    solo los ``conservar`` más recientes.
+    """
+
+    def __init__(self, directorio, cada=5, conservar=3, epoca_inicial=0):
+        self.directorio = directorio
+        self.cada = cada
+        self.conservar = conservar
+        self.epoch = epoca_inicial
+        self._guardados = []
+        os.makedirs(directorio, exist_ok=True)
+
+    def on_epoch_end(self, model):
+        self.epoch += 1
+        if self.epoch % self.cada:
+            return
+        ruta = os.path.join(self.directorio, f"invernadero_epoca{self.epoch}.model")
+        model.save(ruta)
+        print(f"Checkpoint guardado en '{ruta}'.")
+        self._guardados.append(ruta)
+        while len(self._guardados) > self.conservar:
+            _eliminar_modelo(self._guardados.pop(0))
+
+
+def _eliminar_modelo(ruta):
+    """Borra un modelo guardado y sus matrices separadas (``ruta.*.npy``)."""
+    directorio = os.path.dirname(ruta) or "."
+    base = os.path.basename(ruta)
+    for nombre in os.listdir(directorio):
+        if nombre == base or nombre.startswith(base + "."):
+            os.remove(os.path.join(directorio, nombre))
+
+
+def oraciones(ruta_texto):
+    """Genera las líneas no vacías de un fragmento de texto, tokenizadas."""
+    with open(ruta_texto, "r", encoding="utf-8") as f:
+        for linea in f:
+            tokens = simple_preprocess(linea.strip())
+            if tokens:
+                yield tokens
+
+
+def ruta_cache(fragmento, cache_dir=CACHE_TOKENS):
+    """
+    Archivo de la caché de tokens de un documento, identificado por el SHA-256
+    de su contenido, igual que su fragmento de texto.
+    """
+    return os.path.join(cache_dir, f"{fragmento.resumen}.tok")
+
+
+def preparar_cache(fragmentos, cache_dir=CACHE_TOKENS):
+    """
+    Tokeniza a la caché los fragmentos de texto que aún no estén en ella,
+    leyendo y escribiendo oración por oración.
+
+    Returns:
+        list: Rutas de la caché, en el mismo orden que ``fragmentos``.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = []
+    for fragmento in fragmentos:
+        destino = ruta_cache(fragmento, cache_dir)
+        if not os.path.exists(destino):
+            temporal = destino + ".tmp"
+            n = 0
+            with open(temporal, "w", encoding="utf-8") as f:
+                for tokens in oraciones(fragmento.ruta):
+                    f.write(" ".join(tokens))
+                    f.write("\n")
+                    n += 1
+            os.replace(temporal, destino)
+            print(
+                f"  Tokenizado: {os.path.basename(fragmento.documento)} ({n} oraciones)"
+            )
+        cache.append(destino)
+    return cache
+
+
+class CorpusTokens:
+    """
+    Corpus reiterable sobre archivos de la caché de tokens: cada iteración
+    (una por época) vuelve a abrir los archivos y genera las oraciones
+    tokenizadas sin guardarlas en memoria.
+    """
+
+    def __init__(self, archivos):
+        self.archivos = list(archivos)
+
+    def __iter__(self):
+        for archivo in self.archivos:
+            with open(archivo, "r", encoding="utf-8") as f:
+                for linea in f:
+                    tokens = linea.split()
+                    if tokens:
+                        yield tokens
+
+
+def entrenar(corpus, args):
+    """Construye el vocabulario y entrena un modelo nuevo con ``args``."""
+    callbacks = [EpochLogger()]
+    if args.checkpoints:
+        callbacks.append(Checkpoint(args.checkpoints, args.cada, args.conservar))
+    modelo = Word2Vec(
+        sg=args.sg,
+        vector_size=args.dimensiones,
+        window=args.ventana,
+        min_count=args.min_count,
+        negative=args.negativo,
+        workers=args.workers,
+        seed=args.semilla,
+        epochs=args.epocas,
+    )
+    print("Construyendo vocabulario...")
+    modelo.build_vocab(corpus)
+    print(
+        f"Vocabulario: {len(modelo.wv)} palabras, {modelo.corpus_count} oraciones, "
+        f"{modelo.corpus_total_words} tokens."
+    )
+    print("Iniciando entrenamiento...")
+    modelo.train(
+        corpus,
+        total_examples=modelo.corpus_count,
+        total_words=modelo.corpus_total_words,
+        epochs=args.epocas,
+        callbacks=callbacks,
+    )
+    return modelo
+
+
+def reanudar(corpus, args):
+    """
+    Continúa el entrenamiento de un checkpoint hasta ``args.epocas`` épocas,
+    retomando la tasa de aprendizaje donde se quedó.
+    """
+    modelo = Word2Vec.load(args.reanudar)
+    coincidencia = re.search(r"epoca(\d+)", os.path.basename(args.reanudar))
+    hechas = int(coincidencia.group(1)) if coincidencia else 0
+    restantes = args.epocas - hechas
+    if restantes <= 0:
+        print(f"El checkpoint ya tiene {hechas} épocas; no queda nada por entrenar.")
+        return modelo
+
+    avance = hechas / args.epocas
+    alpha_inicial = modelo.alpha - (modelo.alpha - modelo.min_alpha) * avance
+    callbacks = [EpochLogger(hechas)]
+    if args.checkpoints:
+        callbacks.append(
+            Checkpoint(args.checkpoints, args.cada, args.conservar, hechas)
+        )
+    print(f"Reanudando desde la época {hechas}: faltan {restantes}.")
+    modelo.train(
+        corpus,
+        total_examples=modelo.corpus_count,
+        total_words=modelo.corpus_total_words,
+        epochs=restantes,
+        start_alpha=alpha_inicial,
+        end_alpha=modelo.min_alpha,
+        callbacks=callbacks,
+    )
+    return modelo
+
+
+def ruta_manifiesto(ruta_modelo):
+    """Ruta del manifiesto de documentos de un modelo."""
+    return ruta_modelo + EXTENSION_MANIFIESTO
+
+
+def leer_manifiesto(ruta_modelo):
+    """
+    Documentos ya incluidos en un modelo, como diccionario
+    ``{sha256: nombre del documento}`` (vacío si no hay manifiesto).
+    """
+    try:
+        with open(ruta_manifiesto(ruta_modelo), "r", encoding="utf-8") as f:
+            return json.load(f)["documentos"]
+    except FileNotFoundError:
+        return {}
+
+
+def guardar_manifiesto(ruta_modelo, documentos_modelo):
+    """Escribe el manifiesto de ``ruta_modelo`` con ``documentos_modelo``."""
+    with open(ruta_manifiesto(ruta_modelo), "w", encoding="utf-8") as f:
+        json.dump({"documentos": documentos_modelo}, f, indent=2, ensure_ascii=False)
+
+
+def actualizar(modelo, corpus, args):
+    """
+    Amplía el vocabulario de ``modelo`` con ``corpus`` (solo los documentos
+    nuevos) y entrena con él ``args.epocas_incremental`` épocas, desde la tasa
+    de aprendizaje inicial del modelo.
+    """
+    palabras = len(modelo.wv)
+    print("Ampliando vocabulario...")
+    modelo.build_vocab(corpus, update=True)
+    print(
+        f"Vocabulario: {len(modelo.wv)} palabras ({len(modelo.wv) - palabras} "
+        f"nuevas), {modelo.corpus_count} oraciones nuevas."
+    )
+    print("Iniciando entrenamiento incremental...")
+    modelo.train(
+        corpus,
+        total_examples=modelo.corpus_count,
+        total_words=modelo.corpus_total_words,
+        epochs=args.epocas_incremental,
+        callbacks=[EpochLogger()],
+    )
+    return modelo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--datasets", default=DATASETS)
+    parser.add_argument("--archivo", help="Entrenar solo con este documento.")
+    parser.add_argument("--salida", default=MODEL)
+    parser.add_argument("--cache", default=CACHE_TOKENS, help="Caché de tokens.")
+    parser.add_argument("--cache-texto", default=CACHE_TEXTO, help="Caché de texto.")
+    parser.add_argument(
+        "--procesos", type=int, help="Procesos para extraer los PDF (uno por CPU)."
+    )
+    parser.add_argument("--sg", type=int, choices=(0, 1), default=1)
+    parser.add_argument("--dimensiones", type=int, default=300)
+    parser.add_argument("--ventana", type=int, default=8)
+    parser.add_argument("--min-count", type=int, default=1)
+    parser.add_argument("--epocas", type=int, default=50)
+    parser.add_argument("--negativo", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--checkpoints", help="Directorio de checkpoints.")
+    parser.add_argument("--cada", type=int, default=5, help="Épocas por checkpoint.")
+    parser.add_argument("--conservar", type=int, default=3)
+    parser.add_argument("--reanudar", help="Checkpoint desde el que continuar.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Actualizar el modelo de --salida solo con los documentos nuevos.",
+    )
+    parser.add_argument("--epocas-incremental", type=int, default=5)
+    parser.add_argument(
+        "--forzar",
+        action="store_true",
+        help="Con --incremental, actualizar aunque el modelo no tenga manifiesto.",
+    )
+    parser.add_argument(
+        "--sin-kv",
+        action="store_true",
+        help="No exportar el artefacto de vectores (.kv) tras entrenar.",
+    )
+    args = parser.parse_args(argv)
+
+    rutas = documentos(args.datasets, args.archivo)
+    if not rutas:
+        print("No hay documentos .pdf o .txt para entrenar.")
+        return 1
+    if args.incremental and args.reanudar:
+        print("--incremental y --reanudar no se pueden combinar.")
+        return 1
+    if args.incremental and not os.path.exists(args.salida):
+        print(f"No existe el modelo '{args.salida}' para actualizar.")
+        return 1
+    if (
+        args.incremental
+        and not args.forzar
+        and not os.path.exists(ruta_manifiesto(args.salida))
+    ):
+        print(
+            f"El modelo '{args.salida}' no tiene manifiesto: no se sabe con qué "
+            "documentos se entrenó y --incremental volvería a entrenarlo con todos. "
+            "Use --forzar para hacerlo de todos modos."
+        )
+        return 1
+
+    print("Extrayendo texto de los documentos...")
+    fragmentos = extraer_documentos(rutas, args.cache_texto, args.procesos)
+    incluidos = leer_manifiesto(args.salida) if args.incremental else {}
+    nuevos = {}
+    for fragmento in fragmentos:
+        if fragmento.resumen not in incluidos:
+            nuevos.setdefault(fragmento.resumen, fragmento)
+    if not nuevos:
+        print("El modelo ya incluye todos los documentos; no hay nada que entrenar.")
+        return 0
+    if args.incremental:
+        print(f"Documentos nuevos o modificados: {len(nuevos)}.")
+
+    print("Preparando la caché de tokens...")
+    cache = preparar_cache(nuevos.values(), args.cache)
+    # Un documento sin oraciones no aporta nada ni se anota en el manifiesto.
+    con_texto = {}
+    archivos = []
+    for (resumen, fragmento), archivo in zip(nuevos.items(), cache):
+        if os.path.getsize(archivo) > 0:
+            con_texto[resumen] = fragmento
+            archivos.append(archivo)
+        else:
+            print(f"  Sin texto: {os.path.basename(fragmento.documento)} (se omite)")
+    if not con_texto:
+        print("Ninguno de los documentos nuevos tiene texto; no hay nada que entrenar.")
+        return 0 if args.incremental else 1
+    corpus = CorpusTokens(archivos)
+
+    if args.incremental:
+        modelo = actualizar(Word2Vec.load(args.salida), corpus, args)
+    elif args.reanudar:
+        modelo = reanudar(corpus, args)
+    else:
+        modelo = entrenar(corpus, args)
+
+    print("\nGuardando modelo...")
+    directorio = os.path.dirname(args.salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    modelo.save(args.salida)
+    for resumen, fragmento in con_texto.items():
+        incluidos[resumen] = os.path.basename(fragmento.documento)
+    guardar_manifiesto(args.salida, incluidos)
+    if not args.sin_kv:
+        from vectores import exportar_vectores
+
+        print(f"Vectores exportados a '{exportar_vectores(args.salida)}'.")
+    print("Entrenamiento finalizado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Afinador de los perfiles de cultivo del agente.
+
+Busca, para cada cultivo, los rangos de T° y humedad con los que el agente
+controla mejor el invernadero. Cada candidato es un perfil completo
+(``temp_min``, ``temp_max``, ``hum_min``, ``hum_max``) que se usa como consigna
+del agente en una simulación acelerada con ``SimuladorFlota``; el puntaje se
+calcula siempre contra el rango óptimo real del cultivo:
+
+    puntaje = % del tiempo con T° y humedad en rango
+              - peso_conmutaciones × conmutaciones de actuadores por hora
+              - peso_energia × consumo medio de los actuadores
+
+Los candidatos se reparten en lotes entre los procesos de un
+``ProcessPoolExecutor``; cada lote es una flota con ``repeticiones``
+invernaderos por candidato. Todos los candidatos se simulan con los mismos
+números aleatorios (la repetición j de una traza recibe el mismo ruido en
+todos los lotes), de modo que las diferencias de puntaje se deben al perfil y
+no a la suerte, y los resultados son reproducibles. El clima puede venir de los escenarios de ``simulacion`` o de
+trazas propias en CSV (mismo formato que ``ingesta.py``).
+
+Uso::
+
+    python afinador.py --candidatos 3000 --salida perfiles_afinados.json
+    python afinador.py --cultivos tomate pepino --traza clima_enero.csv \\
+        --traza clima_julio.csv --procesos 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from agente import AgenteInvernadero
+from flota import SimuladorFlota
+from ingesta import leer_csv
+from metricas import CONSUMO_ACTUADORES
+from simulacion import ESCENARIOS, traza_escenario
+
+CLAVES_PERFIL = ("temp_min", "temp_max", "hum_min", "hum_max")
+
+PESO_CONMUTACIONES = 0.5
+PESO_ENERGIA = 10.0
+
+# Número de actuadores encendidos para cada máscara.
+_BITS_ENCENDIDOS = np.array([bin(m).count("1") for m in range(8)], dtype=np.int64)
+
+
+class TrazaClimatica:
+    """
+    Clima exterior con el que se evalúan los candidatos.
+
+    Attributes:
+        nombre: Escenario o archivo de origen.
+        temperatura_inicial, humedad_inicial: Primera lectura de la traza.
+        deriva: Arreglo (pasos, 2) con el cambio de T° y humedad en cada paso.
+    """
+
+    def __init__(self, nombre, lecturas):
+        lecturas = np.asarray(lecturas, dtype=np.float64)
+        if lecturas.ndim != 2 or len(lecturas) < 2:
+            raise ValueError(f"La traza '{nombre}' necesita al menos dos lecturas.")
+        self.nombre = nombre
+        self.temperatura_inicial = float(lecturas[0, 0])
+        self.humedad_inicial = float(lecturas[0, 1])
+        self.deriva = np.diff(lecturas, axis=0)
+
+    @property
+    def pasos(self):
+        return len(self.deriva)
+
+    @classmethod
+    def desde_origen(cls, origen, pasos=1440, paso_seg=60):
+        """Carga un escenario de ``simulacion.ESCENARIOS`` o un archivo CSV."""
+        if origen in ESCENARIOS:
+            lecturas = list(traza_escenario(origen, pasos + 1, paso_seg))
+        else:
+            lecturas = [(l.temperatura, l.humedad) for l in leer_csv(origen)]
+        return cls(origen, lecturas)
+
+
+def generar_candidatos(perfil, n, margen=4, semilla=0):
+    """
+    Genera hasta ``n`` perfiles candidatos alrededor de ``perfil``, con cada
+    límite desplazado en enteros dentro de ``±margen``. El primer candidato es
+    siempre el perfil actual, para tenerlo como referencia.
+    """
+    base = tuple(perfil[c] for c in CLAVES_PERFIL)
+    desplazamientos = range(-margen, margen + 1)
+    rejilla = [
+        tuple(b + d for b, d in zip(base, delta))
+        for delta in itertools.product(desplazamientos, repeat=len(base))
+        if any(delta)
+    ]
+    rejilla = [
+        c for c in rejilla if c[0] < c[1] and c[2] < c[3] and c[0] >= 0 and c[2] >= 0
+    ]
+    rng = np.random.default_rng(semilla)
+    elegidos = [rejilla[i] for i in rng.permutation(len(rejilla))[: max(0, n - 1)]]
+    return [dict(zip(CLAVES_PERFIL, c)) for c in [base] + elegidos]
+
+
+def evaluar_lote(
+    objetivo,
+    candidatos,
+    trazas,
+    repeticiones=4,
+    semilla=(0,),
+    paso_seg=60,
+    peso_conmutaciones=PESO_CONMUTACIONES,
+    peso_energia=PESO_ENERGIA,
+):
+    """
+    Simula un lote de candidatos y devuelve sus métricas, en el mismo orden.
+
+    Se ejecuta en los procesos del afinador, por lo que solo recibe y devuelve
+    datos serializables.
+
+    Args:
+        objetivo: Perfil con el rango óptimo real del cultivo.
+        candidatos: Lista de perfiles a usar como consigna del agente.
+        trazas: Lista de ``TrazaClimatica``; None simula sin clima externo
+            (1440 pasos desde 40°C y 55%, como ``simular_un_dia``).
+        repeticiones: Invernaderos simulados por candidato y traza; la
+            repetición j de la traza k usa el mismo flujo aleatorio en todos
+            los candidatos.
+        semilla: Secuencia de enteros con la semilla; debe ser la misma en
+            todos los lotes para que sus candidatos sean comparables.
+        paso_seg: Segundos simulados por paso, para las conmutaciones por hora.
+    """
+    nombres = [f"candidato{i}" for i in range(len(candidatos))]
+    cultivos = [n for n in nombres for _ in range(repeticiones)]
+    perfiles = dict(zip(nombres, candidatos))
+
+    suma_rango = np.zeros(len(candidatos))
+    suma_conmutaciones = np.zeros(len(candidatos))
+    suma_energia = np.zeros(len(candidatos))
+    for k, traza in enumerate(trazas or [None]):
+        if traza is None:
+            flota = SimuladorFlota(
+                cultivos,
+                semilla=[*semilla, k],
+                perfiles=perfiles,
+                flujos=repeticiones,
+            )
+            resultado = flota.simular(1440)
+        else:
+            flota = SimuladorFlota(
+                cultivos,
+                temperatura_inicial=traza.temperatura_inicial,
+                humedad_inicial=traza.humedad_inicial,
+                semilla=[*semilla, k],
+                perfiles=perfiles,
+                flujos=repeticiones,
+            )
+            resultado = flota.simular(traza.pasos, deriva=traza.deriva)
+
+        t, h, m = resultado.temperatura, resultado.humedad, resultado.actuadores
+        en_rango = (
+            (t >= objetivo["temp_min"])
+            & (t <= objetivo["temp_max"])
+            & (h >= objetivo["hum_min"])
+            & (h <= objetivo["hum_max"])
+        )
+        porcentaje = en_rango.mean(axis=0) * 100
+
+        cambios = _BITS_ENCENDIDOS[m[1:] ^ m[:-1]].sum(axis=0)
+        cambios += _BITS_ENCENDIDOS[m[0]]
+        horas = resultado.pasos * paso_seg / 3600
+        conmutaciones = cambios / horas
+
+        energia = sum(
+            consumo * ((m & bit) != 0).mean(axis=0)
+            for bit, consumo in CONSUMO_ACTUADORES.items()
+        )
+
+        suma_rango += porcentaje.reshape(-1, repeticiones).mean(axis=1)
+        suma_conmutaciones += conmutaciones.reshape(-1, repeticiones).mean(axis=1)
+        suma_energia += energia.reshape(-1, repeticiones).mean(axis=1)
+
+    n_trazas = len(trazas or [None])
+    metricas = []
+    for i, candidato in enumerate(candidatos):
+        porcentaje = suma_rango[i] / n_trazas
+        conmutaciones = suma_conmutaciones[i] / n_trazas
+        energia = suma_energia[i] / n_trazas
+        metricas.append(
+            {
+                "perfil": candidato,
+                "porcentaje_en_rango": round(float(porcentaje), 3),
+                "conmutaciones_por_hora": round(float(conmutaciones), 3),
+                "energia": round(float(energia), 4),
+                "puntaje": round(
+                    float(
+                        porcentaje
+                        - peso_conmutaciones * conmutaciones
+                        - peso_energia * energia
+                    ),
+                    3,
+                ),
+            }
+        )
+    return metricas
+
+
+def afinar(
+    cultivos=None,
+    candidatos=2000,
+    margen=4,
+    trazas=None,
+    repeticiones=4,
+    tamano_lote=200,
+    procesos=None,
+    semilla=0,
+    paso_seg=60,
+    peso_conmutaciones=PESO_CONMUTACIONES,
+    peso_energia=PESO_ENERGIA,
+    mostrar_progreso=True,
+):
+    """
+    Afina los perfiles de ``cultivos`` (todos si es None) en paralelo.
+
+    Returns:
+        dict: {cultivo: lista de métricas de todos los candidatos, de mayor a
+        menor puntaje}. El candidato con ``"referencia": True`` es el perfil
+        actual.
+    """
+    perfiles = AgenteInvernadero.PERFILES_CULTIVO
+    cultivos = cultivos or list(perfiles)
+    resultados = {cultivo: [] for cultivo in cultivos}
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = {}
+        for cultivo in cultivos:
+            objetivo = perfiles[cultivo]
+            lista = generar_candidatos(objetivo, candidatos, margen, semilla)
+            for inicio in range(0, len(lista), tamano_lote):
+                futuro = ejecutor.submit(
+                    evaluar_lote,
+                    objetivo,
+                    lista[inicio : inicio + tamano_lote],
+                    trazas,
+                    repeticiones,
+                    [semilla],
+                    paso_seg,
+                    peso_conmutaciones,
+                    peso_energia,
+                )
+                futuros[futuro] = (cultivo, inicio == 0)
+
+        inicio = time.perf_counter()
+        for hechos, futuro in enumerate(as_completed(futuros), start=1):
+            cultivo, incluye_referencia = futuros[futuro]
+            metricas = futuro.result()
+            if incluye_referencia:
+                metricas[0]["referencia"] = True
+            resultados[cultivo].extend(metricas)
+            if mostrar_progreso:
+                print(
+                    f"\rLotes: {hechos}/{len(futuros)} "
+                    f"({time.perf_counter() - inicio:.1f} s)",
+                    end="",
+                    flush=True,
+                )
+    if mostrar_progreso:
+        print()
+
+    for metricas in resultados.values():
+        metricas.sort(key=lambda m: m["puntaje"], reverse=True)
+    return resultados
+
+
+def tabla_perfiles(resultados):
+    """Perfiles ganadores con el mismo formato que ``PERFILES_CULTIVO``."""
+    return {cultivo: dict(m[0]["perfil"]) for cultivo, m in resultados.items()}
+
+
+def _referencia(metricas):
+    return next(m for m in metricas if m.get("referencia"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--cultivos",
+        nargs="+",
+        choices=AgenteInvernadero.get_perfiles_disponibles(),
+        help="Cultivos a afinar (todos por defecto).",
+    )
+    parser.add_argument("--candidatos", type=int, default=2000)
+    parser.add_argument(
+        "--margen", type=int, default=4, help="Desplazamiento máximo de cada límite."
+    )
+    parser.add_argument(
+        "--traza",
+        action="append",
+        help="Escenario de simulacion.ESCENARIOS o CSV de T°/humedad; repetible.",
+    )
+    parser.add_argument("--pasos", type=int, default=1440, help="Pasos por escenario.")
+    parser.add_argument("--paso-seg", type=float, default=60)
+    parser.add_argument("--repeticiones", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=200)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count())
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--peso-conmutaciones", type=float, default=PESO_CONMUTACIONES)
+    parser.add_argument("--peso-energia", type=float, default=PESO_ENERGIA)
+    parser.add_argument("--salida", help="Archivo JSON con la nueva tabla de perfiles.")
+    args = parser.parse_args(argv)
+
+    trazas = None
+    if args.traza:
+        trazas = [
+            TrazaClimatica.desde_origen(t, args.pasos, args.paso_seg)
+            for t in args.traza
+        ]
+
+    inicio = time.perf_counter()
+    resultados = afinar(
+        cultivos=args.cultivos,
+        candidatos=args.candidatos,
+        margen=args.margen,
+        trazas=trazas,
+        repeticiones=args.repeticiones,
+        tamano_lote=args.lote,
+        procesos=args.procesos,
+        semilla=args.semilla,
+        paso_seg=args.paso_seg,
+        peso_conmutaciones=args.peso_conmutaciones,
+        peso_energia=args.peso_energia,
+    )
+    duracion = time.perf_counter() - inicio
+    evaluados = sum(len(m) for m in resultados.values())
+    print(f"{evaluados} candidatos evaluados en {duracion:.1f} s.\n")
+
+    for cultivo, metricas in resultados.items():
+        mejor, actual = metricas[0], _referencia(metricas)
+        print(f"--- {cultivo} ---")
+        for etiqueta, m in (("Actual", actual), ("Mejor", mejor)):
+            p = m["perfil"]
+            print(
+                f"  {etiqueta:<7} T°[{p['temp_min']}-{p['temp_max']}] "
+                f"H[{p['hum_min']}-{p['hum_max']}]  "
+                f"en rango: {m['porcentaje_en_rango']:.1f}%  "
+                f"conm/h: {m['conmutaciones_por_hora']:.2f}  "
+                f"energía: {m['energia']:.3f}  puntaje: {m['puntaje']:.2f}"
+            )
+
+    perfiles = tabla_perfiles(resultados)
+    print("\nPERFILES_CULTIVO = {")
+    for cultivo, perfil in perfiles.items():
+        print(f'    "{cultivo}": {json.dumps(perfil)},')
+    print("}")
+
+    if args.salida:
+        reporte = {
+            "parametros": {
+                k: v for k, v in vars(args).items() if k not in ("salida", "cultivos")
+            },
+            "perfiles": perfiles,
+            "metricas": {
+                cultivo: {"actual": _referencia(m), "mejor": m[0], "top": m[:10]}
+                for cultivo, m in resultados.items()
+            },
+        }
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        print(f"\nTabla de perfiles guardada en '{args.salida}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,145 @@
+import itertools
 import logging
 import random
-import time
-import os
-from datetime import datetime
-from gensim.models import Word2Vec, KeyedVectors
-
-# Configuración del logging para guardar las decisiones del agente
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-log_filename = os.path.join(log_dir, f"Agente_{timestamp}.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(message)s",
-    filename=log_filename,
-    filemode="w",
-    encoding="utf-8",
+from collections import OrderedDict
+
+from analogias import ConsultasLote, leer_preguntas
+from bitacora import LOGGER_AGENTE, registrar_decision
+from indice_ann import BuscadorSimilares
+from metricas import MetricasActuadores
+from simulacion import (
+    OBJETIVO_PORCENTAJE_EN_RANGO,
+    OBJETIVO_TIEMPO_REACCION_SEG,
+    CriteriosExito,
+    RelojSimulado,
 )
+from tabla_decision import (
+    APAGAR_CALEFACTOR,
+    APAGAR_HUMIDIFICADOR,
+    APAGAR_VENTILADOR,
+    BIT_CALEFACTOR,
+    BIT_HUMIDIFICADOR,
+    BIT_VENTILADOR,
+    CODIGOS_ACCION,
+    ENCENDER_CALEFACTOR,
+    ENCENDER_HUMIDIFICADOR,
+    ENCENDER_VENTILADOR,
+    ENCENDER_VENTILADOR_HUMEDAD,
+    NINGUNA,
+    TablaDecision,
+)
+from vectores import CACHE_CONSULTAS, cargar_vectores_modelo, huella_modelo
+
+# Los mensajes del agente no se configuran al importar; ver bitacora.configurar_bitacora.
+logger = logging.getLogger(LOGGER_AGENTE)
+
+_contador_invernaderos = itertools.count(1)
 
 
 # --------------------------------------------------------------
 # CLASE PARA SIMULAR EL ENTORNO DEL INVERNADERO
 # --------------------------------------------------------------
+class EstadoInvernadero:
+    """
+    Instantánea compacta del estado de un invernadero.
+
+    Admite acceso por atributo y, por compatibilidad, por clave como un
+    diccionario (``estado["temperatura"]``).
+    """
+
+    __slots__ = (
+        "temperatura",
+        "humedad",
+        "calefactor_encendido",
+        "ventilador_encendido",
+        "humidificador_encendido",
+    )
+
+    def __init__(
+        self,
+        temperatura=0.0,
+        humedad=0.0,
+        calefactor_encendido=False,
+        ventilador_encendido=False,
+        humidificador_encendido=False,
+    ):
+        self.temperatura = temperatura
+        self.humedad = humedad
+        self.calefactor_encendido = calefactor_encendido
+        self.ventilador_encendido = ventilador_encendido
+        self.humidificador_encendido = humidificador_encendido
+
+    def __getitem__(self, clave):
+        try:
+            return getattr(self, clave)
+        except AttributeError:
+            raise KeyError(clave) from None
+
+    def __repr__(self):
+        return f"EstadoInvernadero({self.como_dict()})"
+
+    def copiar(self):
+        """Devuelve una copia independiente del estado."""
+        return EstadoInvernadero(
+            self.temperatura,
+            self.humedad,
+            self.calefactor_encendido,
+            self.ventilador_encendido,
+            self.humidificador_encendido,
+        )
+
+    def como_dict(self):
+        """Devuelve el estado como diccionario."""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
 class Invernadero:
-    def __init__(self, temperatura_inicial=40, humedad_inicial=55):
+    __slots__ = (
+        "identificador",
+        "rng",
+        "telemetria",
+        "temperatura",
+        "humedad",
+        "calefactor_encendido",
+        "ventilador_encendido",
+        "humidificador_encendido",
+        "_estado",
+    )
+
+    def __init__(
+        self,
+        temperatura_inicial=40,
+        humedad_inicial=55,
+        rng=None,
+        identificador=None,
+        telemetria=None,
+    ):
+        """
+        Args:
+            rng: Generador con método ``uniform(a, b)`` para la influencia del
+                clima (p. ej. ``random.Random(semilla)`` o
+                ``numpy.random.default_rng(semilla)``). Por defecto se usa el
+                módulo ``random`` global.
+            identificador: Nombre del invernadero en la bitácora de decisiones.
+            telemetria: ``telemetria.TelemetriaAnillo`` opcional donde se guarda
+                cada lectura tras ``actualizar_estado``.
+        """
+        if identificador is None:
+            identificador = f"inv{next(_contador_invernaderos)}"
+        self.identificador = identificador
+        self.rng = rng if rng is not None else random
+        self.telemetria = telemetria
+        self._estado = EstadoInvernadero()
         self.temperatura = temperatura_inicial
         self.humedad = humedad_inicial
         self.calefactor_encendido = False
         self.ventilador_encendido = False
         self.humidificador_encendido = False
-        logging.info(
-            f"Invernadero inicializado. Temperatura°: {self.temperatura}°C, Humedad: {self.humedad}%"
+        logger.info(
+            "Invernadero %s inicializado. Temperatura°: %s°C, Humedad: %s%%",
+            self.identificador,
+            self.temperatura,
+            self.humedad,
         )
 
     def actualizar_estado(self):
@@ -51,22 +159,41 @@ class Invernadero:
             self.temperatura -= 0.2
 
         # Influencia externa aleatoria (clima)
-        self.temperatura += random.uniform(-1.2, 1.2)
-        self.humedad += random.uniform(-1.2, 1.2)
+        self.temperatura += self.rng.uniform(-1.2, 1.2)
+        self.humedad += self.rng.uniform(-1.2, 1.2)
 
         # Limitar valores a rangos razonables
         self.temperatura = round(max(0, min(50, self.temperatura)), 2)
         self.humedad = round(max(0, min(100, self.humedad)), 2)
 
+        if self.telemetria is not None:
+            self.telemetria.registrar(
+                self.temperatura, self.humedad, self.mascara_actuadores()
+            )
+
     def obtener_estado(self):
-        """Devuelve el estado actual del invernadero."""
-        return {
-            "temperatura": self.temperatura,
-            "humedad": self.humedad,
-            "calefactor_encendido": self.calefactor_encendido,
-            "ventilador_encendido": self.ventilador_encendido,
-            "humidificador_encendido": self.humidificador_encendido,
-        }
+        """
+        Devuelve el estado actual del invernadero.
+
+        Para no reservar memoria en cada tick se reutiliza siempre el mismo
+        ``EstadoInvernadero``, que se sobrescribe en la siguiente llamada; use
+        ``copiar()`` para conservarlo.
+        """
+        estado = self._estado
+        estado.temperatura = self.temperatura
+        estado.humedad = self.humedad
+        estado.calefactor_encendido = self.calefactor_encendido
+        estado.ventilador_encendido = self.ventilador_encendido
+        estado.humidificador_encendido = self.humidificador_encendido
+        return estado
+
+    def mascara_actuadores(self):
+        """Devuelve el estado de los actuadores como máscara de bits ``BIT_*``."""
+        return (
+            (BIT_CALEFACTOR if self.calefactor_encendido else 0)
+            | (BIT_VENTILADOR if self.ventilador_encendido else 0)
+            | (BIT_HUMIDIFICADOR if self.humidificador_encendido else 0)
+        )
 
 
 # --------------------------------------------------------------
@@ -85,10 +212,31 @@ class AgenteInvernadero:
         "default": {"temp_min": 20, "temp_max": 25, "hum_min": 60, "hum_max": 70},
     }
 
-    def __init__(self, invernadero, tipo_cultivo="tomate"):
+    # Tablas de decisión ya compiladas, por rangos óptimos; las menos usadas
+    # se descartan pasadas MAX_TABLAS (el afinador prueba miles de rangos).
+    _TABLAS = OrderedDict()
+    MAX_TABLAS = 256
+
+    # Modelo de lenguaje usado para las analogías semánticas.
+    RUTA_MODELO = "invernadero.model"
+
+    def __init__(
+        self,
+        invernadero,
+        tipo_cultivo="tomate",
+        ruta_modelo=None,
+        usar_indice_ann=False,
+    ):
         self.invernadero = invernadero
         self.tipo_cultivo = tipo_cultivo.lower()
+        self.ruta_modelo = ruta_modelo or self.RUTA_MODELO
+        # El índice aproximado puede devolver otra palabra que la búsqueda
+        # exacta: solo se usa si se pide (ver indice_ann.py).
+        self.usar_indice_ann = usar_indice_ann
         self.modelo_vectores = None
+        self.buscador = None
+        self._huella_modelo = None
+        self._consultas_lote = None
 
         perfil = self.PERFILES_CULTIVO.get(
             self.tipo_cultivo, self.PERFILES_CULTIVO["default"]
@@ -97,11 +245,21 @@ class AgenteInvernadero:
         self.temp_optima_max = perfil["temp_max"]
         self.hum_optima_min = perfil["hum_min"]
         self.hum_optima_max = perfil["hum_max"]
+        self.tabla = self._obtener_tabla()
+        self.metricas = MetricasActuadores(
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
+        )
 
-        logging.info(f"Agente creado para cultivo de '{self.tipo_cultivo}'.")
-        logging.info(
-            f"T° óptima: [{self.temp_optima_min}-{self.temp_optima_max}°C], "
-            f"Humedad óptima: [{self.hum_optima_min}-{self.hum_optima_max}%]"
+        logger.info("Agente creado para cultivo de '%s'.", self.tipo_cultivo)
+        logger.info(
+            "T° óptima: [%s-%s°C], Humedad óptima: [%s-%s%%]",
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
         )
 
     def set_cultivo(self, tipo_cultivo):
@@ -116,12 +274,39 @@ class AgenteInvernadero:
         self.temp_optima_max = perfil["temp_max"]
         self.hum_optima_min = perfil["hum_min"]
         self.hum_optima_max = perfil["hum_max"]
+        self.tabla = self._obtener_tabla()
+        self.metricas.fijar_rango(
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
+        )
+
+        logger.info("Agente reconfigurado para cultivo de '%s'.", self.tipo_cultivo)
+        logger.info(
+            "Nueva T° óptima: [%s-%s°C], Nueva Humedad óptima: [%s-%s%%]",
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
+        )
 
-        logging.info(f"Agente reconfigurado para cultivo de '{self.tipo_cultivo}'.")
-        logging.info(
-            f"Nueva T° óptima: [{self.temp_optima_min}-{self.temp_optima_max}°C], "
-            f"Nueva Humedad óptima: [{self.hum_optima_min}-{self.hum_optima_max}%]"
+    def _obtener_tabla(self):
+        """Devuelve la tabla de decisión compilada para los rangos actuales."""
+        clave = (
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
         )
+        tabla = self._TABLAS.get(clave)
+        if tabla is not None:
+            self._TABLAS.move_to_end(clave)
+            return tabla
+        tabla = self._TABLAS[clave] = TablaDecision.compilar(self)
+        while len(self._TABLAS) > self.MAX_TABLAS:
+            self._TABLAS.popitem(last=False)
+        return tabla
 
     @classmethod
     def get_perfiles_disponibles(cls):
@@ -129,26 +314,88 @@ class AgenteInvernadero:
         return list(cls.PERFILES_CULTIVO.keys())
 
     def _cargar_modelo_vectores(self):
-        """Carga el modelo Word2Vec si aún no ha sido cargado."""
+        """
+        Carga los vectores del modelo si aún no han sido cargados. Si existe el
+        artefacto exportado con ``vectores.py`` se mapea en memoria en lugar de
+        cargar el modelo Word2Vec completo.
+        """
+        if self.modelo_vectores is not None:
+            huella = huella_modelo(self.ruta_modelo)
+            if huella != self._huella_modelo:
+                # El modelo cambió en disco: se recarga y se olvidan sus consultas.
+                CACHE_CONSULTAS.invalidar(self._huella_modelo)
+                self.modelo_vectores = None
         if self.modelo_vectores is None:
-            model_path = "invernadero.model"
+            model_path = self.ruta_modelo
             print(f"\nIntentando cargar el modelo de lenguaje desde: {model_path}")
             try:
-                full_model = Word2Vec.load(model_path)
-                self.modelo_vectores = full_model.wv
-                print("✅ Modelo de lenguaje cargado exitosamente.")
+                self._huella_modelo = huella_modelo(model_path)
+                self.modelo_vectores, ruta = cargar_vectores_modelo(model_path)
+                if self.usar_indice_ann:
+                    self.buscador = BuscadorSimilares.para_modelo(
+                        self.modelo_vectores, model_path
+                    )
+                else:
+                    self.buscador = BuscadorSimilares(self.modelo_vectores)
+                print(f"✅ Modelo de lenguaje cargado exitosamente ('{ruta}').")
             except Exception as e:
                 print(
                     f"❌ ADVERTENCIA: No se pudo cargar el modelo desde '{model_path}'."
                 )
                 print(f"   Razón: {e}")
                 print(
-                    "   Por favor, asegúrese de que el archivo 'invernadero.model' exista y sea un modelo Word2Vec válido."
+                    f"   Por favor, asegúrese de que el archivo '{model_path}' exista y sea un modelo Word2Vec válido."
                 )
                 print("   La funcionalidad de analogía no estará disponible.")
                 return False
         return True
 
+    def consultar_similares(self, positivos, negativos=(), topn=10):
+        """
+        Palabras más similares a ``positivos`` - ``negativos``, a través de la
+        caché LRU de consultas compartida entre agentes. Con
+        ``usar_indice_ann`` se usa el índice aproximado del modelo, si existe
+        (ver ``indice_ann.py``); si no, la búsqueda es exacta.
+
+        Returns:
+            tuple: Pares (palabra, similitud), o None si no hay modelo.
+
+        Raises:
+            KeyError: Si alguna palabra no está en el vocabulario.
+        """
+        if not self._cargar_modelo_vectores():
+            return None
+        return CACHE_CONSULTAS.most_similar(
+            self._huella_modelo, self.buscador, positivos, negativos, topn
+        )
+
+    def consultas_lote(self):
+        """
+        Devuelve el ``ConsultasLote`` del modelo actual para resolver analogías
+        y similitudes por lotes, o None si no se pudo cargar el modelo.
+        """
+        if not self._cargar_modelo_vectores():
+            return None
+        if (
+            self._consultas_lote is None
+            or self._consultas_lote.wv is not self.modelo_vectores
+        ):
+            self._consultas_lote = ConsultasLote(self.modelo_vectores)
+        return self._consultas_lote
+
+    def evaluar_analogias(self, ruta_preguntas, topn=1):
+        """
+        Evalúa el modelo con un archivo de analogías con respuesta esperada
+        (formato ``questions-words.txt``).
+
+        Returns:
+            dict: Reporte de ``ConsultasLote.evaluar``, o None si no hay modelo.
+        """
+        consultas = self.consultas_lote()
+        if consultas is None:
+            return None
+        return consultas.evaluar(leer_preguntas(ruta_preguntas), topn)
+
     def realizar_analogia_semantica(self, p1_es_a, p2_como, p3_es_a):
         """
         Realiza una analogía semántica del tipo "p1 es a p2 como X es a p3".
@@ -159,9 +406,7 @@ class AgenteInvernadero:
 
         try:
             # La función most_similar busca X en la ecuación: p1 - p2 + p3 = X
-            resultado = self.modelo_vectores.most_similar(
-                positive=[p1_es_a, p3_es_a], negative=[p2_como], topn=1
-            )
+            resultado = self.consultar_similares([p1_es_a, p3_es_a], [p2_como], topn=1)
             palabra_resultante, score = resultado[0]
             print(
                 f"🧠 ANALOGÍA: '{p1_es_a}' es a '{p2_como}' como '{palabra_resultante.upper()}' es a '{p3_es_a}'. (Confianza: {score:.2f})"
@@ -208,96 +453,90 @@ class AgenteInvernadero:
                 return "apagar_humidificador"
         return "ninguna_hum"
 
-    def _ejecutar_acciones(self, acciones):
-        """Ejecuta las acciones decididas y actualiza el estado del invernadero."""
-        for accion in acciones:
+    @staticmethod
+    def _resolver_acciones(accion_temp, accion_hum):
+        """
+        Combina las acciones de ambos motores en el orden en que se ejecutan.
+
+        La acción de humedad se aplica primero y la de temperatura al final, de
+        modo que ante un conflicto (p. ej. frío y humedad alta) prevalece la
+        temperatura. Se descartan los centinelas y las acciones repetidas.
+        """
+        acciones = []
+        for accion in (accion_hum, accion_temp):
+            if CODIGOS_ACCION[accion] and accion not in acciones:
+                acciones.append(accion)
+        return acciones
+
+    def _ejecutar_acciones(self, codigos, temperatura, humedad):
+        """
+        Ejecuta los códigos de acción decididos para el estado observado
+        (``temperatura``, ``humedad``), actualiza el invernadero y registra cada
+        decisión en la bitácora.
+        """
+        invernadero = self.invernadero
+        for codigo in codigos:
             # --- Acciones de Temperatura y Humedad ---
-            if accion == "encender_ventilador":
-                self.invernadero.ventilador_encendido = True
-                self.invernadero.calefactor_encendido = False
-                logging.info(
-                    f"DECISIÓN (T°={self.invernadero.temperatura}°C): ALTA. Encendiendo ventilador."
-                )
-            elif accion == "encender_ventilador_humedad":
-                self.invernadero.ventilador_encendido = True
-                self.invernadero.calefactor_encendido = False
-                logging.info(
-                    f"DECISIÓN (H={self.invernadero.humedad}%): ALTA. Encendiendo ventilador para reducir humedad."
-                )
-            elif accion == "encender_calefactor":
-                self.invernadero.calefactor_encendido = True
-                self.invernadero.ventilador_encendido = False
-                logging.info(
-                    f"DECISIÓN (T°={self.invernadero.temperatura}°C): BAJA. Encendiendo calefactor."
-                )
-            elif accion == "apagar_ventilador":
-                self.invernadero.ventilador_encendido = False
-                logging.info(f"DECISIÓN (T° y H° ÓPTIMAS): Apagando ventilador.")
-            elif accion == "apagar_calefactor":
-                self.invernadero.calefactor_encendido = False
-                logging.info(
-                    f"DECISIÓN (T°={self.invernadero.temperatura}°C): ÓPTIMA. Apagando calefactor."
-                )
-            elif accion == "encender_humidificador":
-                self.invernadero.humidificador_encendido = True
-                logging.info(
-                    f"DECISIÓN (H={self.invernadero.humedad}%): BAJA. Encendiendo humidificador."
-                )
-            elif accion == "apagar_humidificador":
-                self.invernadero.humidificador_encendido = False
-                logging.info(
-                    f"DECISIÓN (H={self.invernadero.humedad}%): ÓPTIMA. Apagando humidificador."
-                )
+            if codigo == ENCENDER_VENTILADOR or codigo == ENCENDER_VENTILADOR_HUMEDAD:
+                invernadero.ventilador_encendido = True
+                invernadero.calefactor_encendido = False
+            elif codigo == ENCENDER_CALEFACTOR:
+                invernadero.calefactor_encendido = True
+                invernadero.ventilador_encendido = False
+            elif codigo == APAGAR_VENTILADOR:
+                invernadero.ventilador_encendido = False
+            elif codigo == APAGAR_CALEFACTOR:
+                invernadero.calefactor_encendido = False
+            elif codigo == ENCENDER_HUMIDIFICADOR:
+                invernadero.humidificador_encendido = True
+            elif codigo == APAGAR_HUMIDIFICADOR:
+                invernadero.humidificador_encendido = False
+            registrar_decision(invernadero.identificador, temperatura, humedad, codigo)
 
     def procesar(self):
         """Paso principal del agente: percibe, decide y actúa."""
-        estado = self.invernadero.obtener_estado()
-        accion_temp = self._motor_inferencia_temperatura(estado)
-        accion_hum = self._motor_inferencia_humedad(estado)
+        invernadero = self.invernadero
+        temperatura = invernadero.temperatura
+        humedad = invernadero.humedad
+        codigos = self.tabla.decidir(
+            temperatura, humedad, invernadero.mascara_actuadores()
+        )
 
-        acciones_netas = {accion_temp, accion_hum}
-        acciones_netas.discard("ninguna_temp")
-        acciones_netas.discard("ninguna_hum")
+        if not codigos:
+            # Estable: no se requieren acciones.
+            registrar_decision(invernadero.identificador, temperatura, humedad, NINGUNA)
+        else:
+            self._ejecutar_acciones(codigos, temperatura, humedad)
 
-        if not acciones_netas:
-            logging.info(
-                f"INFO (T°={estado['temperatura']}°C, H={estado['humedad']}%): Estable. No se requieren acciones."
-            )
+    def decidir(self, temperatura, humedad):
+        """
+        Decide y actúa sobre una lectura externa de T° y H°, combinada con el
+        estado real de los actuadores, sin imprimir nada.
+
+        Returns:
+            tuple: Códigos de acción ejecutados (vacía si no hubo acción).
+        """
+        codigos = self.tabla.decidir(
+            temperatura, humedad, self.invernadero.mascara_actuadores()
+        )
+        if codigos:
+            self._ejecutar_acciones(codigos, temperatura, humedad)
         else:
-            self._ejecutar_acciones(list(acciones_netas))
+            registrar_decision(
+                self.invernadero.identificador, temperatura, humedad, NINGUNA
+            )
+        return codigos
 
     def procesar_estado_manual(self, temperatura, humedad):
         """
         Procesa un estado de T° y H° proporcionado manualmente, decide y actúa.
         Muestra el estado de los actuadores después de actuar.
         """
-        # Crear un diccionario de estado con los valores manuales
-        # y el estado real de los actuadores para los motores de inferencia.
-        estado_actual_actuadores = self.invernadero.obtener_estado()
-        estado_manual = {
-            "temperatura": temperatura,
-            "humedad": humedad,
-            "calefactor_encendido": estado_actual_actuadores["calefactor_encendido"],
-            "ventilador_encendido": estado_actual_actuadores["ventilador_encendido"],
-            "humidificador_encendido": estado_actual_actuadores[
-                "humidificador_encendido"
-            ],
-        }
-
-        logging.info(f"PROCESO MANUAL: T°={temperatura}°C, H={humedad}%")
-
-        accion_temp = self._motor_inferencia_temperatura(estado_manual)
-        accion_hum = self._motor_inferencia_humedad(estado_manual)
-
-        acciones_netas = {accion_temp, accion_hum}
-        acciones_netas.discard("ninguna_temp")
-        acciones_netas.discard("ninguna_hum")
-
-        if not acciones_netas:
-            logging.info(f"INFO MANUAL: Estable. No se requieren acciones.")
+        logger.info("PROCESO MANUAL: T°=%s°C, H=%s%%", temperatura, humedad)
+
+        codigos = self.decidir(temperatura, humedad)
+        if not codigos:
             print("--- Agente no requiere acción ---")
-        else:
-            self._ejecutar_acciones(list(acciones_netas))
 
         # Mostrar el resultado de las acciones
         estado_final_actuadores = self.invernadero.obtener_estado()
@@ -308,28 +547,128 @@ class AgenteInvernadero:
             f"Humidificador: {'ON' if estado_final_actuadores['humidificador_encendido'] else 'OFF'}"
         )
 
-    def simular_un_dia(self, duracion_simulacion_seg=60):
-        """Ejecuta un ciclo de simulación para un "día"."""
+    def simular_un_dia(
+        self,
+        duracion_simulacion_seg=24 * 60 * 60,
+        paso_seg=60,
+        tiempo_real=False,
+        aceleracion=1.0,
+        perturbaciones=None,
+        mostrar_pasos=None,
+    ):
+        """
+        Ejecuta un ciclo de simulación para un "día" sobre un reloj simulado.
+
+        Args:
+            duracion_simulacion_seg: Duración de la simulación en segundos simulados.
+            paso_seg: Segundos simulados que representa cada tick.
+            tiempo_real: Si es True, limita la velocidad al reloj de pared
+                (dividido por ``aceleracion``); si es False, corre tan rápido
+                como lo permita la CPU.
+            aceleracion: Segundos simulados por segundo real en modo tiempo real.
+            perturbaciones: Diccionario {segundo_simulado: delta_temperatura} con
+                cambios bruscos de temperatura que se aplican en ese instante.
+            mostrar_pasos: Imprime el estado en cada tick. Por defecto, solo en
+                modo tiempo real.
+
+        Returns:
+            dict: Reporte de los criterios de éxito (ver ``CriteriosExito.reporte``).
+        """
+        if mostrar_pasos is None:
+            mostrar_pasos = tiempo_real
+        reloj = RelojSimulado(
+            paso_seg, tiempo_real=tiempo_real, aceleracion=aceleracion
+        )
+        criterios = CriteriosExito(
+            self.temp_optima_min,
+            self.temp_optima_max,
+            self.hum_optima_min,
+            self.hum_optima_max,
+        )
+        pendientes = sorted((perturbaciones or {}).items())
+        metricas = self.metricas
+        metricas.reiniciar()
+
         print(f"--- Iniciando Simulación para: {self.tipo_cultivo.upper()} ---")
         print(
-            f"La simulación durará {duracion_simulacion_seg} segundos. Revise 'invernadero.log' para detalles."
+            f"La simulación durará {duracion_simulacion_seg} segundos simulados "
+            f"(paso de {paso_seg} s). Revise la bitácora en 'logs/' para detalles."
         )
         try:
-            inicio = time.time()
-            while time.time() - inicio < duracion_simulacion_seg:
+            while reloj.ahora < duracion_simulacion_seg:
+                while pendientes and pendientes[0][0] <= reloj.ahora:
+                    _, delta = pendientes.pop(0)
+                    temperatura = self.invernadero.temperatura + delta
+                    self.invernadero.temperatura = round(
+                        max(0, min(50, temperatura)), 2
+                    )
+                    logger.info(
+                        "PERTURBACIÓN (t=%ss): ΔT°=%+g°C -> %s°C",
+                        reloj.ahora,
+                        delta,
+                        self.invernadero.temperatura,
+                    )
+
                 self.procesar()
+                invernadero = self.invernadero
+                metricas.registrar(
+                    paso_seg,
+                    invernadero.temperatura,
+                    invernadero.humedad,
+                    invernadero.mascara_actuadores(),
+                )
+                criterios.registrar(reloj.ahora, paso_seg, invernadero.obtener_estado())
                 self.invernadero.actualizar_estado()
 
-                estado = self.invernadero.obtener_estado()
-                print(
-                    f"T: {estado['temperatura']:>5.2f}°C | H: {estado['humedad']:>5.2f}% | "
-                    f"Calefactor: {'ON' if estado['calefactor_encendido'] else 'OFF'} | "
-                    f"Ventilador: {'ON' if estado['ventilador_encendido'] else 'OFF'} | "
-                    f"Humidif.: {'ON' if estado['humidificador_encendido'] else 'OFF'}"
-                )
+                if mostrar_pasos:
+                    estado = self.invernadero.obtener_estado()
+                    print(
+                        f"T: {estado['temperatura']:>5.2f}°C | H: {estado['humedad']:>5.2f}% | "
+                        f"Calefactor: {'ON' if estado['calefactor_encendido'] else 'OFF'} | "
+                        f"Ventilador: {'ON' if estado['ventilador_encendido'] else 'OFF'} | "
+                        f"Humidif.: {'ON' if estado['humidificador_encendido'] else 'OFF'}"
+                    )
 
-                time.sleep(0.500)
+                reloj.avanzar()
         except KeyboardInterrupt:
             print("\n--- Simulación Interrumpida por el Usuario ---")
 
         print(f"--- Simulación para {self.tipo_cultivo.upper()} Finalizada ---")
+        reporte = criterios.reporte()
+        reporte["metricas"] = metricas.instantanea()
+        self._mostrar_reporte(reporte)
+        return reporte
+
+    def _mostrar_reporte(self, reporte):
+        """Imprime el reporte de los criterios de éxito de la simulación."""
+        marca_rango = "✅" if reporte["cumple_rango"] else "❌"
+        marca_reaccion = "✅" if reporte["cumple_reaccion"] else "❌"
+        print(f"Tiempo simulado: {reporte['tiempo_simulado_seg'] / 3600:.2f} h")
+        print(
+            f"{marca_rango} T° en rango óptimo: {reporte['porcentaje_temp_en_rango']:.1f}% "
+            f"del tiempo (objetivo: {OBJETIVO_PORCENTAJE_EN_RANGO:.0f}%)"
+        )
+        print(
+            f"   Humedad en rango: {reporte['porcentaje_hum_en_rango']:.1f}% | "
+            f"Ambas en rango: {reporte['porcentaje_ambos_en_rango']:.1f}%"
+        )
+        print(
+            f"{marca_reaccion} Tiempo de reacción: máx. {reporte['reaccion_max_seg']:.0f} s, "
+            f"medio {reporte['reaccion_media_seg']:.0f} s en {reporte['excursiones']} "
+            f"excursiones (objetivo: < {OBJETIVO_TIEMPO_REACCION_SEG} s)"
+        )
+        metricas = reporte.get("metricas")
+        if metricas:
+            horas = {k: v / 3600 for k, v in metricas["tiempo_encendido_seg"].items()}
+            conmutaciones = metricas["conmutaciones"]
+            print(
+                f"   Actuadores encendidos: calefactor {horas['calefactor']:.2f} h, "
+                f"ventilador {horas['ventilador']:.2f} h, "
+                f"humidificador {horas['humidificador']:.2f} h"
+            )
+            print(
+                f"   Conmutaciones: {sum(conmutaciones.values())} | "
+                f"Energía: {metricas['energia']:.2f} h-calefactor | "
+                f"Peor excursión: {metricas['peor_excursion_temp']:.2f}°C, "
+                f"{metricas['peor_excursion_hum']:.2f}%"
+            )
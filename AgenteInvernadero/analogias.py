@@ -0,0 +1,309 @@
+"""
+Analogías y similitudes semánticas por lotes.
+
+``ConsultasLote`` resuelve miles de consultas con un producto de matrices por
+bloque contra todo el vocabulario y una selección parcial (``argpartition``)
+de los ``topn`` mejores, en lugar de una llamada a ``most_similar`` por
+consulta. Los resultados coinciden con ``most_similar``: similitud coseno, sin
+las palabras de la consulta entre los candidatos.
+
+Las ternas siguen la convención de ``realizar_analogia_semantica``:
+``(p1, p2, p3)`` significa "p1 es a p2 como X es a p3", es decir,
+X = p1 - p2 + p3.
+
+El archivo de evaluación usa el formato de ``questions-words.txt`` de
+word2vec: una analogía ``a b c d`` por línea ("a es a b como c es a d") y
+líneas ``: seccion`` para agrupar. Uso::
+
+    python analogias.py invernadero.model --evaluar preguntas.txt
+    python analogias.py invernadero.model --ternas ternas.txt --topn 5
+    python analogias.py invernadero.model --similares temperatura humedad
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from cuantizacion import FILAS_POR_BLOQUE
+from vectores import cargar_vectores_modelo
+
+# Elementos de la matriz de similitudes que se calculan de una vez
+# (consultas del bloque × vocabulario); 2**24 floats de 32 bits = 64 MB.
+ELEMENTOS_POR_BLOQUE = 2**24
+
+
+class ConsultasLote:
+    """
+    Consultas por lotes sobre unos ``KeyedVectors``.
+
+    Usa la matriz de vectores tal cual (también si está mapeada en memoria o
+    cuantizada) y solo guarda aparte las normas, un float por palabra. Una
+    matriz ``int8`` o ``float16`` se convierte a ``float32`` por bloques de
+    ``FILAS_POR_BLOQUE`` filas, nunca entera.
+
+    Args:
+        wv: ``KeyedVectors`` del modelo o ``VectoresCuantizados``.
+    """
+
+    def __init__(self, wv):
+        self.wv = wv
+        self.vectores = wv.vectors
+        self.indice = wv.key_to_index
+        self.palabras = wv.index_to_key
+        normas = getattr(wv, "norms", None)
+        if normas is not None and len(normas) == len(self.vectores):
+            self.normas = np.array(normas, dtype=np.float32)
+        else:
+            self.normas = np.empty(len(self.vectores), dtype=np.float32)
+            for inicio in range(0, len(self.vectores), FILAS_POR_BLOQUE):
+                fin = inicio + FILAS_POR_BLOQUE
+                bloque = self.vectores[inicio:fin].astype(np.float32)
+                self.normas[inicio:fin] = np.linalg.norm(bloque, axis=1)
+        self.normas[self.normas == 0] = 1
+
+    def _normalizados(self, indices):
+        return self.vectores[indices].astype(np.float32) / self.normas[indices, None]
+
+    def _productos(self, consultas):
+        """Productos de ``consultas`` con todo el vocabulario."""
+        if self.vectores.dtype == np.float32:
+            return consultas @ self.vectores.T
+        productos = np.empty((len(consultas), len(self.vectores)), dtype=np.float32)
+        for inicio in range(0, len(self.vectores), FILAS_POR_BLOQUE):
+            fin = inicio + FILAS_POR_BLOQUE
+            bloque = self.vectores[inicio:fin].astype(np.float32)
+            productos[:, inicio:fin] = consultas @ bloque.T
+        return productos
+
+    def _mejores(self, consultas, excluir, topn):
+        """
+        Top ``topn`` del vocabulario para cada fila de ``consultas`` (vectores
+        unitarios), sin los índices de ``excluir``.
+
+        Returns:
+            list: Por consulta, lista de pares (palabra, similitud).
+        """
+        n_vocab = len(self.palabras)
+        topn = min(topn, n_vocab)
+        bloque = max(1, ELEMENTOS_POR_BLOQUE // n_vocab)
+        resultados = []
+        for inicio in range(0, len(consultas), bloque):
+            parte = consultas[inicio : inicio + bloque]
+            similitudes = self._productos(parte)
+            similitudes /= self.normas
+            for fila, indices in enumerate(excluir[inicio : inicio + bloque]):
+                similitudes[fila, indices] = -np.inf
+
+            k = min(topn, n_vocab - 1)
+            candidatos = np.argpartition(-similitudes, k, axis=1)[:, :topn]
+            puntajes = np.take_along_axis(similitudes, candidatos, axis=1)
+            orden = np.argsort(-puntajes, axis=1, kind="stable")
+            candidatos = np.take_along_axis(candidatos, orden, axis=1)
+            puntajes = np.take_along_axis(puntajes, orden, axis=1)
+            for fila_indices, fila_puntajes in zip(candidatos, puntajes):
+                resultados.append(
+                    [
+                        (self.palabras[i], float(p))
+                        for i, p in zip(fila_indices, fila_puntajes)
+                        if p != -np.inf
+                    ]
+                )
+        return resultados
+
+    def analogias(self, ternas, topn=1):
+        """
+        Resuelve ternas ``(p1, p2, p3)`` (X = p1 - p2 + p3).
+
+        Returns:
+            list: Por terna, lista de pares (palabra, similitud), o None si
+            alguna palabra no está en el vocabulario.
+        """
+        validas, indices = [], []
+        for n, terna in enumerate(ternas):
+            ids = [self.indice.get(p) for p in terna]
+            if None not in ids:
+                validas.append(n)
+                indices.append(ids)
+        resultados = [None] * len(ternas)
+        if not validas:
+            return resultados
+
+        indices = np.array(indices, dtype=np.intp)
+        consultas = (
+            self._normalizados(indices[:, 0])
+            - self._normalizados(indices[:, 1])
+            + self._normalizados(indices[:, 2])
+        )
+        consultas /= np.linalg.norm(consultas, axis=1, keepdims=True) + 1e-12
+        for n, resultado in zip(validas, self._mejores(consultas, indices, topn)):
+            resultados[n] = resultado
+        return resultados
+
+    def similares(self, palabras, topn=10):
+        """
+        Palabras más similares a cada palabra de ``palabras``.
+
+        Returns:
+            list: Por palabra, lista de pares (palabra, similitud), o None si no
+            está en el vocabulario.
+        """
+        validas = [n for n, p in enumerate(palabras) if p in self.indice]
+        resultados = [None] * len(palabras)
+        if not validas:
+            return resultados
+        indices = np.array([self.indice[palabras[n]] for n in validas], dtype=np.intp)
+        consultas = self._normalizados(indices)
+        for n, resultado in zip(
+            validas, self._mejores(consultas, indices[:, None], topn)
+        ):
+            resultados[n] = resultado
+        return resultados
+
+    def evaluar(self, preguntas, topn=1):
+        """
+        Exactitud del modelo sobre analogías con respuesta esperada.
+
+        Args:
+            preguntas: Iterable de (seccion, a, b, c, d): "a es a b como c es
+                a d", como las de ``leer_preguntas``.
+            topn: Se cuenta como acierto si ``d`` está entre las ``topn``
+                primeras respuestas.
+
+        Returns:
+            dict: Totales y exactitud global y por sección. Las analogías con
+            palabras fuera del vocabulario se cuentan en ``sin_vocabulario`` y
+            no afectan la exactitud.
+        """
+        preguntas = list(preguntas)
+        # a:b :: c:d  =>  d = b - a + c  =>  terna (b, a, c).
+        respuestas = self.analogias([(b, a, c) for _, a, b, c, _ in preguntas], topn)
+
+        secciones = {}
+        for (seccion, _, _, _, esperada), resultado in zip(preguntas, respuestas):
+            datos = secciones.setdefault(
+                seccion, {"aciertos": 0, "evaluadas": 0, "sin_vocabulario": 0}
+            )
+            if resultado is None or esperada not in self.indice:
+                datos["sin_vocabulario"] += 1
+                continue
+            datos["evaluadas"] += 1
+            if any(palabra == esperada for palabra, _ in resultado):
+                datos["aciertos"] += 1
+
+        for datos in secciones.values():
+            datos["exactitud"] = (
+                datos["aciertos"] / datos["evaluadas"] if datos["evaluadas"] else 0.0
+            )
+        aciertos = sum(d["aciertos"] for d in secciones.values())
+        evaluadas = sum(d["evaluadas"] for d in secciones.values())
+        return {
+            "total": len(preguntas),
+            "evaluadas": evaluadas,
+            "sin_vocabulario": len(preguntas) - evaluadas,
+            "aciertos": aciertos,
+            "exactitud": aciertos / evaluadas if evaluadas else 0.0,
+            "topn": topn,
+            "secciones": secciones,
+        }
+
+
+def _filas(ruta):
+    """Filas de palabras (en minúsculas) de un archivo de texto o CSV."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea and not linea.startswith("#"):
+                yield linea.lower().replace(",", " ").split()
+
+
+def leer_preguntas(ruta):
+    """
+    Genera (seccion, a, b, c, d) de un archivo de evaluación. Las líneas mal
+    formadas se omiten.
+    """
+    seccion = "general"
+    for fila in _filas(ruta):
+        if fila[0].startswith(":"):
+            seccion = " ".join(fila)[1:].strip() or "general"
+        elif len(fila) == 4:
+            yield (seccion, *fila)
+
+
+def leer_ternas(ruta):
+    """Genera ternas (p1, p2, p3) de un archivo, una por línea."""
+    for fila in _filas(ruta):
+        if len(fila) == 3:
+            yield tuple(fila)
+
+
+def _formato(resultado):
+    if resultado is None:
+        return "(fuera del vocabulario)"
+    return ", ".join(f"{palabra} ({similitud:.3f})" for palabra, similitud in resultado)
+
+
+def mostrar_evaluacion(reporte):
+    """Imprime el reporte de ``ConsultasLote.evaluar``."""
+    print(
+        f"Exactitud (top-{reporte['topn']}): {reporte['exactitud']:.2%} "
+        f"({reporte['aciertos']}/{reporte['evaluadas']}; "
+        f"{reporte['sin_vocabulario']} de {reporte['total']} fuera del vocabulario)"
+    )
+    for seccion, datos in reporte["secciones"].items():
+        print(
+            f"  {seccion:<30} {datos['exactitud']:>7.2%} "
+            f"({datos['aciertos']}/{datos['evaluadas']}, "
+            f"{datos['sin_vocabulario']} sin vocabulario)"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modelo", help="Modelo Word2Vec (o su artefacto .kv).")
+    parser.add_argument("--evaluar", help="Archivo de analogías con respuesta.")
+    parser.add_argument("--ternas", help="Archivo con ternas 'p1 p2 p3'.")
+    parser.add_argument("--similares", nargs="+", help="Palabras a consultar.")
+    parser.add_argument("--topn", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON.")
+    args = parser.parse_args(argv)
+
+    wv, _ = cargar_vectores_modelo(args.modelo)
+    consultas = ConsultasLote(wv)
+    salida = {}
+
+    if args.evaluar:
+        salida["evaluacion"] = consultas.evaluar(
+            leer_preguntas(args.evaluar), args.topn or 1
+        )
+        if not args.json:
+            mostrar_evaluacion(salida["evaluacion"])
+
+    if args.ternas:
+        ternas = list(leer_ternas(args.ternas))
+        resultados = consultas.analogias(ternas, args.topn or 1)
+        salida["analogias"] = [
+            {"terna": terna, "resultado": resultado}
+            for terna, resultado in zip(ternas, resultados)
+        ]
+        if not args.json:
+            for terna, resultado in zip(ternas, resultados):
+                print(f"{' '.join(terna)} -> {_formato(resultado)}")
+
+    if args.similares:
+        palabras = [p.lower() for p in args.similares]
+        resultados = consultas.similares(palabras, args.topn or 10)
+        salida["similares"] = dict(zip(palabras, resultados))
+        if not args.json:
+            for palabra, resultado in zip(palabras, resultados):
+                print(f"{palabra}: {_formato(resultado)}")
+
+    if args.json:
+        json.dump(salida, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Benchmarks de las rutas críticas del agente del invernadero.
+
+Mide rendimiento (operaciones/s), percentiles de latencia y memoria pico de:
+
+* ``AgenteInvernadero.procesar``, ``decidir`` y ``procesar_estado_manual``
+  sobre los escenarios "día caluroso" y "noche fría" de ``Propuesta.md``.
+* ``Invernadero.actualizar_estado``.
+* ``realizar_analogia_semantica`` y la carga del modelo en
+  ``_cargar_modelo_vectores`` (solo si se indica un modelo).
+
+Los resultados se guardan en JSON para compararlos entre commits::
+
+    python benchmark.py --modelo invernadero.model --salida base.json
+    python benchmark.py --modelo invernadero.model --comparar base.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from agente import AgenteInvernadero, Invernadero
+from simulacion import ESCENARIOS, traza_escenario
+from vectores import CACHE_CONSULTAS
+
+# Llamadas cronometradas una a una para los percentiles de latencia.
+MUESTRAS_LATENCIA = 10000
+
+
+def _percentiles(muestras_ns):
+    """Percentiles de latencia en microsegundos (``None`` sin muestras)."""
+    ordenadas = sorted(muestras_ns)
+    n = len(ordenadas)
+    if not n:
+        return {"p50_us": None, "p90_us": None, "p99_us": None, "max_us": None}
+
+    def percentil(p):
+        return ordenadas[min(n - 1, int(p / 100 * n))] / 1000
+
+    return {
+        "p50_us": percentil(50),
+        "p90_us": percentil(90),
+        "p99_us": percentil(99),
+        "max_us": ordenadas[-1] / 1000,
+    }
+
+
+def medir(funcion, iteraciones, calentamiento=100):
+    """
+    Ejecuta ``funcion(i)`` y devuelve rendimiento, latencia y memoria pico.
+
+    El rendimiento se mide con un bucle sin instrumentar; la latencia con una
+    muestra de llamadas cronometradas una a una, y la memoria pico con
+    ``tracemalloc`` en una pasada aparte (porque la ralentiza).
+    """
+    for i in range(min(calentamiento, iteraciones)):
+        funcion(i)
+
+    reloj = time.perf_counter_ns
+    inicio = reloj()
+    for i in range(iteraciones):
+        funcion(i)
+    total_ns = reloj() - inicio
+
+    muestras = []
+    for i in range(min(iteraciones, MUESTRAS_LATENCIA)):
+        t0 = reloj()
+        funcion(i)
+        muestras.append(reloj() - t0)
+
+    tracemalloc.start()
+    for i in range(min(iteraciones, MUESTRAS_LATENCIA)):
+        funcion(i)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if not iteraciones:
+        ops_por_seg = 0.0
+    elif total_ns:
+        ops_por_seg = iteraciones / (total_ns / 1e9)
+    else:
+        ops_por_seg = float("inf")
+    resultado = {
+        "iteraciones": iteraciones,
+        "segundos": total_ns / 1e9,
+        "ops_por_seg": ops_por_seg,
+        "memoria_pico_kb": pico / 1024,
+    }
+    resultado.update(_percentiles(muestras))
+    return resultado
+
+
+def _crear_agente(escenario, **kwargs):
+    datos = ESCENARIOS[escenario]
+    invernadero = Invernadero(
+        temperatura_inicial=datos["temperatura_inicial"],
+        humedad_inicial=datos["humedad_inicial"],
+        rng=random.Random(0),
+    )
+    return AgenteInvernadero(invernadero, tipo_cultivo="tomate", **kwargs)
+
+
+def benchmarks_control(iteraciones):
+    """Benchmarks del bucle de control, uno por escenario."""
+    resultados = {}
+    nulo = open(os.devnull, "w", encoding="utf-8")
+    for escenario in ESCENARIOS:
+        traza = list(traza_escenario(escenario, 1440))
+        n = len(traza)
+
+        agente = _crear_agente(escenario)
+        invernadero = agente.invernadero
+
+        def procesar(i):
+            invernadero.temperatura, invernadero.humedad = traza[i % n]
+            agente.procesar()
+
+        def decidir(i):
+            agente.decidir(*traza[i % n])
+
+        def procesar_manual(i):
+            with contextlib.redirect_stdout(nulo):
+                agente.procesar_estado_manual(*traza[i % n])
+
+        def actualizar(i):
+            invernadero.actualizar_estado()
+
+        resultados[f"procesar/{escenario}"] = medir(procesar, iteraciones)
+        resultados[f"decidir/{escenario}"] = medir(decidir, iteraciones)
+        resultados[f"procesar_estado_manual/{escenario}"] = medir(
+            procesar_manual, max(1, iteraciones // 10)
+        )
+        resultados[f"actualizar_estado/{escenario}"] = medir(actualizar, iteraciones)
+    nulo.close()
+    return resultados
+
+
+def benchmarks_modelo(ruta_modelo, iteraciones, cargas):
+    """Benchmarks de la carga del modelo y de las analogías semánticas."""
+    resultados = {}
+    nulo = open(os.devnull, "w", encoding="utf-8")
+
+    def cargar(i):
+        agente = AgenteInvernadero(Invernadero(), ruta_modelo=ruta_modelo)
+        with contextlib.redirect_stdout(nulo):
+            if not agente._cargar_modelo_vectores():
+                raise RuntimeError(f"No se pudo cargar el modelo '{ruta_modelo}'.")
+        return agente
+
+    resultados["cargar_modelo"] = medir(cargar, cargas, calentamiento=1)
+
+    agente = cargar(0)
+    vocabulario = agente.modelo_vectores.index_to_key[:200]
+    rng = random.Random(0)
+    ternas = [tuple(rng.sample(vocabulario, 3)) for _ in range(64)]
+
+    def analogia(i):
+        with contextlib.redirect_stdout(nulo):
+            agente.realizar_analogia_semantica(*ternas[i % len(ternas)])
+
+    def analogia_sin_cache(i):
+        CACHE_CONSULTAS.invalidar()
+        analogia(i)
+
+    resultados["realizar_analogia_semantica"] = medir(
+        analogia, iteraciones, calentamiento=10
+    )
+    resultados["realizar_analogia_semantica/sin_cache"] = medir(
+        analogia_sin_cache, iteraciones, calentamiento=10
+    )
+    nulo.close()
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _latencia(valor):
+    return f"{valor:>9.2f}" if valor is not None else f"{'-':>9}"
+
+
+def comparar(actual, base, umbral=0.10):
+    """
+    Compara el rendimiento con un reporte anterior. Devuelve las filas de la
+    comparación y si hubo alguna regresión mayor que ``umbral``.
+    """
+    filas = []
+    hubo_regresion = False
+    for nombre, datos in actual["resultados"].items():
+        anterior = base["resultados"].get(nombre)
+        if anterior is None:
+            continue
+        if not anterior["ops_por_seg"]:
+            continue
+        relacion = datos["ops_por_seg"] / anterior["ops_por_seg"]
+        regresion = relacion < 1 - umbral
+        hubo_regresion |= regresion
+        filas.append((nombre, anterior["ops_por_seg"], datos["ops_por_seg"], relacion))
+    return filas, hubo_regresion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modelo", help="Modelo Word2Vec para analogías y carga.")
+    parser.add_argument("--iteraciones", type=int, default=100000)
+    parser.add_argument("--analogias", type=int, default=500)
+    parser.add_argument("--cargas", type=int, default=5)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--comparar", help="Reporte JSON anterior para comparar.")
+    parser.add_argument("--umbral", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    resultados = benchmarks_control(args.iteraciones)
+    if args.modelo:
+        resultados.update(benchmarks_modelo(args.modelo, args.analogias, args.cargas))
+
+    reporte = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "rss_max_kb": (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        ),
+        "resultados": resultados,
+    }
+
+    print(f"{'benchmark':<42} {'ops/s':>12} {'p50 µs':>9} {'p99 µs':>9} {'pico KB':>9}")
+    for nombre, datos in resultados.items():
+        print(
+            f"{nombre:<42} {datos['ops_por_seg']:>12,.0f} {_latencia(datos['p50_us'])} "
+            f"{_latencia(datos['p99_us'])} {datos['memoria_pico_kb']:>9.1f}"
+        )
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en '{args.salida}'.")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        filas, hubo_regresion = comparar(reporte, base, args.umbral)
+        print(f"\nComparación con {base.get('commit') or args.comparar}:")
+        for nombre, antes, ahora, relacion in filas:
+            marca = "❌" if relacion < 1 - args.umbral else "✅"
+            print(
+                f"{marca} {nombre:<40} {antes:>12,.0f} -> {ahora:>12,.0f} ({relacion:.2f}x)"
+            )
+        return 1 if hubo_regresion else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Bitácora estructurada de las decisiones del agente.
+
+Los registros se encolan sin formatear desde el bucle del agente y un hilo en
+segundo plano los escribe como líneas JSON (JSONL). Nada se configura al
+importar: hasta que se llama a ``configurar_bitacora`` los registros se
+descartan casi sin costo.
+
+Cada decisión se guarda como::
+
+    {"ts": 1760774400.123, "id": "inv1", "T": 27.4, "H": 61.2, "accion": 1}
+
+donde ``accion`` es un código de ``tabla_decision.ACCIONES``. El resto de los
+mensajes del agente se guarda como ``{"ts": ..., "nivel": ..., "mensaje": ...}``.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+from datetime import datetime
+
+# Logger raíz del agente y logger específico para las decisiones.
+LOGGER_AGENTE = "invernadero"
+LOGGER_DECISIONES = "invernadero.decisiones"
+
+_logger_agente = logging.getLogger(LOGGER_AGENTE)
+_logger_decisiones = logging.getLogger(LOGGER_DECISIONES)
+_logger_agente.addHandler(logging.NullHandler())
+
+_MENSAJE_DECISION = "DECISIÓN %s: T°=%s°C, H=%s%%, acción=%s"
+
+_listener = None
+_manejador = None
+
+
+def registrar_decision(id_invernadero, temperatura, humedad, codigo):
+    """
+    Registra una decisión del agente. Las decisiones sin acción (código 0) se
+    registran con nivel DEBUG.
+    """
+    nivel = logging.INFO if codigo else logging.DEBUG
+    if _logger_decisiones.isEnabledFor(nivel):
+        _logger_decisiones.log(
+            nivel, _MENSAJE_DECISION, id_invernadero, temperatura, humedad, codigo
+        )
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """
+    ``QueueHandler`` que encola el registro tal cual. El original formatea el
+    mensaje en el hilo que registra; aquí se deja para el hilo escritor, lo que
+    es seguro porque los argumentos son valores inmutables.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _lectura_json(valor):
+    """Lectura como ``float`` de Python, o None si no es finita."""
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+class FormateadorJSONL(logging.Formatter):
+    """
+    Convierte cada registro en una línea JSON compacta. Las lecturas no
+    finitas se escriben como ``null``: ``NaN`` no es JSON válido.
+    """
+
+    def format(self, record):
+        if record.name == LOGGER_DECISIONES:
+            id_invernadero, temperatura, humedad, codigo = record.args
+            datos = {
+                "ts": round(record.created, 3),
+                "id": id_invernadero,
+                "T": _lectura_json(temperatura),
+                "H": _lectura_json(humedad),
+                "accion": int(codigo),
+            }
+        else:
+            datos = {
+                "ts": round(record.created, 3),
+                "nivel": record.levelname,
+                "mensaje": record.getMessage(),
+            }
+        return json.dumps(
+            datos, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        )
+
+
+def configurar_bitacora(directorio="logs", nivel=logging.INFO, ruta=None):
+    """
+    Activa la bitácora: crea el archivo JSONL y arranca el hilo escritor.
+
+    Args:
+        directorio: Carpeta donde se crea ``Agente_<fecha>.jsonl``.
+        nivel: Nivel mínimo a registrar (DEBUG incluye los ticks sin acción).
+        ruta: Ruta explícita del archivo; si se indica, ignora ``directorio``.
+
+    Returns:
+        str: Ruta del archivo de la bitácora.
+    """
+    global _listener, _manejador
+    detener_bitacora()
+
+    if ruta is None:
+        os.makedirs(directorio, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ruta = os.path.join(directorio, f"Agente_{timestamp}.jsonl")
+
+    archivo = logging.FileHandler(ruta, mode="w", encoding="utf-8")
+    archivo.setFormatter(FormateadorJSONL())
+
+    cola = queue.SimpleQueue()
+    _manejador = _ManejadorCola(cola)
+    _logger_agente.addHandler(_manejador)
+    _logger_agente.setLevel(nivel)
+    _logger_agente.propagate = False
+
+    _listener = logging.handlers.QueueListener(cola, archivo)
+    _listener.start()
+    return ruta
+
+
+def detener_bitacora():
+    """Vacía la cola, detiene el hilo escritor y cierra el archivo."""
+    global _listener, _manejador
+    if _listener is None:
+        return
+    _logger_agente.removeHandler(_manejador)
+    _listener.stop()
+    for manejador in _listener.handlers:
+        manejador.close()
+    _listener = None
+    _manejador = None
+
+
+atexit.register(detener_bitacora)
@@ -0,0 +1,241 @@
+"""
+Controlador asíncrono para muchos invernaderos en un solo proceso.
+
+Cada par agente/invernadero se ejecuta como una tarea de ``asyncio`` con su
+propio intervalo de muestreo. Las lecturas y decisiones de cada tick se envían a
+una cola acotada que atiende un consumidor (registro, red, base de datos...);
+si el consumidor se atrasa y la cola se llena, los sitios esperan antes de su
+siguiente tick en lugar de acumular memoria sin límite.
+"""
+
+import asyncio
+import inspect
+import logging
+import sys
+
+from bitacora import LOGGER_AGENTE
+
+logger = logging.getLogger(LOGGER_AGENTE)
+
+
+class SitioControlado:
+    """Estado de un invernadero registrado en el controlador."""
+
+    __slots__ = (
+        "identificador",
+        "agente",
+        "intervalo_seg",
+        "tarea",
+        "ticks",
+        "atrasos",
+    )
+
+    def __init__(self, identificador, agente, intervalo_seg):
+        self.identificador = identificador
+        self.agente = agente
+        self.intervalo_seg = intervalo_seg
+        self.tarea = None
+        self.ticks = 0
+        self.atrasos = 0
+
+
+class ControladorSitio:
+    """
+    Planifica en un único bucle de eventos el control de varios invernaderos.
+
+    Args:
+        consumidor: Función (o corrutina) que recibe cada evento
+            ``(identificador, instante, temperatura, humedad, mascara)``. Si es
+            None, los eventos no se encolan.
+        max_pendientes: Capacidad de la cola de eventos; al llenarse, los sitios
+            esperan a que el consumidor avance (contrapresión).
+        actualizar_entorno: Si es True, tras cada decisión se llama a
+            ``actualizar_estado`` del invernadero (modo simulación).
+    """
+
+    def __init__(self, consumidor=None, max_pendientes=1000, actualizar_entorno=True):
+        self.consumidor = consumidor
+        self.max_pendientes = max_pendientes
+        self.actualizar_entorno = actualizar_entorno
+        self._sitios = {}
+        self._cola = None
+        self._tarea_consumidor = None
+        self._en_marcha = False
+
+    def __len__(self):
+        return len(self._sitios)
+
+    @property
+    def sitios(self):
+        """Sitios registrados, por identificador."""
+        return dict(self._sitios)
+
+    def metricas(self):
+        """Métricas de actuadores de cada sitio, por identificador."""
+        return {i: s.agente.metricas for i, s in self._sitios.items()}
+
+    def agregar(self, agente, intervalo_seg=1.0, identificador=None):
+        """
+        Registra un agente. Si el controlador ya está en marcha, su tarea se
+        inicia de inmediato.
+        """
+        if identificador is None:
+            identificador = agente.invernadero.identificador
+        if identificador in self._sitios:
+            raise ValueError(f"El sitio '{identificador}' ya está registrado.")
+        if intervalo_seg <= 0:
+            raise ValueError("El intervalo de muestreo debe ser positivo.")
+        sitio = SitioControlado(identificador, agente, intervalo_seg)
+        self._sitios[identificador] = sitio
+        if self._en_marcha:
+            self._lanzar(sitio)
+        logger.info(
+            "Sitio %s agregado (intervalo: %s s).", identificador, intervalo_seg
+        )
+        return sitio
+
+    async def quitar(self, identificador):
+        """Detiene la tarea del sitio y lo elimina del controlador."""
+        sitio = self._sitios.pop(identificador)
+        await self._cancelar(sitio)
+        logger.info("Sitio %s eliminado.", identificador)
+        return sitio
+
+    async def iniciar(self):
+        """Arranca el consumidor y las tareas de todos los sitios registrados."""
+        if self._en_marcha:
+            return
+        self._en_marcha = True
+        if self.consumidor is not None:
+            self._cola = asyncio.Queue(maxsize=self.max_pendientes)
+            self._tarea_consumidor = asyncio.create_task(self._consumir())
+        for sitio in self._sitios.values():
+            self._lanzar(sitio)
+
+    async def detener(self, vaciar=True):
+        """
+        Cancela las tareas de los sitios y, si ``vaciar`` es True, espera a que el
+        consumidor procese los eventos pendientes antes de detenerlo.
+        """
+        if not self._en_marcha:
+            return
+        self._en_marcha = False
+        await asyncio.gather(*(self._cancelar(s) for s in self._sitios.values()))
+        if self._tarea_consumidor is not None:
+            if vaciar:
+                await self._cola.join()
+            self._tarea_consumidor.cancel()
+            await asyncio.gather(self._tarea_consumidor, return_exceptions=True)
+            self._tarea_consumidor = None
+            self._cola = None
+
+    async def ejecutar(self, duracion_seg=None):
+        """
+        Ejecuta el controlador durante ``duracion_seg`` segundos (o hasta que se
+        cancele, si es None) y lo detiene de forma ordenada al terminar.
+        """
+        await self.iniciar()
+        try:
+            if duracion_seg is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duracion_seg)
+        finally:
+            await self.detener()
+
+    def _lanzar(self, sitio):
+        sitio.tarea = asyncio.create_task(
+            self._bucle_sitio(sitio), name=f"sitio-{sitio.identificador}"
+        )
+
+    @staticmethod
+    async def _cancelar(sitio):
+        if sitio.tarea is None:
+            return
+        sitio.tarea.cancel()
+        await asyncio.gather(sitio.tarea, return_exceptions=True)
+        sitio.tarea = None
+
+    async def _bucle_sitio(self, sitio):
+        """Ciclo de percibir, decidir y actuar de un sitio, a intervalo fijo."""
+        bucle = asyncio.get_running_loop()
+        agente = sitio.agente
+        invernadero = agente.invernadero
+        siguiente = bucle.time()
+        while True:
+            try:
+                agente.procesar()
+                agente.metricas.registrar(
+                    sitio.intervalo_seg,
+                    invernadero.temperatura,
+                    invernadero.humedad,
+                    invernadero.mascara_actuadores(),
+                )
+                if self.actualizar_entorno:
+                    invernadero.actualizar_estado()
+            except Exception:
+                logger.exception("Error en el tick del sitio %s.", sitio.identificador)
+            sitio.ticks += 1
+
+            if self._cola is not None:
+                # Espera aquí si la cola está llena: contrapresión hacia el sitio.
+                await self._cola.put(
+                    (
+                        sitio.identificador,
+                        bucle.time(),
+                        invernadero.temperatura,
+                        invernadero.humedad,
+                        invernadero.mascara_actuadores(),
+                    )
+                )
+
+            siguiente += sitio.intervalo_seg
+            espera = siguiente - bucle.time()
+            if espera < 0:
+                # Atrasado: se omiten los ticks perdidos en lugar de encadenarlos.
+                sitio.atrasos += 1
+                siguiente = bucle.time()
+                espera = 0
+            await asyncio.sleep(espera)
+
+    async def _consumir(self):
+        es_corrutina = inspect.iscoroutinefunction(self.consumidor)
+        while True:
+            evento = await self._cola.get()
+            try:
+                if es_corrutina:
+                    await self.consumidor(evento)
+                else:
+                    self.consumidor(evento)
+            except Exception:
+                logger.exception("Error en el consumidor de eventos.")
+            finally:
+                self._cola.task_done()
+
+
+if __name__ == "__main__":
+    from agente import AgenteInvernadero, Invernadero
+
+    n_sitios = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    duracion = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    perfiles = AgenteInvernadero.get_perfiles_disponibles()
+    eventos = []
+
+    async def demostracion():
+        controlador = ControladorSitio(consumidor=eventos.append)
+        for i in range(n_sitios):
+            agente = AgenteInvernadero(
+                Invernadero(identificador=f"sitio{i}"),
+                tipo_cultivo=perfiles[i % len(perfiles)],
+            )
+            controlador.agregar(agente, intervalo_seg=0.05 + 0.01 * (i % 10))
+        await controlador.ejecutar(duracion)
+        return controlador
+
+    controlador = asyncio.run(demostracion())
+    ticks = sum(s.ticks for s in controlador.sitios.values())
+    atrasos = sum(s.atrasos for s in controlador.sitios.values())
+    print(
+        f"{n_sitios} sitios, {duracion:.1f} s: {ticks} ticks, {len(eventos)} eventos, "
+        f"{atrasos} ticks atrasados."
+    )
@@ -0,0 +1,295 @@
+"""
+Vectores de palabras cuantizados para los equipos con poca memoria.
+
+``exportar_cuantizado`` guarda los vectores de un modelo como ``float16`` (la
+mitad de memoria) o como ``int8`` con una escala por vector (la cuarta
+parte): cada fila se guarda como ``round(v / escala)`` con
+``escala = max(|v|) / 127``. ``VectoresCuantizados`` implementa la parte de
+``KeyedVectors`` que usan ``BuscadorSimilares`` y ``ConsultasLote``, así que
+las consultas de similitud y de analogía se resuelven directamente sobre los
+códigos, sin reconstruir la matriz en ``float32``: la escala de cada vector se
+cancela en la similitud coseno.
+
+``comparar_cuantizacion`` mide cuánto se parecen las respuestas a las del
+modelo en ``float32`` (solapamiento del top-k) sobre una muestra de consultas.
+
+Uso::
+
+    python cuantizacion.py invernadero.model --tipo int8 --verificar 200
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from vectores import EXTENSIONES_CUANTIZADAS, cargar_vectores_modelo, ruta_cuantizada
+
+# Filas de la matriz que se convierten a float32 a la vez en una búsqueda
+# exacta. Con bloques que caben en la caché del procesador la búsqueda en int8
+# es algo más rápida que la de gensim en float32; con bloques grandes, 2-3
+# veces más lenta.
+FILAS_POR_BLOQUE = 512
+
+
+def cuantizar(vectores, tipo="int8"):
+    """
+    Cuantiza una matriz de vectores.
+
+    Returns:
+        tuple: (códigos, escalas); ``escalas`` es None para ``float16``.
+    """
+    vectores = np.asarray(vectores, dtype=np.float32)
+    if tipo == "float16":
+        return vectores.astype(np.float16), None
+    if tipo != "int8":
+        raise ValueError(f"Tipo de cuantización no soportado: '{tipo}'.")
+    escalas = np.abs(vectores).max(axis=1) / 127
+    escalas[escalas == 0] = 1
+    codigos = np.rint(vectores / escalas[:, None]).astype(np.int8)
+    return codigos, escalas.astype(np.float32)
+
+
+class VectoresCuantizados:
+    """
+    Vectores de palabras cuantizados con la interfaz de ``KeyedVectors`` que
+    usan las consultas del agente.
+
+    Args:
+        palabras: Vocabulario, en el orden de las filas.
+        codigos: Matriz ``int8`` o ``float16``.
+        escalas: Escala de cada fila para ``int8`` (None para ``float16``).
+    """
+
+    def __init__(self, palabras, codigos, escalas=None):
+        self.index_to_key = list(palabras)
+        self.key_to_index = {p: i for i, p in enumerate(self.index_to_key)}
+        self.vectors = codigos
+        self.escalas = escalas
+        self.vector_size = codigos.shape[1]
+        # Normas de los códigos: con ellas el coseno no necesita las escalas.
+        self.norms = np.sqrt(np.einsum("ij,ij->i", codigos, codigos, dtype=np.float32))
+        self.norms[self.norms == 0] = 1
+
+    @property
+    def tipo(self):
+        return "int8" if self.vectors.dtype == np.int8 else "float16"
+
+    @property
+    def bytes_memoria(self):
+        """Memoria de los códigos, las escalas y las normas."""
+        escalas = 0 if self.escalas is None else self.escalas.nbytes
+        return self.vectors.nbytes + escalas + self.norms.nbytes
+
+    def __len__(self):
+        return len(self.index_to_key)
+
+    def __contains__(self, palabra):
+        return palabra in self.key_to_index
+
+    def get_index(self, palabra):
+        try:
+            return self.key_to_index[palabra]
+        except KeyError:
+            raise KeyError(f"Key '{palabra}' not present") from None
+
+    def get_vector(self, palabra, norm=False):
+        """Vector reconstruido en float32 (de norma 1 si ``norm``)."""
+        i = (
+            palabra
+            if isinstance(palabra, (int, np.integer))
+            else self.get_index(palabra)
+        )
+        vector = self.vectors[i].astype(np.float32)
+        if norm:
+            return vector / self.norms[i]
+        if self.escalas is not None:
+            vector *= self.escalas[i]
+        return vector
+
+    def __getitem__(self, palabra):
+        return self.get_vector(palabra)
+
+    def _similitudes(self, consulta):
+        """Coseno de ``consulta`` (de norma 1) con todo el vocabulario, por bloques."""
+        similitudes = np.empty(len(self), dtype=np.float32)
+        for inicio in range(0, len(self), FILAS_POR_BLOQUE):
+            fin = inicio + FILAS_POR_BLOQUE
+            bloque = self.vectors[inicio:fin].astype(np.float32)
+            similitudes[inicio:fin] = (bloque @ consulta) / self.norms[inicio:fin]
+        return similitudes
+
+    def most_similar(self, positive=(), negative=(), topn=10):
+        """
+        Palabras más similares a ``positive`` - ``negative``, como
+        ``KeyedVectors.most_similar``, recorriendo todo el vocabulario.
+
+        Raises:
+            KeyError: Si alguna palabra no está en el vocabulario.
+        """
+        if isinstance(positive, str):
+            positive = [positive]
+        if isinstance(negative, str):
+            negative = [negative]
+        excluir = set()
+        consulta = np.zeros(self.vector_size, dtype=np.float32)
+        for palabras, peso in ((positive, 1.0), (negative, -1.0)):
+            for palabra in palabras:
+                indice = self.get_index(palabra)
+                excluir.add(indice)
+                consulta += peso * self.get_vector(indice, norm=True)
+        norma = np.linalg.norm(consulta)
+        if norma:
+            consulta /= norma
+
+        similitudes = self._similitudes(consulta)
+        k = min(topn + len(excluir), len(self))
+        mejores = np.argpartition(-similitudes, k - 1)[:k]
+        mejores = mejores[np.argsort(-similitudes[mejores], kind="stable")]
+        resultado = []
+        for indice, similitud in zip(mejores.tolist(), similitudes[mejores].tolist()):
+            if indice in excluir:
+                continue
+            resultado.append((self.index_to_key[indice], similitud))
+            if len(resultado) == topn:
+                break
+        return resultado
+
+
+def guardar_cuantizado(vectores, ruta):
+    """Guarda unos ``VectoresCuantizados`` en un ``.npz`` sin comprimir."""
+    palabras = np.frombuffer(
+        "\n".join(vectores.index_to_key).encode("utf-8"), dtype=np.uint8
+    )
+    matrices = {"palabras": palabras, "codigos": vectores.vectors}
+    if vectores.escalas is not None:
+        matrices["escalas"] = vectores.escalas
+    np.savez(ruta, **matrices)
+
+
+def cargar_cuantizado(ruta):
+    """Carga un artefacto de ``exportar_cuantizado``."""
+    with np.load(ruta) as datos:
+        palabras = datos["palabras"].tobytes().decode("utf-8").split("\n")
+        escalas = datos["escalas"] if "escalas" in datos.files else None
+        return VectoresCuantizados(palabras, datos["codigos"], escalas)
+
+
+def exportar_cuantizado(ruta_modelo, tipo="int8", ruta=None):
+    """
+    Cuantiza los vectores de un modelo y los guarda junto a él
+    (``invernadero.q8.npz`` o ``invernadero.f16.npz``).
+
+    Returns:
+        tuple: (ruta escrita, ``VectoresCuantizados``, ``KeyedVectors`` originales).
+    """
+    wv, _ = cargar_vectores_modelo(ruta_modelo)
+    ruta = ruta or ruta_cuantizada(ruta_modelo, tipo)
+    codigos, escalas = cuantizar(wv.vectors, tipo)
+    cuantizados = VectoresCuantizados(wv.index_to_key, codigos, escalas)
+    guardar_cuantizado(cuantizados, ruta)
+    return ruta, cuantizados, wv
+
+
+def comparar_cuantizacion(wv, cuantizados, consultas=200, topn=10, semilla=0):
+    """
+    Solapamiento del top-``topn`` de los vectores cuantizados con el de los
+    originales en ``float32``, con palabras y analogías (``a - b + c``)
+    elegidas al azar del vocabulario. Ambos se buscan de forma exacta.
+    """
+    rng = np.random.default_rng(semilla)
+    n = len(wv)
+    reporte = {"consultas": consultas, "topn": topn}
+    tipos = {
+        "similares": lambda: ([wv.index_to_key[rng.integers(n)]], []),
+        "analogias": lambda: (
+            [wv.index_to_key[i] for i in rng.integers(n, size=2)],
+            [wv.index_to_key[rng.integers(n)]],
+        ),
+    }
+    for nombre, consulta in tipos.items():
+        solapamientos, primeros = [], 0
+        tiempo_original = tiempo_cuantizado = 0.0
+        for _ in range(consultas):
+            positivos, negativos = consulta()
+            inicio = time.perf_counter()
+            esperado = wv.most_similar(positivos, negativos, topn=topn)
+            tiempo_original += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            obtenido = cuantizados.most_similar(positivos, negativos, topn=topn)
+            tiempo_cuantizado += time.perf_counter() - inicio
+            esperadas = {p for p, _ in esperado}
+            solapamientos.append(
+                len(esperadas & {p for p, _ in obtenido}) / max(1, len(esperadas))
+            )
+            primeros += bool(esperado and obtenido and esperado[0][0] == obtenido[0][0])
+        reporte[nombre] = {
+            "solapamiento_medio": float(np.mean(solapamientos)),
+            "solapamiento_minimo": float(np.min(solapamientos)),
+            "coincidencia_top1": primeros / consultas,
+            "latencia_original_ms": tiempo_original / consultas * 1000,
+            "latencia_cuantizada_ms": tiempo_cuantizado / consultas * 1000,
+        }
+    return reporte
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modelo", help="Modelo Word2Vec (o su artefacto .kv).")
+    parser.add_argument(
+        "--tipo", choices=sorted(EXTENSIONES_CUANTIZADAS), default="int8"
+    )
+    parser.add_argument("--salida", help="Ruta del artefacto cuantizado.")
+    parser.add_argument(
+        "--verificar",
+        type=int,
+        default=200,
+        metavar="N",
+        help="Consultas al azar para comparar con float32 (0 para omitir).",
+    )
+    parser.add_argument("--topn", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON.")
+    args = parser.parse_args(argv)
+
+    ruta, _, wv = exportar_cuantizado(args.modelo, args.tipo, args.salida)
+    cuantizados = cargar_cuantizado(ruta)
+    reporte = {
+        "salida": ruta,
+        "tipo": args.tipo,
+        "palabras": len(cuantizados),
+        "bytes_float32": wv.vectors.nbytes,
+        "bytes_cuantizado": cuantizados.bytes_memoria,
+    }
+    if args.verificar and len(wv) > args.topn + 3:
+        reporte["verificacion"] = comparar_cuantizacion(
+            wv, cuantizados, args.verificar, args.topn
+        )
+
+    if args.json:
+        json.dump(reporte, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+    print(
+        f"Vectores {args.tipo} guardados en '{ruta}': "
+        f"{reporte['bytes_cuantizado'] / 2**20:.2f} MB frente a "
+        f"{reporte['bytes_float32'] / 2**20:.2f} MB en float32 "
+        f"({reporte['bytes_float32'] / reporte['bytes_cuantizado']:.1f}×)."
+    )
+    for nombre, datos in reporte.get("verificacion", {}).items():
+        if not isinstance(datos, dict):
+            continue
+        print(
+            f"  {nombre:<10} top-{args.topn}: solapamiento medio "
+            f"{datos['solapamiento_medio']:.1%} (mínimo "
+            f"{datos['solapamiento_minimo']:.0%}), top-1 igual en "
+            f"{datos['coincidencia_top1']:.1%}; "
+            f"{datos['latencia_original_ms']:.2f} ms -> "
+            f"{datos['latencia_cuantizada_ms']:.2f} ms por consulta"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
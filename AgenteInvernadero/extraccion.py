@@ -0,0 +1,198 @@
+"""
+Extracción en paralelo del texto de los documentos de entrenamiento.
+
+Cada documento (.pdf o .txt) se identifica por el SHA-256 de su contenido y su
+texto se guarda como un fragmento propio en ``.cache_texto/<sha256>.txt``. Los
+documentos cuyo contenido ya está en la caché no se vuelven a procesar, aunque
+cambien de nombre o de fecha; los demás se extraen en un
+``ProcessPoolExecutor``, porque pdfminer es lento y no libera el GIL. Un
+documento que no se puede leer, o del que no sale texto, no deja fragmento: se
+informa como fallido y se vuelve a intentar en la siguiente ejecución.
+
+Uso::
+
+    python extraccion.py ../DataSets --procesos 8
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CACHE_TEXTO = ".cache_texto"
+
+EXTENSIONES = (".pdf", ".txt")
+
+Fragmento = namedtuple("Fragmento", "documento resumen ruta en_cache")
+
+
+def resumen_contenido(ruta, bloque=1 << 20):
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for datos in iter(lambda: f.read(bloque), b""):
+            resumen.update(datos)
+    return resumen.hexdigest()
+
+
+def ruta_fragmento(resumen, cache_dir=CACHE_TEXTO):
+    """Ruta del fragmento de texto de un documento con ese resumen."""
+    return os.path.join(cache_dir, f"{resumen}.txt")
+
+
+def leer_pdf(ruta_completa):
+    """Texto de un PDF con pdfminer.six (None si no se puede leer)."""
+    from pdfminer.high_level import extract_text
+    from pdfminer.layout import LAParams
+
+    try:
+        laparams = LAParams(
+            line_margin=0.4, char_margin=3.5, word_margin=0.2, boxes_flow=0.5
+        )
+        return extract_text(ruta_completa, laparams=laparams)
+    except Exception as e:
+        print(
+            f"ADVERTENCIA: No se pudo leer el archivo PDF '{ruta_completa}' con pdfminer.six. Causa: {e}"
+        )
+        return None
+
+
+def leer_txt(ruta_completa):
+    """Texto de un archivo de texto (None si no se puede leer)."""
+    try:
+        with open(ruta_completa, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except Exception as e:
+        print(
+            f"ADVERTENCIA: No se pudo leer el archivo de texto '{ruta_completa}'. Causa: {e}"
+        )
+        return None
+
+
+def _extraer_a_fragmento(documento, destino):
+    """
+    Extrae el texto de ``documento`` y lo escribe en ``destino``. Se ejecuta en
+    los procesos del grupo; escribe a un temporal y lo renombra para que un
+    fragmento a medias nunca parezca válido.
+
+    Returns:
+        tuple: (caracteres, segundos); caracteres es None si la extracción
+        falló o no dio texto, y entonces no se escribe nada.
+    """
+    inicio = time.perf_counter()
+    if documento.lower().endswith(".pdf"):
+        texto = leer_pdf(documento)
+    else:
+        texto = leer_txt(documento)
+    if not texto or not texto.strip():
+        return None, time.perf_counter() - inicio
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(temporal, destino)
+    return len(texto), time.perf_counter() - inicio
+
+
+def documentos(datasets_dir, archivo=None):
+    """
+    Rutas de los documentos a procesar: ``archivo`` dentro de ``datasets_dir``
+    si se indica, o todos los .pdf y .txt del directorio, en orden.
+    """
+    if archivo:
+        ruta = os.path.join(datasets_dir, archivo)
+        if not os.path.exists(ruta):
+            print(f"ADVERTENCIA: El archivo especificado '{ruta}' no existe.")
+            return []
+        return [ruta]
+    if not os.path.isdir(datasets_dir):
+        print(f"ADVERTENCIA: El directorio '{datasets_dir}' no es válido.")
+        return []
+    return [
+        os.path.join(datasets_dir, nombre)
+        for nombre in sorted(os.listdir(datasets_dir))
+        if nombre.lower().endswith(EXTENSIONES)
+    ]
+
+
+def extraer_documentos(rutas, cache_dir=CACHE_TEXTO, procesos=None):
+    """
+    Asegura que cada documento tenga su fragmento de texto en la caché,
+    extrayendo en paralelo solo los que falten.
+
+    Args:
+        rutas: Documentos .pdf o .txt.
+        cache_dir: Directorio de los fragmentos.
+        procesos: Procesos del grupo (por defecto, uno por CPU).
+
+    Returns:
+        list: Un ``Fragmento`` por documento con texto, en el orden de
+        ``rutas``; los documentos cuya extracción falló no se incluyen.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fragmentos = []
+    pendientes = {}
+    for documento in rutas:
+        resumen = resumen_contenido(documento)
+        destino = ruta_fragmento(resumen, cache_dir)
+        # Un fragmento vacío solo puede venir de una extracción fallida.
+        en_cache = (
+            os.path.exists(destino) and os.path.getsize(destino) > 0
+        ) or resumen in pendientes
+        fragmentos.append(Fragmento(documento, resumen, destino, en_cache))
+        if en_cache:
+            print(f"  En caché: {os.path.basename(documento)}")
+        else:
+            pendientes[resumen] = (documento, destino)
+
+    fallidos = set()
+
+    def informar(resumen, documento, caracteres, duracion):
+        if caracteres is None:
+            fallidos.add(resumen)
+            print(
+                f"  Falló: {os.path.basename(documento)} (sin texto, {duracion:.1f} s)"
+            )
+        else:
+            print(
+                f"  Extraído: {os.path.basename(documento)} "
+                f"({caracteres} caracteres, {duracion:.1f} s)"
+            )
+
+    if len(pendientes) == 1:
+        resumen, (documento, destino) = next(iter(pendientes.items()))
+        informar(resumen, documento, *_extraer_a_fragmento(documento, destino))
+    elif pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = {
+                ejecutor.submit(_extraer_a_fragmento, documento, destino): resumen
+                for resumen, (documento, destino) in pendientes.items()
+            }
+            for futuro in as_completed(futuros):
+                resumen = futuros[futuro]
+                informar(resumen, pendientes[resumen][0], *futuro.result())
+    return [f for f in fragmentos if f.resumen not in fallidos]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extrae a la caché el texto de los documentos de entrenamiento."
+    )
+    parser.add_argument("datasets", nargs="?", default="../DataSets")
+    parser.add_argument("--cache", default=CACHE_TEXTO)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    rutas = documentos(args.datasets)
+    inicio = time.perf_counter()
+    fragmentos = extraer_documentos(rutas, args.cache, args.procesos)
+    nuevos = sum(not f.en_cache for f in fragmentos)
+    fallidos = len(rutas) - len(fragmentos)
+    print(
+        f"{len(rutas)} documentos ({nuevos} extraídos, "
+        f"{len(fragmentos) - nuevos} en caché, {fallidos} fallidos) "
+        f"en {time.perf_counter() - inicio:.1f} s."
+    )
+    sys.exit(1 if fallidos else 0)
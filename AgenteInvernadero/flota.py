@@ -0,0 +1,270 @@
+"""
+Motor de simulación vectorizado para flotas de invernaderos.
+
+Mantiene N invernaderos en arreglos de NumPy y, en cada paso, consulta para toda
+la flota las mismas tablas de decisión que ``AgenteInvernadero.procesar`` y
+aplica la dinámica de ``Invernadero.actualizar_estado`` con máscaras en lugar de
+objetos. Cada invernadero tiene su propio generador derivado de una semilla común, de
+modo que ``SimuladorFlota.crear_par_escalar`` puede reconstruir el invernadero
+y el agente equivalentes y obtener exactamente las mismas decisiones.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from agente import AgenteInvernadero, Invernadero
+from tabla_decision import (
+    BIT_CALEFACTOR,
+    BIT_HUMIDIFICADOR,
+    BIT_VENTILADOR,
+    BANDA_INVALIDA,
+    N_BANDAS,
+    N_MASCARAS,
+)
+
+# Valores de ruido que se generan de una vez (pasos × invernaderos × 2);
+# 2**22 floats de 64 bits = 32 MB, sea cual sea el tamaño de la flota.
+ELEMENTOS_RUIDO = 2**22
+
+
+class ResultadoFlota:
+    """
+    Historial de una simulación de flota. Todos los arreglos tienen forma
+    (pasos, invernaderos).
+
+    Attributes:
+        temperatura, humedad: Estado tras ``actualizar_estado`` en cada paso.
+        actuadores: Máscara de actuadores (``BIT_*``) tras la decisión del agente.
+        accion_temp, accion_hum: Códigos de acción de cada motor de inferencia.
+    """
+
+    def __init__(self, temperatura, humedad, actuadores, accion_temp, accion_hum):
+        self.temperatura = temperatura
+        self.humedad = humedad
+        self.actuadores = actuadores
+        self.accion_temp = accion_temp
+        self.accion_hum = accion_hum
+
+    @property
+    def pasos(self):
+        return self.temperatura.shape[0]
+
+    @property
+    def invernaderos(self):
+        return self.temperatura.shape[1]
+
+
+class SimuladorFlota:
+    """
+    Simula una flota de invernaderos controlados por ``AgenteInvernadero``.
+
+    Args:
+        cultivos: Lista con el perfil de cultivo de cada invernadero; su longitud
+            define el tamaño de la flota.
+        temperatura_inicial, humedad_inicial: Escalar o arreglo de longitud N.
+        semilla: Semilla para reproducir la influencia aleatoria del clima.
+        perfiles: Diccionario opcional {cultivo: perfil} con rangos óptimos
+            (mismas claves que ``AgenteInvernadero.PERFILES_CULTIVO``) que
+            reemplazan o amplían los perfiles del agente.
+        flujos: Número de flujos aleatorios distintos (uno por invernadero si
+            es None). El invernadero i usa el flujo ``i % flujos``, así que los
+            que comparten flujo reciben exactamente el mismo clima.
+    """
+
+    def __init__(
+        self,
+        cultivos,
+        temperatura_inicial=40,
+        humedad_inicial=55,
+        semilla=None,
+        perfiles=None,
+        flujos=None,
+    ):
+        self.cultivos = [c.lower() for c in cultivos]
+        self.perfiles = {k.lower(): v for k, v in (perfiles or {}).items()}
+        n = len(self.cultivos)
+        # Una fila por cultivo distinto con su tabla de decisión compilada.
+        tablas = []
+        fila_de_cultivo = {}
+        filas = []
+        for cultivo in self.cultivos:
+            if cultivo not in fila_de_cultivo:
+                agente = self._crear_agente(Invernadero(), cultivo)
+                fila_de_cultivo[cultivo] = len(tablas)
+                tablas.append(agente.tabla)
+            filas.append(fila_de_cultivo[cultivo])
+        self._desplazamiento = np.array(filas, dtype=np.intp) * len(tablas[0].acciones)
+        self._mascaras = np.array([t.mascaras for t in tablas], dtype=np.uint8).ravel()
+        self._acciones_temp = np.array(
+            [t.acciones_temp for t in tablas], dtype=np.int8
+        ).ravel()
+        self._acciones_hum = np.array(
+            [t.acciones_hum for t in tablas], dtype=np.int8
+        ).ravel()
+
+        por_invernadero = [tablas[f] for f in filas]
+        self.temp_min = np.array(
+            [t.temp_min for t in por_invernadero], dtype=np.float64
+        )
+        self.temp_max = np.array(
+            [t.temp_max for t in por_invernadero], dtype=np.float64
+        )
+        self.hum_min = np.array([t.hum_min for t in por_invernadero], dtype=np.float64)
+        self.hum_max = np.array([t.hum_max for t in por_invernadero], dtype=np.float64)
+
+        self._temp_inicial = np.broadcast_to(
+            np.asarray(temperatura_inicial, dtype=np.float64), (n,)
+        ).copy()
+        self._hum_inicial = np.broadcast_to(
+            np.asarray(humedad_inicial, dtype=np.float64), (n,)
+        ).copy()
+        self.temperatura = self._temp_inicial.copy()
+        self.humedad = self._hum_inicial.copy()
+        self.actuadores = np.zeros(n, dtype=np.uint8)
+
+        self._semillas = np.random.SeedSequence(semilla).spawn(flujos or n)
+        self._generadores = [np.random.default_rng(s) for s in self._semillas]
+        self._flujo = np.arange(n) % len(self._semillas)
+
+    def __len__(self):
+        return len(self.cultivos)
+
+    def _crear_agente(self, invernadero, cultivo):
+        """Crea el agente de ``cultivo``, con su perfil propio si se indicó."""
+        agente = AgenteInvernadero(invernadero, tipo_cultivo=cultivo)
+        perfil = self.perfiles.get(cultivo)
+        if perfil is not None:
+            agente.temp_optima_min = perfil["temp_min"]
+            agente.temp_optima_max = perfil["temp_max"]
+            agente.hum_optima_min = perfil["hum_min"]
+            agente.hum_optima_max = perfil["hum_max"]
+            agente.tabla = agente._obtener_tabla()
+        return agente
+
+    def crear_par_escalar(self, indice):
+        """
+        Construye el ``Invernadero`` y el ``AgenteInvernadero`` equivalentes al
+        invernadero ``indice`` en su estado inicial, con el mismo flujo aleatorio.
+        """
+        invernadero = Invernadero(
+            temperatura_inicial=float(self._temp_inicial[indice]),
+            humedad_inicial=float(self._hum_inicial[indice]),
+            rng=np.random.default_rng(self._semillas[self._flujo[indice]]),
+        )
+        agente = self._crear_agente(invernadero, self.cultivos[indice])
+        return invernadero, agente
+
+    def _decidir(self):
+        """Consulta la tabla de decisión de cada invernadero para toda la flota."""
+        t, h = self.temperatura, self.humedad
+        banda_temp = (t >= self.temp_min).astype(np.intp) + (t > self.temp_max)
+        banda_hum = (h >= self.hum_min).astype(np.intp) + (h > self.hum_max)
+        banda_temp[~np.isfinite(t)] = BANDA_INVALIDA
+        banda_hum[~np.isfinite(h)] = BANDA_INVALIDA
+        indice = (
+            self._desplazamiento
+            + (banda_temp * N_BANDAS + banda_hum) * N_MASCARAS
+            + self.actuadores
+        )
+        self.actuadores = self._mascaras[indice]
+        return self._acciones_temp[indice], self._acciones_hum[indice]
+
+    def _actualizar(self, ruido, deriva=None):
+        """
+        Aplica la dinámica de ``Invernadero.actualizar_estado`` a la flota, más
+        la deriva climática externa (ΔT°, ΔH) del paso, si la hay.
+        """
+        t, h, m = self.temperatura, self.humedad, self.actuadores
+        calefactor = (m & BIT_CALEFACTOR).astype(bool)
+        ventilador = (m & BIT_VENTILADOR).astype(bool)
+        humidificador = (m & BIT_HUMIDIFICADOR).astype(bool)
+
+        t = np.where(calefactor, t + 0.8, t)
+        h = np.where(calefactor, h - 0.5, h)
+        t = np.where(ventilador, t - 0.8, t)
+        h = np.where(ventilador, h - 1.5, h)
+        h = np.where(humidificador, h + 1.5, h)
+        t = np.where(humidificador, t - 0.2, t)
+
+        t += ruido[:, 0]
+        h += ruido[:, 1]
+        if deriva is not None:
+            t += deriva[0]
+            h += deriva[1]
+
+        self.temperatura = np.round(np.clip(t, 0, 50), 2)
+        self.humedad = np.round(np.clip(h, 0, 100), 2)
+
+    def _generar_ruido(self, pasos):
+        """Extrae el ruido climático de cada invernadero para ``pasos`` pasos."""
+        ruido = np.empty((pasos, len(self._generadores), 2), dtype=np.float64)
+        for i, generador in enumerate(self._generadores):
+            ruido[:, i, :] = generador.uniform(-1.2, 1.2, size=(pasos, 2))
+        if len(self._generadores) == len(self):
+            return ruido
+        return ruido[:, self._flujo]
+
+    def simular(self, pasos, bloque=None, deriva=None):
+        """
+        Avanza la flota ``pasos`` ciclos de "procesar y actualizar", igual que una
+        iteración de ``AgenteInvernadero.simular_un_dia``. El estado se conserva
+        entre llamadas, por lo que se puede continuar una simulación.
+
+        Args:
+            pasos: Número de pasos a simular.
+            bloque: Pasos cuyo ruido se genera de una sola vez por invernadero;
+                por defecto, los que caben en ``ELEMENTOS_RUIDO``.
+            deriva: Arreglo opcional de forma (pasos, 2) con el cambio de T° y
+                humedad que impone el clima exterior en cada paso (por ejemplo,
+                las diferencias de una traza climática real).
+
+        Returns:
+            ResultadoFlota: Historial completo de la simulación.
+        """
+        n = len(self)
+        temperatura = np.empty((pasos, n), dtype=np.float64)
+        humedad = np.empty((pasos, n), dtype=np.float64)
+        actuadores = np.empty((pasos, n), dtype=np.uint8)
+        accion_temp = np.empty((pasos, n), dtype=np.int8)
+        accion_hum = np.empty((pasos, n), dtype=np.int8)
+
+        if deriva is not None:
+            deriva = np.asarray(deriva, dtype=np.float64)
+            if deriva.shape != (pasos, 2):
+                raise ValueError(
+                    f"La deriva debe tener forma ({pasos}, 2), no {deriva.shape}."
+                )
+
+        if bloque is None:
+            bloque = max(1, ELEMENTOS_RUIDO // (2 * max(1, n)))
+        for inicio in range(0, pasos, bloque):
+            fin = min(inicio + bloque, pasos)
+            ruido = self._generar_ruido(fin - inicio)
+            for k in range(inicio, fin):
+                accion_temp[k], accion_hum[k] = self._decidir()
+                actuadores[k] = self.actuadores
+                self._actualizar(
+                    ruido[k - inicio], None if deriva is None else deriva[k]
+                )
+                temperatura[k] = self.temperatura
+                humedad[k] = self.humedad
+
+        return ResultadoFlota(temperatura, humedad, actuadores, accion_temp, accion_hum)
+
+
+if __name__ == "__main__":
+    n_invernaderos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_pasos = int(sys.argv[2]) if len(sys.argv) > 2 else 1440
+    perfiles = AgenteInvernadero.get_perfiles_disponibles()
+    flota = SimuladorFlota(
+        [perfiles[i % len(perfiles)] for i in range(n_invernaderos)], semilla=0
+    )
+    inicio = time.perf_counter()
+    resultado = flota.simular(n_pasos)
+    duracion = time.perf_counter() - inicio
+    print(
+        f"{n_invernaderos} invernaderos × {n_pasos} pasos en {duracion:.2f} s "
+        f"({n_invernaderos * n_pasos / duracion:,.0f} pasos-invernadero/s)"
+    )
@@ -0,0 +1,375 @@
+"""
+Índice aproximado de vecinos más cercanos para las consultas de similitud.
+
+``most_similar`` de gensim recorre todo el vocabulario en cada consulta, y con
+``min_count=1`` el vocabulario crece con cada documento nuevo. ``IndiceANN``
+es un bosque de proyecciones aleatorias (al estilo de Annoy) escrito con
+NumPy: cada árbol divide recursivamente el vocabulario con hiperplanos que
+pasan por el origen, entre dos palabras elegidas al azar, hasta dejar hojas
+pequeñas. Una consulta recorre los árboles por orden de cercanía al
+hiperplano hasta reunir ``candidatos`` palabras y solo a esas les calcula la
+similitud exacta.
+
+``candidatos`` es la perilla de exhaustividad/latencia: más candidatos
+encuentran más vecinos verdaderos y tardan más. ``BuscadorSimilares`` usa el
+índice cuando existe, está vigente y el vocabulario llega a ``UMBRAL_EXACTO``
+palabras, y la búsqueda exacta en caso contrario.
+
+El índice se guarda junto al modelo (``invernadero.ann.npz``)::
+
+    python indice_ann.py invernadero.model --arboles 16 --evaluar 200
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import time
+
+import numpy as np
+
+from vectores import cargar_vectores_modelo, resolver_ruta, ruta_indice
+
+VERSION_INDICE = 1
+
+ARBOLES = 12
+TAMANO_HOJA = 48
+
+# Con 600 candidatos la exhaustividad@10 era de ~40-70 %; con 5000, de
+# ~93-96 % en vocabularios de 50 000 a 200 000 palabras (100 dimensiones).
+CANDIDATOS = 5000
+
+# Por debajo de esto la búsqueda exacta de gensim es más rápida que el índice
+# (recorrer los árboles en Python cuesta ~1 ms): con 5000 palabras, 0,3 ms
+# exacta frente a 0,6-2 ms aproximada; con 100 000, 5,7 ms frente a 4,1 ms;
+# con 200 000, 11,5 ms frente a 5,4 ms.
+UMBRAL_EXACTO = 100_000
+
+
+def normalizar(vectores):
+    """Copia de ``vectores`` con filas de norma 1 (las nulas quedan en cero)."""
+    vectores = np.asarray(vectores, dtype=np.float32)
+    normas = np.linalg.norm(vectores, axis=-1, keepdims=True)
+    return vectores / np.where(normas == 0, 1, normas)
+
+
+class IndiceANN:
+    """
+    Bosque de proyecciones aleatorias sobre vectores normalizados.
+
+    Los árboles se guardan en arreglos planos: cada nodo interno tiene un
+    hiperplano (``normales``) y dos hijos (``hijos``); un hijo negativo ``-h-1``
+    es la hoja ``h``, cuyos índices de palabras son
+    ``hojas[inicio_hojas[h]:inicio_hojas[h + 1]]``.
+    """
+
+    def __init__(self, normales, hijos, raices, hojas, inicio_hojas, n_palabras):
+        self.normales = normales
+        self.hijos = hijos
+        self.raices = raices
+        self.hojas = hojas
+        self.inicio_hojas = inicio_hojas
+        self.n_palabras = n_palabras
+        self._hijos = None
+        self._inicio_hojas = None
+
+    @property
+    def arboles(self):
+        return len(self.raices)
+
+    @classmethod
+    def construir(cls, vectores, arboles=ARBOLES, tamano_hoja=TAMANO_HOJA, semilla=0):
+        """Construye el índice para una matriz de vectores (una fila por palabra)."""
+        datos = normalizar(vectores)
+        rng = np.random.default_rng(semilla)
+        normales, hijos, hojas, raices = [], [], [], []
+
+        def nueva_hoja(indices):
+            hojas.append(indices.astype(np.int32))
+            return -len(hojas)
+
+        def dividir(indices):
+            if len(indices) <= tamano_hoja:
+                return nueva_hoja(indices)
+            a, b = rng.choice(indices, 2, replace=False)
+            normal = datos[a] - datos[b]
+            lado = datos[indices] @ normal > 0
+            n_derecha = int(lado.sum())
+            if n_derecha == 0 or n_derecha == len(indices):
+                # Hiperplano degenerado (vectores repetidos): mitad y mitad.
+                lado = np.zeros(len(indices), dtype=bool)
+                lado[rng.permutation(len(indices))[: len(indices) // 2]] = True
+            nodo = len(normales)
+            normales.append(normal)
+            hijos.append([0, 0])
+            hijos[nodo][0] = dividir(indices[~lado])
+            hijos[nodo][1] = dividir(indices[lado])
+            return nodo
+
+        todos = np.arange(len(datos))
+        for _ in range(arboles):
+            raices.append(dividir(todos))
+
+        inicio_hojas = np.zeros(len(hojas) + 1, dtype=np.int64)
+        inicio_hojas[1:] = np.cumsum([len(h) for h in hojas])
+        dim = datos.shape[1]
+        return cls(
+            np.array(normales, dtype=np.float32).reshape(-1, dim),
+            np.array(hijos, dtype=np.int32).reshape(-1, 2),
+            np.array(raices, dtype=np.int32),
+            np.concatenate(hojas) if hojas else np.zeros(0, dtype=np.int32),
+            inicio_hojas,
+            len(datos),
+        )
+
+    def candidatos(self, consulta, n_candidatos=CANDIDATOS):
+        """
+        Índices de al menos ``n_candidatos`` palabras cercanas a ``consulta``
+        (o todas las que se alcancen). Se baja primero por el lado de la
+        consulta en cada árbol y después, como en Annoy, por las ramas del otro
+        lado de los hiperplanos que quedan más cerca de ella: las que menos se
+        apartan de la consulta.
+        """
+        if self._hijos is None:
+            # Listas de Python: indexarlas nodo a nodo es mucho más barato.
+            self._hijos = self.hijos.tolist()
+            self._inicio_hojas = self.inicio_hojas.tolist()
+        normales, hijos = self.normales, self._hijos
+        hojas, inicio = self.hojas, self._inicio_hojas
+        # Montículo de (margen, nodo): el margen de una rama es la mayor distancia
+        # a un hiperplano que se cruza para llegar a ella (-inf en las raíces).
+        pendientes = [(-np.inf, r) for r in self.raices.tolist()]
+        encontradas = []
+        total = 0
+        while pendientes and total < n_candidatos:
+            margen, nodo = heapq.heappop(pendientes)
+            while nodo >= 0:
+                proyeccion = float(normales[nodo].dot(consulta))
+                izquierdo, derecho = hijos[nodo]
+                if proyeccion > 0:
+                    heapq.heappush(pendientes, (max(margen, proyeccion), izquierdo))
+                    nodo = derecho
+                else:
+                    heapq.heappush(pendientes, (max(margen, -proyeccion), derecho))
+                    nodo = izquierdo
+            h = -nodo - 1
+            encontradas.append(hojas[inicio[h] : inicio[h + 1]])
+            total += len(encontradas[-1])
+        if not encontradas:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(encontradas))
+
+    def guardar(self, ruta):
+        """Guarda el índice en un archivo ``.npz`` sin comprimir."""
+        with open(ruta, "wb") as f:
+            np.savez(
+                f,
+                version=VERSION_INDICE,
+                normales=self.normales,
+                hijos=self.hijos,
+                raices=self.raices,
+                hojas=self.hojas,
+                inicio_hojas=self.inicio_hojas,
+                n_palabras=self.n_palabras,
+            )
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga un índice guardado con ``guardar``."""
+        with np.load(ruta) as datos:
+            if int(datos["version"]) != VERSION_INDICE:
+                raise ValueError(f"Versión de índice no soportada en '{ruta}'.")
+            return cls(
+                datos["normales"],
+                datos["hijos"],
+                datos["raices"],
+                datos["hojas"],
+                datos["inicio_hojas"],
+                int(datos["n_palabras"]),
+            )
+
+
+def indice_vigente(ruta_modelo, n_palabras=None):
+    """
+    Carga el índice guardado junto a ``ruta_modelo`` si existe, es al menos tan
+    reciente como el modelo y corresponde al mismo vocabulario; si no, None.
+    """
+    ruta_modelo = resolver_ruta(ruta_modelo)
+    ruta = ruta_indice(ruta_modelo)
+    if not os.path.exists(ruta):
+        return None
+    if os.path.exists(ruta_modelo) and os.path.getmtime(ruta) < os.path.getmtime(
+        ruta_modelo
+    ):
+        return None
+    try:
+        indice = IndiceANN.cargar(ruta)
+    except (OSError, ValueError, KeyError):
+        return None
+    if n_palabras is not None and indice.n_palabras != n_palabras:
+        return None
+    return indice
+
+
+class BuscadorSimilares:
+    """
+    ``most_similar`` con el mismo formato que gensim, usando el índice
+    aproximado cuando lo hay.
+
+    Args:
+        wv: ``KeyedVectors`` del modelo.
+        indice: ``IndiceANN`` o None para buscar siempre de forma exacta.
+        candidatos: Candidatos por consulta (exhaustividad frente a latencia).
+        umbral_exacto: Con menos palabras que esto se busca de forma exacta.
+    """
+
+    def __init__(self, wv, indice=None, candidatos=CANDIDATOS, umbral_exacto=None):
+        self.wv = wv
+        self.indice = indice
+        self.candidatos = candidatos
+        self.umbral_exacto = UMBRAL_EXACTO if umbral_exacto is None else umbral_exacto
+
+    @classmethod
+    def para_modelo(cls, wv, ruta_modelo, **kwargs):
+        """Buscador con el índice vigente de ``ruta_modelo``, si existe."""
+        return cls(wv, indice_vigente(ruta_modelo, len(wv)), **kwargs)
+
+    @property
+    def aproximado(self):
+        """Indica si las consultas usan el índice aproximado."""
+        return self.indice is not None and len(self.wv) >= self.umbral_exacto
+
+    def __contains__(self, palabra):
+        return palabra in self.wv
+
+    def __getattr__(self, nombre):
+        # Lo que no es una consulta se delega en los KeyedVectors.
+        return getattr(self.wv, nombre)
+
+    def most_similar(
+        self, positive=(), negative=(), topn=10, candidatos=None, exacto=False
+    ):
+        """
+        Palabras más similares a ``positive`` - ``negative``, como
+        ``KeyedVectors.most_similar``.
+
+        Args:
+            candidatos: Reemplaza el número de candidatos de esta consulta.
+            exacto: Si es True, ignora el índice y recorre todo el vocabulario.
+
+        Raises:
+            KeyError: Si alguna palabra no está en el vocabulario.
+        """
+        if isinstance(positive, str):
+            positive = [positive]
+        if isinstance(negative, str):
+            negative = [negative]
+        if exacto or not self.aproximado:
+            return self.wv.most_similar(
+                positive=list(positive), negative=list(negative), topn=topn
+            )
+
+        wv = self.wv
+        excluir = set()
+        consulta = np.zeros(wv.vector_size, dtype=np.float32)
+        for palabras, peso in ((positive, 1.0), (negative, -1.0)):
+            for palabra in palabras:
+                indice = wv.get_index(palabra)
+                excluir.add(indice)
+                consulta += peso * wv.get_vector(indice, norm=True)
+        consulta = normalizar(consulta)
+
+        candidatos = self.indice.candidatos(consulta, candidatos or self.candidatos)
+        # Similitud coseno solo de los candidatos, con las normas que gensim
+        # ya calculó: la matriz de vectores puede estar mapeada en memoria.
+        similitudes = (wv.vectors[candidatos] @ consulta) / wv.norms[candidatos]
+        k = min(topn + len(excluir), len(candidatos))
+        mejores = np.argpartition(-similitudes, k - 1)[:k]
+        mejores = mejores[np.argsort(-similitudes[mejores])]
+        resultado = []
+        for indice, similitud in zip(
+            candidatos[mejores].tolist(), similitudes[mejores].tolist()
+        ):
+            if indice in excluir:
+                continue
+            resultado.append((wv.index_to_key[indice], similitud))
+            if len(resultado) == topn:
+                break
+        return resultado
+
+
+def evaluar_exhaustividad(buscador, consultas=200, topn=10, semilla=0):
+    """
+    Exhaustividad (recall@topn) y latencias del índice frente a la búsqueda
+    exacta, con palabras del vocabulario elegidas al azar.
+    """
+    wv = buscador.wv
+    rng = np.random.default_rng(semilla)
+    palabras = [wv.index_to_key[i] for i in rng.choice(len(wv), consultas)]
+    aciertos = 0
+    tiempo_aprox = tiempo_exacto = 0.0
+    for palabra in palabras:
+        inicio = time.perf_counter()
+        aproximados = buscador.most_similar(palabra, topn=topn)
+        tiempo_aprox += time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        exactos = buscador.most_similar(palabra, topn=topn, exacto=True)
+        tiempo_exacto += time.perf_counter() - inicio
+        aciertos += len({p for p, _ in aproximados} & {p for p, _ in exactos})
+    return {
+        "exhaustividad": aciertos / (consultas * topn),
+        "latencia_aprox_ms": tiempo_aprox / consultas * 1000,
+        "latencia_exacta_ms": tiempo_exacto / consultas * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modelo", help="Modelo Word2Vec (o su artefacto .kv).")
+    parser.add_argument("--arboles", type=int, default=ARBOLES)
+    parser.add_argument("--hoja", type=int, default=TAMANO_HOJA)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument(
+        "--evaluar",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Mide exhaustividad y latencia con N consultas al azar.",
+    )
+    parser.add_argument(
+        "--candidatos",
+        type=int,
+        nargs="+",
+        default=[CANDIDATOS],
+        help="Candidatos por consulta a evaluar.",
+    )
+    args = parser.parse_args(argv)
+
+    ruta_modelo = resolver_ruta(args.modelo)
+    wv, _ = cargar_vectores_modelo(ruta_modelo)
+    inicio = time.perf_counter()
+    indice = IndiceANN.construir(wv.vectors, args.arboles, args.hoja, args.semilla)
+    ruta = ruta_indice(ruta_modelo)
+    indice.guardar(ruta)
+    print(
+        f"Índice de {indice.arboles} árboles para {indice.n_palabras} palabras "
+        f"guardado en '{ruta}' ({time.perf_counter() - inicio:.2f} s, "
+        f"{os.path.getsize(ruta) / 1e6:.1f} MB)."
+    )
+
+    if args.evaluar:
+        for candidatos in args.candidatos:
+            buscador = BuscadorSimilares(
+                wv, indice, candidatos=candidatos, umbral_exacto=0
+            )
+            r = evaluar_exhaustividad(buscador, args.evaluar)
+            print(
+                f"candidatos={candidatos:<6} exhaustividad@10: "
+                f"{r['exhaustividad']:.1%}  aprox: {r['latencia_aprox_ms']:.3f} ms  "
+                f"exacta: {r['latencia_exacta_ms']:.3f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Ingesta en flujo de lecturas de sensores hacia el motor de reglas del agente.
+
+Las fuentes son generadores que producen ``Lectura`` desde archivos CSV, la
+entrada estándar o un socket UDP/TCP local (sustituto de los sensores reales).
+``procesar_flujo`` agrupa las lecturas en micro-lotes, las pasa por
+``AgenteInvernadero.decidir`` y produce los comandos de actuadores resultantes
+también como flujo, sin cargar nunca el historial completo en memoria.
+
+Uso::
+
+    python ingesta.py lecturas.csv --cultivo tomate > comandos.csv
+    cat lecturas.csv | python ingesta.py - --cultivo pepino
+    python ingesta.py udp://127.0.0.1:9999 --cultivo lechuga
+"""
+
+import argparse
+import csv
+import math
+import socket
+import sys
+from collections import namedtuple
+from itertools import islice
+
+from agente import AgenteInvernadero, Invernadero
+from tabla_decision import ACCIONES
+
+Lectura = namedtuple("Lectura", "instante invernadero temperatura humedad")
+Comando = namedtuple("Comando", "instante invernadero codigo accion")
+
+# Nombres de columna aceptados para cada campo de una lectura.
+_COLUMNAS = {
+    "instante": ("instante", "timestamp", "ts", "fecha"),
+    "invernadero": ("invernadero", "id", "sitio"),
+    "temperatura": ("temperatura", "temp", "t"),
+    "humedad": ("humedad", "hum", "h"),
+}
+
+
+def _numero(texto):
+    """
+    Valor numérico de un campo. ``float`` acepta ``nan`` e ``inf``, pero una
+    lectura así no es una medida: se rechaza como cualquier campo mal formado.
+    """
+    valor = float(texto)
+    if not math.isfinite(valor):
+        raise ValueError(f"Lectura no finita: {texto!r}")
+    return valor
+
+
+def _indices_columnas(encabezado):
+    """Relaciona cada campo de ``Lectura`` con su índice en el encabezado CSV."""
+    normalizado = [c.strip().lower() for c in encabezado]
+    indices = {}
+    for campo, alias in _COLUMNAS.items():
+        for nombre in alias:
+            if nombre in normalizado:
+                indices[campo] = normalizado.index(nombre)
+                break
+    if "temperatura" not in indices or "humedad" not in indices:
+        raise ValueError(
+            f"El encabezado {encabezado} no tiene columnas de temperatura y humedad."
+        )
+    return indices
+
+
+def _indices_sin_encabezado(fila):
+    """
+    Índices de una fila sin encabezado según su número de columnas: con cuatro
+    o más es ``instante,invernadero,temperatura,humedad``; si no,
+    ``temperatura,humedad``.
+    """
+    if len(fila) >= 4:
+        return {"instante": 0, "invernadero": 1, "temperatura": 2, "humedad": 3}
+    return {"temperatura": 0, "humedad": 1}
+
+
+def _lectura(fila, indices, instante, invernadero):
+    """
+    Lectura de una fila con los ``indices`` dados; ``instante`` e
+    ``invernadero`` se usan cuando la fila no trae esas columnas. Lanza
+    ``ValueError`` o ``IndexError`` si la fila está mal formada.
+    """
+    temperatura = _numero(fila[indices["temperatura"]])
+    humedad = _numero(fila[indices["humedad"]])
+    if "instante" in indices:
+        instante = fila[indices["instante"]]
+    if "invernadero" in indices:
+        invernadero = fila[indices["invernadero"]]
+    return Lectura(instante, invernadero, temperatura, humedad)
+
+
+def leer_filas(filas, invernadero_por_defecto="inv"):
+    """
+    Convierte filas CSV (listas de cadenas) en lecturas. Si la primera fila no es
+    numérica se usa como encabezado; si no, se asume
+    ``instante,invernadero,temperatura,humedad`` o ``temperatura,humedad`` según
+    su número de columnas. Las filas mal formadas (incluidas las de valores no
+    finitos) se omiten, y se avisa si no queda ninguna.
+    """
+    filas = iter(filas)
+    primera = next(filas, None)
+    if primera is None:
+        return
+    indices = _indices_sin_encabezado(primera)
+    try:
+        float(primera[indices["temperatura"]])
+        filas = _encadenar(primera, filas)
+    except (ValueError, IndexError):
+        indices = _indices_columnas(primera)
+
+    numero = 0
+    for fila in filas:
+        try:
+            lectura = _lectura(fila, indices, numero, invernadero_por_defecto)
+        except (ValueError, IndexError):
+            continue
+        numero += 1
+        yield lectura
+    if not numero:
+        print(
+            "Aviso: ninguna fila válida de temperatura y humedad en la entrada.",
+            file=sys.stderr,
+        )
+
+
+def _encadenar(primera, resto):
+    yield primera
+    yield from resto
+
+
+def leer_csv(ruta, invernadero_por_defecto="inv"):
+    """Genera las lecturas de un archivo CSV, fila por fila."""
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        yield from leer_filas(csv.reader(f), invernadero_por_defecto)
+
+
+def leer_flujo(flujo=None, invernadero_por_defecto="inv"):
+    """Genera lecturas desde un flujo de texto en formato CSV (stdin por defecto)."""
+    flujo = sys.stdin if flujo is None else flujo
+    yield from leer_filas(csv.reader(flujo), invernadero_por_defecto)
+
+
+def leer_socket(host="127.0.0.1", puerto=9999, protocolo="udp", invernadero="inv"):
+    """
+    Genera lecturas recibidas por un socket local. Cada datagrama UDP, o cada
+    línea de una conexión TCP, es una fila CSV ``temperatura,humedad`` o
+    ``instante,invernadero,temperatura,humedad``. En TCP se atiende una conexión
+    cada vez y el generador termina cuando el cliente cierra.
+    """
+    if protocolo == "udp":
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind((host, puerto))
+            while True:
+                datos, _ = sock.recvfrom(65535)
+                texto = datos.decode("utf-8", errors="ignore")
+                yield from _lecturas_de_lineas(texto.splitlines(), invernadero)
+    elif protocolo == "tcp":
+        with socket.create_server((host, puerto)) as servidor:
+            conexion, _ = servidor.accept()
+            with conexion, conexion.makefile("r", encoding="utf-8") as flujo:
+                yield from _lecturas_de_lineas(flujo, invernadero)
+    else:
+        raise ValueError(f"Protocolo no soportado: '{protocolo}'.")
+
+
+def _lecturas_de_lineas(lineas, invernadero):
+    """Lecturas de líneas sueltas sin encabezado (formato corto o completo)."""
+    for fila in csv.reader(lineas):
+        try:
+            yield _lectura(fila, _indices_sin_encabezado(fila), None, invernadero)
+        except (ValueError, IndexError):
+            continue
+
+
+def micro_lotes(lecturas, tamano=512):
+    """Agrupa un flujo de lecturas en listas de hasta ``tamano`` elementos."""
+    lecturas = iter(lecturas)
+    while True:
+        lote = list(islice(lecturas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def procesar_flujo(lecturas, cultivo="default", agentes=None, tamano_lote=512):
+    """
+    Pasa un flujo de lecturas por el motor de reglas y genera los comandos de
+    actuadores, en orden, a medida que se deciden.
+
+    Args:
+        lecturas: Iterable de ``Lectura``.
+        cultivo: Perfil de cultivo para los agentes creados bajo demanda.
+        agentes: Diccionario opcional {invernadero: AgenteInvernadero}; las
+            lecturas de invernaderos nuevos crean su propio agente.
+        tamano_lote: Lecturas por micro-lote.
+
+    Yields:
+        Comando: Una entrada por cada acción ejecutada.
+    """
+    agentes = {} if agentes is None else agentes
+    for lote in micro_lotes(lecturas, tamano_lote):
+        comandos = []
+        for instante, invernadero, temperatura, humedad in lote:
+            agente = agentes.get(invernadero)
+            if agente is None:
+                agente = agentes[invernadero] = AgenteInvernadero(
+                    Invernadero(identificador=invernadero), tipo_cultivo=cultivo
+                )
+            for codigo in agente.decidir(temperatura, humedad):
+                comandos.append(
+                    Comando(instante, invernadero, codigo, ACCIONES[codigo])
+                )
+        yield from comandos
+
+
+def _fuente(origen):
+    """Elige la fuente de lecturas según el argumento de la línea de comandos."""
+    if origen == "-":
+        return leer_flujo()
+    for protocolo in ("udp", "tcp"):
+        prefijo = f"{protocolo}://"
+        if origen.startswith(prefijo):
+            host, _, puerto = origen[len(prefijo) :].rpartition(":")
+            return leer_socket(host or "127.0.0.1", int(puerto), protocolo)
+    return leer_csv(origen)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reproduce lecturas de sensores a través del motor de reglas."
+    )
+    parser.add_argument(
+        "origen", help="Archivo CSV, '-' para stdin, o udp://host:puerto / tcp://..."
+    )
+    parser.add_argument("--cultivo", default="default", help="Perfil de cultivo.")
+    parser.add_argument(
+        "--lote",
+        type=int,
+        default=None,
+        help="Tamaño de micro-lote (512 para archivos; 1 para sockets, sin esperas).",
+    )
+    args = parser.parse_args()
+    if args.lote is None:
+        args.lote = 1 if "://" in args.origen else 512
+
+    escritor = csv.writer(sys.stdout)
+    escritor.writerow(Comando._fields)
+    try:
+        comandos = procesar_flujo(
+            _fuente(args.origen), args.cultivo, tamano_lote=args.lote
+        )
+        for lote in micro_lotes(comandos, args.lote):
+            escritor.writerows(lote)
+            if args.lote == 1:
+                sys.stdout.flush()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
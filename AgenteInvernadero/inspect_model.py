@@ -1,12 +1,158 @@
+import argparse
+import json
+import os
+import random
 import sys
+import time
+
+import numpy as np
 from gensim.models import Word2Vec
 
-def inspect_model(model_path):
+from indice_ann import BuscadorSimilares
+from vectores import cargar_vectores, ruta_vectores, vectores_vigentes
+
+# Palabras al azar con las que se mide la latencia de most_similar.
+CONSULTAS_LATENCIA = 200
+
+# Cotas superiores de los tramos del histograma de frecuencias del vocabulario.
+TRAMOS_FRECUENCIA = (1, 2, 4, 9, 99)
+
+
+def _tamano_en_disco(ruta):
+    """Bytes de un modelo guardado más sus matrices separadas (``ruta.*.npy``)."""
+    directorio = os.path.dirname(ruta) or "."
+    base = os.path.basename(ruta)
+    return sum(
+        os.path.getsize(os.path.join(directorio, nombre))
+        for nombre in os.listdir(directorio)
+        if nombre == base or nombre.startswith(base + ".")
+    )
+
+
+def _distribucion_frecuencias(wv):
+    """Vocabulario por tramos de frecuencia en el corpus y proporción de hapax."""
+    conteos = np.array([wv.get_vecattr(palabra, "count") for palabra in wv.index_to_key])
+    tramos = {}
+    inferior = 1
+    for superior in TRAMOS_FRECUENCIA:
+        etiqueta = str(superior) if superior == inferior else f"{inferior}-{superior}"
+        tramos[etiqueta] = int(((conteos >= inferior) & (conteos <= superior)).sum())
+        inferior = superior + 1
+    tramos[f"{inferior}+"] = int((conteos >= inferior).sum())
+    hapax = conteos == 1
+    return {
+        "tokens": int(conteos.sum()),
+        "hapax": int(hapax.sum()),
+        "proporcion_hapax": float(hapax.mean()) if len(conteos) else 0.0,
+        "tokens_hapax": float(conteos[hapax].sum() / conteos.sum()) if len(conteos) else 0.0,
+        "tramos": tramos,
+    }
+
+
+def rendimiento_modelo(model, model_path, buscador, segundos_carga, consultas=CONSULTAS_LATENCIA, semilla=0):
+    """
+    Costo del modelo: tiempos de carga, memoria de los vectores frente al
+    estado de entrenamiento, latencia de ``most_similar`` sobre una muestra de
+    palabras, distribución de frecuencias del vocabulario y bytes por palabra.
+    """
+    wv = model.wv
+    n_palabras = len(wv)
+    carga = {"modelo_completo_s": segundos_carga}
+    ruta_kv = ruta_vectores(model_path)
+    if vectores_vigentes(model_path, ruta_kv):
+        inicio = time.perf_counter()
+        cargar_vectores(ruta_kv)
+        carga["vectores_mapeados_s"] = time.perf_counter() - inicio
+
+    # Matrices que solo hacen falta para seguir entrenando.
+    entrenamiento = {
+        nombre: getattr(model, nombre).nbytes
+        for nombre in ("syn1neg", "syn1", "cum_table")
+        if getattr(model, nombre, None) is not None
+    }
+    entrenamiento.update(
+        {f"wv.{nombre}": matriz.nbytes for nombre, matriz in wv.expandos.items()}
+    )
+    if getattr(wv, "vectors_lockf", None) is not None:
+        entrenamiento["wv.vectors_lockf"] = np.asarray(wv.vectors_lockf).nbytes
+    memoria = {
+        "vectores_bytes": wv.vectors.nbytes,
+        "entrenamiento_bytes": sum(entrenamiento.values()),
+        "entrenamiento_detalle": entrenamiento,
+    }
+
+    latencias = []
+    if n_palabras > 1:
+        muestra = random.Random(semilla).choices(wv.index_to_key, k=consultas)
+        buscador.most_similar(muestra[0], topn=10)
+        for palabra in muestra:
+            inicio = time.perf_counter_ns()
+            buscador.most_similar(palabra, topn=10)
+            latencias.append((time.perf_counter_ns() - inicio) / 1e6)
+    latencia = {"consultas": len(latencias), "aproximado": buscador.aproximado}
+    if latencias:
+        for p in (50, 90, 99):
+            latencia[f"p{p}_ms"] = float(np.percentile(latencias, p))
+        latencia["max_ms"] = max(latencias)
+
+    disco = {"modelo_bytes": _tamano_en_disco(model_path)}
+    if os.path.exists(ruta_kv):
+        disco["vectores_bytes"] = _tamano_en_disco(ruta_kv)
+    por_palabra = n_palabras or 1
+    return {
+        "palabras": n_palabras,
+        "carga": carga,
+        "memoria": memoria,
+        "latencia_similares": latencia,
+        "vocabulario": _distribucion_frecuencias(wv),
+        "disco": disco,
+        "bytes_por_palabra": {
+            "vectores": memoria["vectores_bytes"] / por_palabra,
+            "modelo_completo": (memoria["vectores_bytes"] + memoria["entrenamiento_bytes"]) / por_palabra,
+            "disco": disco["modelo_bytes"] / por_palabra,
+        },
+    }
+
+
+def _mb(n_bytes):
+    return f"{n_bytes / 2**20:.2f} MB"
+
+
+def mostrar_rendimiento(reporte):
+    """Imprime la sección de rendimiento del reporte en Markdown."""
+    carga = reporte["carga"]
+    memoria = reporte["memoria"]
+    latencia = reporte["latencia_similares"]
+    vocabulario = reporte["vocabulario"]
+    por_palabra = reporte["bytes_por_palabra"]
+
+    print("\n## Rendimiento\n")
+    print(f"* **Carga del modelo completo:** {carga['modelo_completo_s'] * 1000:.1f} ms")
+    if "vectores_mapeados_s" in carga:
+        print(f"* **Carga de los vectores mapeados (.kv):** {carga['vectores_mapeados_s'] * 1000:.1f} ms")
+    print(f"* **Memoria de los vectores:** {_mb(memoria['vectores_bytes'])}")
+    print(f"* **Memoria del estado de entrenamiento:** {_mb(memoria['entrenamiento_bytes'])} (no se usa para consultar)")
+    print(f"* **Bytes por palabra:** {por_palabra['vectores']:.0f} (vectores), {por_palabra['modelo_completo']:.0f} (modelo completo en memoria), {por_palabra['disco']:.0f} (en disco)")
+    if latencia["consultas"]:
+        modo = "índice aproximado" if latencia["aproximado"] else "búsqueda exacta"
+        print(f"* **Latencia de most_similar** ({latencia['consultas']} consultas, {modo}): p50 {latencia['p50_ms']:.2f} ms, p90 {latencia['p90_ms']:.2f} ms, p99 {latencia['p99_ms']:.2f} ms")
+    print(f"* **Palabras que aparecen una sola vez (hapax):** {vocabulario['hapax']} ({vocabulario['proporcion_hapax']:.1%} del vocabulario, {vocabulario['tokens_hapax']:.2%} de los tokens)")
+
+    print("\n| Apariciones en el corpus | Palabras |")
+    print("|---|---|")
+    for tramo, palabras in vocabulario["tramos"].items():
+        print(f"| {tramo} | {palabras} |")
+
+def inspect_model(model_path, ruta_json=None, consultas=CONSULTAS_LATENCIA):
     """
-    Loads a Word2Vec model and prints its metadata and some examples in Markdown format.
+    Loads a Word2Vec model and prints its metadata, some examples and its
+    performance costs in Markdown format. The performance section can also be
+    written as JSON to ``ruta_json``.
     """
     try:
+        inicio = time.perf_counter()
         model = Word2Vec.load(model_path)
+        segundos_carga = time.perf_counter() - inicio
         
         print(f"# Reporte del Modelo Word2Vec: `{model_path}`")
         print("\nEste documento describe la arquitectura y las capacidades del modelo de lenguaje `invernadero.model`, que ha sido entrenado con textos relacionados con el manejo de invernaderos.")
@@ -29,11 +175,15 @@ def inspect_model(model_path):
         print("\n## Ejemplos de Similitud Semántica\n")
         print("El modelo puede encontrar las palabras más cercanas a un término dado en el contexto de los documentos de entrenamiento.\n")
         
+        buscador = BuscadorSimilares.para_modelo(model.wv, model_path)
+        if buscador.aproximado:
+            print(f"_Consultas resueltas con el índice aproximado ({buscador.indice.arboles} árboles)._\n")
+
         test_words = ['temperatura', 'humedad', 'plaga', 'cultivo', 'riego', 'tomate']
         for word in test_words:
             if word in model.wv:
                 try:
-                    similar_words = model.wv.most_similar(word, topn=5)
+                    similar_words = buscador.most_similar(word, topn=5)
                     print(f"### Palabras más similares a `{word}`:\n")
                     for sim_word, score in similar_words:
                         print(f"- `{sim_word}` (puntuación: {score:.4f})")
@@ -41,6 +191,13 @@ def inspect_model(model_path):
                 except Exception as e:
                     print(f"No se pudieron encontrar palabras similares para '{word}': {e}\n")
 
+        reporte = rendimiento_modelo(model, model_path, buscador, segundos_carga, consultas)
+        mostrar_rendimiento(reporte)
+        if ruta_json:
+            with open(ruta_json, "w", encoding="utf-8") as f:
+                json.dump(reporte, f, indent=2, ensure_ascii=False)
+            print(f"\n_Métricas de rendimiento guardadas en `{ruta_json}`._")
+
     except Exception as e:
         print(f"## Error")
         print(f"No se pudo cargar o inspeccionar el modelo en `{model_path}`.")
@@ -48,8 +205,9 @@ def inspect_model(model_path):
         sys.exit(1)
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        inspect_model(sys.argv[1])
-    else:
-        print("Uso: python inspect_model.py <ruta_del_modelo>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Reporte en Markdown de un modelo Word2Vec.")
+    parser.add_argument("modelo", help="Ruta del modelo")
+    parser.add_argument("--json", help="Guardar las métricas de rendimiento en este archivo JSON.")
+    parser.add_argument("--consultas", type=int, default=CONSULTAS_LATENCIA, help="Consultas para medir la latencia.")
+    args = parser.parse_args()
+    inspect_model(args.modelo, args.json, args.consultas)
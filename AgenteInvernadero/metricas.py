@@ -0,0 +1,296 @@
+"""
+Métricas de uso de actuadores y energía del agente.
+
+``MetricasActuadores`` acumula contadores en el bucle de control con un costo
+constante por tick: tiempo encendido y conmutaciones de cada actuador, energía
+estimada, tiempo dentro y fuera del rango óptimo y la peor excursión de T° y
+humedad. Se pueden leer en cualquier momento, incluso mientras corre una
+simulación, como diccionario (``instantanea``) o en el formato de texto de
+Prometheus (``formato_prometheus``), que también se puede servir por HTTP con
+``iniciar_servidor_metricas``.
+"""
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tabla_decision import BIT_CALEFACTOR, BIT_HUMIDIFICADOR, BIT_VENTILADOR
+
+# Consumo relativo de cada actuador encendido (calefactor = 1). La energía se
+# expresa en horas equivalentes de calefactor.
+CONSUMO_ACTUADORES = {
+    BIT_CALEFACTOR: 1.0,
+    BIT_VENTILADOR: 0.3,
+    BIT_HUMIDIFICADOR: 0.2,
+}
+
+TIPO_CONTENIDO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricasActuadores:
+    """
+    Contadores de un invernadero, actualizados una vez por tick con
+    ``registrar``.
+
+    Args:
+        temp_min, temp_max, hum_min, hum_max: Rango óptimo del cultivo.
+    """
+
+    __slots__ = (
+        "temp_min",
+        "temp_max",
+        "hum_min",
+        "hum_max",
+        "ticks",
+        "tiempo_total",
+        "tiempo_calefactor",
+        "tiempo_ventilador",
+        "tiempo_humidificador",
+        "conmutaciones_calefactor",
+        "conmutaciones_ventilador",
+        "conmutaciones_humidificador",
+        "tiempo_en_rango",
+        "peor_excursion_temp",
+        "peor_excursion_hum",
+        "_mascara",
+    )
+
+    def __init__(self, temp_min, temp_max, hum_min, hum_max):
+        self.fijar_rango(temp_min, temp_max, hum_min, hum_max)
+        self.reiniciar()
+
+    def fijar_rango(self, temp_min, temp_max, hum_min, hum_max):
+        """Cambia el rango óptimo usado desde el próximo tick."""
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.hum_min = hum_min
+        self.hum_max = hum_max
+
+    def reiniciar(self):
+        """Pone todos los contadores a cero."""
+        self.ticks = 0
+        self.tiempo_total = 0.0
+        self.tiempo_calefactor = 0.0
+        self.tiempo_ventilador = 0.0
+        self.tiempo_humidificador = 0.0
+        self.conmutaciones_calefactor = 0
+        self.conmutaciones_ventilador = 0
+        self.conmutaciones_humidificador = 0
+        self.tiempo_en_rango = 0.0
+        self.peor_excursion_temp = 0.0
+        self.peor_excursion_hum = 0.0
+        self._mascara = 0
+
+    def registrar(self, dt, temperatura, humedad, mascara):
+        """
+        Acumula un tick de ``dt`` segundos con la lectura y la máscara de
+        actuadores (``BIT_*``) vigentes durante ese tick.
+        """
+        self.ticks += 1
+        self.tiempo_total += dt
+
+        if mascara:
+            if mascara & BIT_CALEFACTOR:
+                self.tiempo_calefactor += dt
+            if mascara & BIT_VENTILADOR:
+                self.tiempo_ventilador += dt
+            if mascara & BIT_HUMIDIFICADOR:
+                self.tiempo_humidificador += dt
+        cambios = mascara ^ self._mascara
+        if cambios:
+            if cambios & BIT_CALEFACTOR:
+                self.conmutaciones_calefactor += 1
+            if cambios & BIT_VENTILADOR:
+                self.conmutaciones_ventilador += 1
+            if cambios & BIT_HUMIDIFICADOR:
+                self.conmutaciones_humidificador += 1
+            self._mascara = mascara
+
+        # Las comparaciones con nan son falsas: una lectura no finita cuenta
+        # como fuera de rango, como ``BANDA_INVALIDA`` en la tabla de decisión,
+        # pero no tiene una distancia al rango que registrar.
+        if (
+            self.temp_min <= temperatura <= self.temp_max
+            and self.hum_min <= humedad <= self.hum_max
+        ):
+            self.tiempo_en_rango += dt
+            return
+        if math.isfinite(temperatura):
+            if temperatura < self.temp_min:
+                excursion_temp = self.temp_min - temperatura
+            else:
+                excursion_temp = temperatura - self.temp_max
+            if excursion_temp > self.peor_excursion_temp:
+                self.peor_excursion_temp = excursion_temp
+        if math.isfinite(humedad):
+            if humedad < self.hum_min:
+                excursion_hum = self.hum_min - humedad
+            else:
+                excursion_hum = humedad - self.hum_max
+            if excursion_hum > self.peor_excursion_hum:
+                self.peor_excursion_hum = excursion_hum
+
+    @property
+    def conmutaciones(self):
+        """Total de encendidos y apagados de todos los actuadores."""
+        return (
+            self.conmutaciones_calefactor
+            + self.conmutaciones_ventilador
+            + self.conmutaciones_humidificador
+        )
+
+    @property
+    def energia(self):
+        """Energía estimada, en horas equivalentes de calefactor."""
+        return (
+            CONSUMO_ACTUADORES[BIT_CALEFACTOR] * self.tiempo_calefactor
+            + CONSUMO_ACTUADORES[BIT_VENTILADOR] * self.tiempo_ventilador
+            + CONSUMO_ACTUADORES[BIT_HUMIDIFICADOR] * self.tiempo_humidificador
+        ) / 3600
+
+    def instantanea(self):
+        """Copia de los contadores actuales como diccionario."""
+        return {
+            "ticks": self.ticks,
+            "tiempo_total_seg": self.tiempo_total,
+            "tiempo_encendido_seg": {
+                "calefactor": self.tiempo_calefactor,
+                "ventilador": self.tiempo_ventilador,
+                "humidificador": self.tiempo_humidificador,
+            },
+            "conmutaciones": {
+                "calefactor": self.conmutaciones_calefactor,
+                "ventilador": self.conmutaciones_ventilador,
+                "humidificador": self.conmutaciones_humidificador,
+            },
+            "energia": self.energia,
+            "tiempo_en_rango_seg": self.tiempo_en_rango,
+            "tiempo_fuera_rango_seg": self.tiempo_total - self.tiempo_en_rango,
+            "peor_excursion_temp": self.peor_excursion_temp,
+            "peor_excursion_hum": self.peor_excursion_hum,
+        }
+
+    def prometheus(self, identificador="inv"):
+        """Contadores en formato de texto de Prometheus."""
+        return formato_prometheus({identificador: self})
+
+
+# (nombre, tipo, ayuda) de cada familia de métricas de Prometheus.
+_FAMILIAS = (
+    (
+        "invernadero_ticks_total",
+        "counter",
+        "Ticks de control registrados.",
+    ),
+    (
+        "invernadero_actuador_encendido_segundos_total",
+        "counter",
+        "Tiempo simulado con el actuador encendido.",
+    ),
+    (
+        "invernadero_actuador_conmutaciones_total",
+        "counter",
+        "Encendidos y apagados del actuador.",
+    ),
+    (
+        "invernadero_energia_total",
+        "counter",
+        "Energía estimada en horas equivalentes de calefactor.",
+    ),
+    (
+        "invernadero_rango_segundos_total",
+        "counter",
+        "Tiempo simulado dentro y fuera del rango óptimo de T° y humedad.",
+    ),
+    (
+        "invernadero_peor_excursion",
+        "gauge",
+        "Mayor distancia al rango óptimo registrada (°C o %).",
+    ),
+)
+
+
+def _escapar_etiqueta(valor):
+    """Valor de etiqueta con ``\\``, ``"`` y saltos de línea escapados."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _muestras(identificador, m):
+    """Muestras (familia, etiquetas, valor) de las métricas de un invernadero."""
+    inv = f'invernadero="{_escapar_etiqueta(identificador)}"'
+    yield "invernadero_ticks_total", inv, m.ticks
+    for nombre, tiempo, conmutaciones in (
+        ("calefactor", m.tiempo_calefactor, m.conmutaciones_calefactor),
+        ("ventilador", m.tiempo_ventilador, m.conmutaciones_ventilador),
+        ("humidificador", m.tiempo_humidificador, m.conmutaciones_humidificador),
+    ):
+        etiquetas = f'{inv},actuador="{nombre}"'
+        yield "invernadero_actuador_encendido_segundos_total", etiquetas, tiempo
+        yield "invernadero_actuador_conmutaciones_total", etiquetas, conmutaciones
+    yield "invernadero_energia_total", inv, m.energia
+    yield "invernadero_rango_segundos_total", f'{inv},estado="dentro"', (
+        m.tiempo_en_rango
+    )
+    yield "invernadero_rango_segundos_total", f'{inv},estado="fuera"', (
+        m.tiempo_total - m.tiempo_en_rango
+    )
+    yield "invernadero_peor_excursion", f'{inv},variable="temperatura"', (
+        m.peor_excursion_temp
+    )
+    yield "invernadero_peor_excursion", f'{inv},variable="humedad"', (
+        m.peor_excursion_hum
+    )
+
+
+def formato_prometheus(metricas_por_invernadero):
+    """
+    Texto de exposición de Prometheus para varios invernaderos.
+
+    Args:
+        metricas_por_invernadero: Diccionario {identificador: MetricasActuadores}.
+    """
+    por_familia = {nombre: [] for nombre, _, _ in _FAMILIAS}
+    for identificador, metricas in metricas_por_invernadero.items():
+        for familia, etiquetas, valor in _muestras(identificador, metricas):
+            por_familia[familia].append(f"{familia}{{{etiquetas}}} {valor}")
+
+    lineas = []
+    for nombre, tipo, ayuda in _FAMILIAS:
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        lineas.extend(por_familia[nombre])
+    return "\n".join(lineas) + "\n"
+
+
+def iniciar_servidor_metricas(fuente, puerto=9108, host="127.0.0.1"):
+    """
+    Sirve las métricas en ``http://host:puerto/metrics`` desde un hilo en segundo
+    plano.
+
+    Args:
+        fuente: Función sin argumentos que devuelve el diccionario
+            {identificador: MetricasActuadores} a exponer en cada consulta.
+
+    Returns:
+        ThreadingHTTPServer: El servidor; ``shutdown()`` lo detiene.
+    """
+
+    class _Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            cuerpo = formato_prometheus(fuente()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", TIPO_CONTENIDO_PROMETHEUS)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    hilo = threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True)
+    hilo.start()
+    return servidor
@@ -0,0 +1,191 @@
+"""
+Reloj simulado y evaluación de los criterios de éxito de ``Propuesta.md``.
+
+El reloj desacopla el tiempo simulado del tiempo real: cada tick avanza un paso
+fijo de segundos simulados y, salvo que se pida lo contrario, no espera nada,
+por lo que un día completo se simula en milisegundos.
+"""
+
+import math
+import random
+import time
+
+# Criterios de éxito definidos en Propuesta.md.
+OBJETIVO_PORCENTAJE_EN_RANGO = 95.0
+OBJETIVO_TIEMPO_REACCION_SEG = 5 * 60
+
+# Escenarios de prueba de Propuesta.md. La curva diaria de T° y humedad oscila
+# alrededor de la media con la amplitud dada; las perturbaciones son cambios
+# bruscos {segundo_simulado: delta_temperatura} para ``simular_un_dia``.
+ESCENARIOS = {
+    "dia_caluroso": {
+        "temperatura_inicial": 30,
+        "humedad_inicial": 45,
+        "temp_media": 32,
+        "temp_amplitud": 7,
+        "hum_media": 45,
+        "hum_amplitud": 12,
+        "perturbaciones": {12 * 3600: 8},
+    },
+    "noche_fria": {
+        "temperatura_inicial": 9,
+        "humedad_inicial": 80,
+        "temp_media": 8,
+        "temp_amplitud": 4,
+        "hum_media": 82,
+        "hum_amplitud": 8,
+        "perturbaciones": {3 * 3600: -8},
+    },
+}
+
+
+def traza_escenario(nombre, pasos, paso_seg=60, semilla=0):
+    """
+    Genera ``pasos`` lecturas (temperatura, humedad) del escenario ``nombre``:
+    una curva diaria con ruido reproducible y las perturbaciones del escenario.
+    """
+    escenario = ESCENARIOS[nombre]
+    rng = random.Random(semilla)
+    perturbaciones = sorted(escenario["perturbaciones"].items())
+    desplazamiento = 0.0
+    for k in range(pasos):
+        instante = k * paso_seg
+        while perturbaciones and perturbaciones[0][0] <= instante:
+            desplazamiento += perturbaciones.pop(0)[1]
+        fase = math.sin(2 * math.pi * (instante % 86400) / 86400 - math.pi / 2)
+        temperatura = (
+            escenario["temp_media"]
+            + escenario["temp_amplitud"] * fase
+            + desplazamiento
+            + rng.uniform(-1.2, 1.2)
+        )
+        humedad = (
+            escenario["hum_media"]
+            - escenario["hum_amplitud"] * fase
+            + rng.uniform(-1.2, 1.2)
+        )
+        yield (
+            round(max(0, min(50, temperatura)), 2),
+            round(max(0, min(100, humedad)), 2),
+        )
+
+
+class RelojSimulado:
+    """
+    Reloj de la simulación.
+
+    Args:
+        paso_seg: Segundos simulados que avanza cada tick.
+        tiempo_real: Si es True, espera entre ticks para que el tiempo simulado
+            avance al ritmo del reloj de pared (útil para demostraciones).
+        aceleracion: Segundos simulados por segundo real cuando ``tiempo_real``
+            está activo.
+    """
+
+    def __init__(self, paso_seg=60.0, tiempo_real=False, aceleracion=1.0):
+        if paso_seg <= 0:
+            raise ValueError("El paso del reloj debe ser positivo.")
+        self.paso_seg = paso_seg
+        self.tiempo_real = tiempo_real
+        self.aceleracion = aceleracion
+        self.ticks = 0
+        self._inicio_real = time.monotonic()
+
+    @property
+    def ahora(self):
+        """Segundos simulados transcurridos desde el inicio."""
+        return self.ticks * self.paso_seg
+
+    def avanzar(self):
+        """Avanza un tick y, en modo tiempo real, espera lo necesario."""
+        self.ticks += 1
+        if self.tiempo_real:
+            objetivo = self._inicio_real + self.ahora / self.aceleracion
+            espera = objetivo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+
+class CriteriosExito:
+    """
+    Acumula, tick a tick, las métricas de los criterios de éxito: el porcentaje
+    del tiempo en el rango óptimo y el tiempo de reacción ante excursiones de
+    temperatura: desde el primer tick fuera del rango hasta el primero en que
+    la temperatura vuelve a estar dentro.
+    """
+
+    def __init__(self, temp_min, temp_max, hum_min, hum_max):
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.hum_min = hum_min
+        self.hum_max = hum_max
+        self.tiempo_total = 0.0
+        self.tiempo_temp_en_rango = 0.0
+        self.tiempo_hum_en_rango = 0.0
+        self.tiempo_ambos_en_rango = 0.0
+        self.excursiones = 0
+        self.tiempos_reaccion = []
+        self._inicio_excursion = None
+        self._ultimo_instante = 0.0
+
+    def registrar(self, instante, paso_seg, estado):
+        """
+        Registra un tick. ``estado`` es el ``EstadoInvernadero`` observado por el
+        agente con los actuadores ya ajustados según su decisión. Solo cuentan la
+        temperatura y la humedad: el actuador correctivo se enciende en el mismo
+        tick en que el agente ve la excursión, así que medir hasta que está
+        encendido daría siempre 0 s.
+        """
+        self._ultimo_instante = instante
+        temp = estado.temperatura
+        hum = estado.humedad
+        temp_ok = self.temp_min <= temp <= self.temp_max
+        hum_ok = self.hum_min <= hum <= self.hum_max
+
+        self.tiempo_total += paso_seg
+        if temp_ok:
+            self.tiempo_temp_en_rango += paso_seg
+        if hum_ok:
+            self.tiempo_hum_en_rango += paso_seg
+        if temp_ok and hum_ok:
+            self.tiempo_ambos_en_rango += paso_seg
+
+        if not temp_ok:
+            if self._inicio_excursion is None:
+                self.excursiones += 1
+                self._inicio_excursion = instante
+        elif self._inicio_excursion is not None:
+            self.tiempos_reaccion.append(instante - self._inicio_excursion)
+            self._inicio_excursion = None
+
+    def _porcentaje(self, tiempo):
+        return 100.0 * tiempo / self.tiempo_total if self.tiempo_total else 0.0
+
+    def reporte(self):
+        """Devuelve un diccionario con las métricas y si se cumplen los criterios."""
+        porcentaje_temp = self._porcentaje(self.tiempo_temp_en_rango)
+        reaccion_max = max(self.tiempos_reaccion, default=0.0)
+        # Una excursión aún sin corregir cuenta con el tiempo que lleva abierta.
+        pendiente = (
+            self._ultimo_instante - self._inicio_excursion
+            if self._inicio_excursion is not None
+            else 0.0
+        )
+        reaccion_media = (
+            sum(self.tiempos_reaccion) / len(self.tiempos_reaccion)
+            if self.tiempos_reaccion
+            else 0.0
+        )
+        return {
+            "tiempo_simulado_seg": self.tiempo_total,
+            "porcentaje_temp_en_rango": porcentaje_temp,
+            "porcentaje_hum_en_rango": self._porcentaje(self.tiempo_hum_en_rango),
+            "porcentaje_ambos_en_rango": self._porcentaje(self.tiempo_ambos_en_rango),
+            "excursiones": self.excursiones,
+            "reaccion_media_seg": reaccion_media,
+            "reaccion_max_seg": reaccion_max,
+            "excursion_sin_corregir": self._inicio_excursion is not None,
+            "cumple_rango": porcentaje_temp >= OBJETIVO_PORCENTAJE_EN_RANGO,
+            "cumple_reaccion": max(reaccion_max, pendiente)
+            < OBJETIVO_TIEMPO_REACCION_SEG,
+        }
@@ -1,47 +1,176 @@
+"""
+División de un corpus de texto en fragmentos que se pueden tokenizar por
+separado.
+
+El archivo se lee por bloques y cada fragmento se corta en el último salto de
+línea (o, si no hay, en el último fin de oración o espacio) antes del tamaño
+objetivo, de modo que ninguna palabra ni oración quede partida entre dos
+fragmentos. La memoria usada depende del tamaño de fragmento y no del tamaño
+del archivo. Los fragmentos se escriben en paralelo y al final se guarda un
+``manifiesto.json`` con el desplazamiento en bytes y el SHA-256 de cada uno.
+
+Uso::
+
+    python split_text.py inv.txt output_chunks --tamano 50000 --hilos 4
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFIESTO = "manifiesto.json"
+
+# Caracteres que se leen del archivo en cada lectura.
+BLOQUE_LECTURA = 1 << 20
+
+# Fin de oración seguido de espacio: punto, cierre de interrogación o exclamación.
+FIN_ORACION = re.compile(r"[.!?…]\s")
+
+
+def _punto_de_corte(texto, limite):
+    """
+    Posición en la que cortar ``texto`` sin pasar de ``limite`` caracteres:
+    tras el último salto de línea, fin de oración o espacio de la segunda
+    mitad, en ese orden de preferencia, o justo en ``limite`` si no hay
+    ninguno.
+    """
+    minimo = limite // 2
+    corte = texto.rfind("\n", minimo, limite)
+    if corte != -1:
+        return corte + 1
+    ultimo = None
+    for ultimo in FIN_ORACION.finditer(texto, minimo, limite):
+        pass
+    if ultimo is not None:
+        return ultimo.end()
+    corte = max(texto.rfind(" ", minimo, limite), texto.rfind("\t", minimo, limite))
+    if corte != -1:
+        return corte + 1
+    return limite
 
-def split_text_file(input_file_path, output_directory, chunk_size=50000):
+
+def fragmentos_texto(archivo, chunk_size, bloque=BLOQUE_LECTURA):
+    """
+    Genera los fragmentos de un archivo de texto abierto, de como mucho
+    ``chunk_size`` caracteres, cortados en límites de línea u oración.
     """
-    Lee un archivo de texto, lo divide en fragmentos de un tamaño especificado
-    y guarda cada fragmento en un archivo nuevo en un directorio de salida.
+    pendiente = ""
+    while True:
+        leido = archivo.read(bloque)
+        pendiente += leido
+        while len(pendiente) >= chunk_size + (0 if leido else 1):
+            corte = _punto_de_corte(pendiente, chunk_size)
+            yield pendiente[:corte]
+            pendiente = pendiente[corte:]
+        if not leido:
+            break
+    if pendiente:
+        yield pendiente
+
+
+def _escribir_fragmento(ruta, datos):
+    """Escribe un fragmento ya codificado y devuelve su SHA-256."""
+    with open(ruta, "wb") as f:
+        f.write(datos)
+    return hashlib.sha256(datos).hexdigest()
+
+
+def split_text_file(input_file_path, output_directory, chunk_size=50000, hilos=4):
+    """
+    Lee un archivo de texto por bloques, lo divide en fragmentos de como mucho
+    ``chunk_size`` caracteres cortados en límites de línea u oración, y guarda
+    cada fragmento en un archivo nuevo en un directorio de salida, junto con
+    un manifiesto.
 
     Args:
         input_file_path (str): La ruta al archivo de texto de entrada.
         output_directory (str): La ruta al directorio donde se guardarán los archivos de salida.
-        chunk_size (int): El tamaño de cada fragmento en caracteres.
+        chunk_size (int): El tamaño máximo de cada fragmento en caracteres.
+        hilos (int): Fragmentos que se escriben a la vez.
+
+    Returns:
+        dict: El manifiesto escrito, o None si no se pudo leer la entrada.
     """
-    if not os.path.exists(output_directory):
-        os.makedirs(output_directory)
+    if chunk_size <= 0:
+        raise ValueError("El tamaño de fragmento debe ser positivo.")
+    os.makedirs(output_directory, exist_ok=True)
+
+    entradas = []
+    en_curso = deque()
+
+    def completar(i, entrada, futuro):
+        entrada["sha256"] = futuro.result()
+        print(f"Fragmento {i} guardado en '{entrada['ruta']}'")
 
     try:
-        with open(input_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # newline="" conserva los saltos de línea tal cual, para que los
+        # desplazamientos en bytes coincidan con el archivo original.
+        with open(
+            input_file_path, "r", encoding="utf-8", newline=""
+        ) as f, ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            desplazamiento = 0
+            for i, chunk in enumerate(fragmentos_texto(f, chunk_size), start=1):
+                datos = chunk.encode("utf-8")
+                ruta = os.path.join(output_directory, f"output_part_{i}.txt")
+                entrada = {
+                    "archivo": os.path.basename(ruta),
+                    "ruta": ruta,
+                    "inicio": desplazamiento,
+                    "fin": desplazamiento + len(datos),
+                    "caracteres": len(chunk),
+                }
+                desplazamiento += len(datos)
+                entradas.append(entrada)
+                en_curso.append(
+                    (i, entrada, ejecutor.submit(_escribir_fragmento, ruta, datos))
+                )
+                # Como mucho dos fragmentos por hilo en memoria a la vez.
+                while len(en_curso) > 2 * hilos:
+                    completar(*en_curso.popleft())
+            while en_curso:
+                completar(*en_curso.popleft())
     except FileNotFoundError:
         print(f"Error: El archivo de entrada '{input_file_path}' no se encontró.")
-        return
-    except Exception as e:
-        print(f"Error al leer el archivo '{input_file_path}': {e}")
-        return
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error al procesar el archivo '{input_file_path}': {e}")
+        return None
+
+    for entrada in entradas:
+        del entrada["ruta"]
+    manifiesto = {
+        "origen": os.path.abspath(input_file_path),
+        "bytes": desplazamiento,
+        "tamano_fragmento": chunk_size,
+        "fragmentos": entradas,
+    }
+    with open(os.path.join(output_directory, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
 
-    num_chunks = (len(content) + chunk_size - 1) // chunk_size
 
-    for i in range(num_chunks):
-        start = i * chunk_size
-        end = min((i + 1) * chunk_size, len(content))
-        chunk = content[start:end]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("entrada", nargs="?", default="AgenteInvernadero/inv.txt")
+    parser.add_argument("salida", nargs="?", default="AgenteInvernadero/output_chunks")
+    parser.add_argument("--tamano", type=int, default=50000, help="Caracteres.")
+    parser.add_argument("--hilos", type=int, default=4)
+    args = parser.parse_args(argv)
 
-        output_file_name = f"output_part_{i+1}.txt"
-        output_file_path = os.path.join(output_directory, output_file_name)
+    manifiesto = split_text_file(args.entrada, args.salida, args.tamano, args.hilos)
+    if manifiesto is None:
+        return 1
+    print(
+        f"{len(manifiesto['fragmentos'])} fragmentos, {manifiesto['bytes']} bytes; "
+        f"manifiesto en '{os.path.join(args.salida, MANIFIESTO)}'."
+    )
+    return 0
 
-        try:
-            with open(output_file_path, 'w', encoding='utf-8') as outfile:
-                outfile.write(chunk)
-            print(f"Fragmento {i+1} guardado en '{output_file_path}'")
-        except Exception as e:
-            print(f"Error al escribir el fragmento {i+1} en '{output_file_path}': {e}")
 
 if __name__ == "__main__":
-    input_file = "AgenteInvernadero/inv.txt"
-    output_dir = "AgenteInvernadero/output_chunks"
-    
-    split_text_file(input_file, output_dir)
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Tabla de decisión precompilada para los motores de inferencia del agente.
+
+Las reglas de ``AgenteInvernadero._motor_inferencia_temperatura`` y
+``_motor_inferencia_humedad`` solo dependen de la banda en la que cae cada
+variable (baja, óptima o alta) y del estado de los tres actuadores. Por eso un
+perfil de cultivo se puede compilar en una tabla de 4 × 4 × 8 entradas, cada una
+con los códigos de acción a ejecutar, y cada decisión se reduce a una consulta.
+La cuarta banda es la de las lecturas no finitas (NaN o infinitas): los
+motores no deciden nada sobre una variable que no se pudo medir.
+"""
+
+import math
+
+# Códigos enteros de las acciones que pueden devolver los motores de inferencia.
+NINGUNA = 0
+ENCENDER_VENTILADOR = 1
+ENCENDER_VENTILADOR_HUMEDAD = 2
+ENCENDER_CALEFACTOR = 3
+APAGAR_VENTILADOR = 4
+APAGAR_CALEFACTOR = 5
+ENCENDER_HUMIDIFICADOR = 6
+APAGAR_HUMIDIFICADOR = 7
+
+# El índice de cada nombre en la tupla es su código.
+ACCIONES = (
+    "ninguna",
+    "encender_ventilador",
+    "encender_ventilador_humedad",
+    "encender_calefactor",
+    "apagar_ventilador",
+    "apagar_calefactor",
+    "encender_humidificador",
+    "apagar_humidificador",
+)
+CODIGOS_ACCION = {nombre: codigo for codigo, nombre in enumerate(ACCIONES)}
+CODIGOS_ACCION["ninguna_temp"] = NINGUNA
+CODIGOS_ACCION["ninguna_hum"] = NINGUNA
+
+# Bits de la máscara que codifica el estado de los actuadores.
+BIT_CALEFACTOR = 1
+BIT_VENTILADOR = 2
+BIT_HUMIDIFICADOR = 4
+N_MASCARAS = 8
+
+# Bits que enciende y apaga cada acción, indexados por código de acción.
+BITS_ENCENDER = (
+    0,
+    BIT_VENTILADOR,
+    BIT_VENTILADOR,
+    BIT_CALEFACTOR,
+    0,
+    0,
+    BIT_HUMIDIFICADOR,
+    0,
+)
+BITS_APAGAR = (
+    0,
+    BIT_CALEFACTOR,
+    BIT_CALEFACTOR,
+    BIT_VENTILADOR,
+    BIT_VENTILADOR,
+    BIT_CALEFACTOR,
+    0,
+    BIT_HUMIDIFICADOR,
+)
+
+BANDA_BAJA = 0
+BANDA_OPTIMA = 1
+BANDA_ALTA = 2
+BANDA_INVALIDA = 3
+BANDAS = ("baja", "óptima", "alta", "inválida")
+N_BANDAS = len(BANDAS)
+
+
+def banda(valor, minimo, maximo):
+    """Devuelve la banda (``BANDA_*``) en la que cae ``valor``."""
+    if not math.isfinite(valor):
+        # Un NaN no es menor ni mayor que nada: sin esto caería en la óptima.
+        return BANDA_INVALIDA
+    if valor < minimo:
+        return BANDA_BAJA
+    if valor > maximo:
+        return BANDA_ALTA
+    return BANDA_OPTIMA
+
+
+def aplicar_acciones(mascara, codigos):
+    """Devuelve la máscara de actuadores tras ejecutar ``codigos`` en orden."""
+    for codigo in codigos:
+        mascara = (mascara & ~BITS_APAGAR[codigo]) | BITS_ENCENDER[codigo]
+    return mascara
+
+
+def nombres_actuadores(mascara):
+    """Lista los actuadores encendidos en ``mascara``."""
+    return [
+        nombre
+        for bit, nombre in (
+            (BIT_CALEFACTOR, "calefactor"),
+            (BIT_VENTILADOR, "ventilador"),
+            (BIT_HUMIDIFICADOR, "humidificador"),
+        )
+        if mascara & bit
+    ]
+
+
+class TablaDecision:
+    """
+    Reglas de un perfil de cultivo compiladas en una tabla indexada por
+    (banda de temperatura, banda de humedad, máscara de actuadores).
+
+    Cada entrada guarda el código de acción de cada motor, los códigos netos a
+    ejecutar (en el orden de ``AgenteInvernadero._resolver_acciones``) y la
+    máscara de actuadores resultante.
+    """
+
+    def __init__(self, temp_min, temp_max, hum_min, hum_max):
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.hum_min = hum_min
+        self.hum_max = hum_max
+        self.acciones_temp = []
+        self.acciones_hum = []
+        self.acciones = []
+        self.mascaras = []
+
+    @classmethod
+    def compilar(cls, agente):
+        """
+        Compila la tabla evaluando los motores de inferencia de ``agente`` con
+        un valor representativo de cada banda y cada combinación de actuadores.
+        Para la banda inválida se usa NaN, con lo que la tabla hace lo mismo
+        que los motores ante una lectura NaN.
+        """
+        tabla = cls(
+            agente.temp_optima_min,
+            agente.temp_optima_max,
+            agente.hum_optima_min,
+            agente.hum_optima_max,
+        )
+        temperaturas = (
+            tabla.temp_min - 1,
+            tabla.temp_min,
+            tabla.temp_max + 1,
+            math.nan,
+        )
+        humedades = (tabla.hum_min - 1, tabla.hum_min, tabla.hum_max + 1, math.nan)
+        for temperatura in temperaturas:
+            for humedad in humedades:
+                for mascara in range(N_MASCARAS):
+                    estado = {
+                        "temperatura": temperatura,
+                        "humedad": humedad,
+                        "calefactor_encendido": bool(mascara & BIT_CALEFACTOR),
+                        "ventilador_encendido": bool(mascara & BIT_VENTILADOR),
+                        "humidificador_encendido": bool(mascara & BIT_HUMIDIFICADOR),
+                    }
+                    accion_temp = agente._motor_inferencia_temperatura(estado)
+                    accion_hum = agente._motor_inferencia_humedad(estado)
+                    codigos = tuple(
+                        CODIGOS_ACCION[accion]
+                        for accion in agente._resolver_acciones(accion_temp, accion_hum)
+                    )
+                    tabla.acciones_temp.append(CODIGOS_ACCION[accion_temp])
+                    tabla.acciones_hum.append(CODIGOS_ACCION[accion_hum])
+                    tabla.acciones.append(codigos)
+                    tabla.mascaras.append(aplicar_acciones(mascara, codigos))
+        tabla.acciones_temp = tuple(tabla.acciones_temp)
+        tabla.acciones_hum = tuple(tabla.acciones_hum)
+        tabla.acciones = tuple(tabla.acciones)
+        tabla.mascaras = tuple(tabla.mascaras)
+        return tabla
+
+    def indice(self, temperatura, humedad, mascara):
+        """Posición en la tabla de un estado concreto."""
+        banda_temp = banda(temperatura, self.temp_min, self.temp_max)
+        banda_hum = banda(humedad, self.hum_min, self.hum_max)
+        return (banda_temp * N_BANDAS + banda_hum) * N_MASCARAS + mascara
+
+    def decidir(self, temperatura, humedad, mascara):
+        """Devuelve la tupla de códigos de acción a ejecutar para el estado dado."""
+        return self.acciones[self.indice(temperatura, humedad, mascara)]
+
+    def describir(self):
+        """
+        Devuelve la tabla como texto, una regla por línea, para inspeccionarla o
+        compararla con ``diff`` entre versiones o perfiles.
+        """
+        lineas = [
+            f"# T° óptima: [{self.temp_min}-{self.temp_max}°C], "
+            f"Humedad óptima: [{self.hum_min}-{self.hum_max}%]"
+        ]
+        for i, codigos in enumerate(self.acciones):
+            banda_temp, resto = divmod(i, N_BANDAS * N_MASCARAS)
+            banda_hum, mascara = divmod(resto, N_MASCARAS)
+            actuadores = ",".join(nombres_actuadores(mascara)) or "-"
+            acciones = ", ".join(ACCIONES[c] for c in codigos) or ACCIONES[NINGUNA]
+            lineas.append(
+                f"T°={BANDAS[banda_temp]:<7} H={BANDAS[banda_hum]:<7} "
+                f"[{actuadores}] -> {acciones}"
+            )
+        return "\n".join(lineas)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from agente import AgenteInvernadero, Invernadero
+
+    cultivos = sys.argv[1:] or AgenteInvernadero.get_perfiles_disponibles()
+    for cultivo in cultivos:
+        agente = AgenteInvernadero(Invernadero(), tipo_cultivo=cultivo)
+        print(f"## {cultivo}")
+        print(agente.tabla.describir())
+        print()
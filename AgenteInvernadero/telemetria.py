@@ -0,0 +1,91 @@
+"""
+Historial de telemetría de capacidad fija para un invernadero.
+
+Las lecturas se guardan en arreglos de NumPy preasignados que funcionan como
+buffer circular: al llenarse, cada lectura nueva sobrescribe la más antigua y no
+se vuelve a reservar memoria. Con ``float32`` para T° y humedad y un byte para
+la máscara de actuadores, cada lectura ocupa 9 bytes; una semana a una lectura
+por segundo (604 800 lecturas) ocupa unos 5.4 MB.
+"""
+
+import numpy as np
+
+CAMPOS = ("temperatura", "humedad", "actuadores")
+
+
+def capacidad_para(duracion_seg, paso_seg=1):
+    """Número de lecturas necesarias para cubrir ``duracion_seg`` con ``paso_seg``."""
+    return int(-(-duracion_seg // paso_seg))
+
+
+class TelemetriaAnillo:
+    """
+    Buffer circular con las últimas ``capacidad`` lecturas de un invernadero.
+
+    Args:
+        capacidad: Número máximo de lecturas que se conservan.
+    """
+
+    __slots__ = ("capacidad", "total", "temperatura", "humedad", "actuadores")
+
+    def __init__(self, capacidad):
+        if capacidad <= 0:
+            raise ValueError("La capacidad de la telemetría debe ser positiva.")
+        self.capacidad = capacidad
+        self.total = 0
+        self.temperatura = np.zeros(capacidad, dtype=np.float32)
+        self.humedad = np.zeros(capacidad, dtype=np.float32)
+        self.actuadores = np.zeros(capacidad, dtype=np.uint8)
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los arreglos de la telemetría."""
+        return self.temperatura.nbytes + self.humedad.nbytes + self.actuadores.nbytes
+
+    @property
+    def indice_inicial(self):
+        """Número de lectura (desde el inicio) de la lectura más antigua guardada."""
+        return self.total - len(self)
+
+    def registrar(self, temperatura, humedad, mascara):
+        """Guarda una lectura, sobrescribiendo la más antigua si está lleno."""
+        i = self.total % self.capacidad
+        self.temperatura[i] = temperatura
+        self.humedad[i] = humedad
+        self.actuadores[i] = mascara
+        self.total += 1
+
+    def segmentos(self, campo):
+        """
+        Devuelve el historial de ``campo`` en orden cronológico como una tupla de
+        una o dos vistas del arreglo interno, sin copiar datos. Las vistas dejan
+        de ser válidas en cuanto se registran nuevas lecturas sobre esa zona.
+        """
+        datos = getattr(self, campo)
+        if self.total <= self.capacidad:
+            return (datos[: self.total],)
+        inicio = self.total % self.capacidad
+        if inicio == 0:
+            return (datos,)
+        return (datos[inicio:], datos[:inicio])
+
+    def ultimos(self, campo, n=None):
+        """
+        Devuelve las últimas ``n`` lecturas de ``campo`` en orden cronológico.
+        Es una vista cuando son contiguas en memoria y una copia en caso contrario.
+        """
+        n = len(self) if n is None else min(n, len(self))
+        if n == 0:
+            return getattr(self, campo)[:0]
+        fin = self.total % self.capacidad or self.capacidad
+        datos = getattr(self, campo)
+        if n <= fin:
+            return datos[fin - n : fin]
+        return np.concatenate((datos[self.capacidad - (n - fin) :], datos[:fin]))
+
+    def como_arreglos(self):
+        """Copia todo el historial a arreglos contiguos, por campo."""
+        return {campo: np.concatenate(self.segmentos(campo)) for campo in CAMPOS}
@@ -0,0 +1,255 @@
+"""
+Exportación y carga rápida de los vectores de palabras del agente.
+
+``Word2Vec.load`` carga el estado completo de entrenamiento (pesos de salida,
+conteos del vocabulario...) aunque el agente solo usa ``.wv``, y cada proceso
+se queda con su propia copia de la matriz de vectores. ``exportar_vectores``
+guarda solo los ``KeyedVectors``, con la matriz en un ``.npy`` aparte, y
+``cargar_vectores`` la abre con ``mmap="r"``: la carga tarda milisegundos y
+todos los procesos que usan el mismo archivo comparten las páginas de la caché
+del sistema operativo.
+
+gensim se importa solo al cargar o exportar, no al importar este módulo.
+
+``CACHE_CONSULTAS`` guarda los resultados de ``most_similar`` por huella del
+modelo, de modo que las consultas repetidas no recorren todo el vocabulario y
+las de un modelo que cambió en disco nunca se reutilizan.
+
+Uso::
+
+    python vectores.py invernadero.model            # escribe invernadero.kv
+    python vectores.py invernadero.model otro.kv
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+EXTENSION_VECTORES = ".kv"
+EXTENSION_INDICE = ".ann.npz"
+EXTENSIONES_CUANTIZADAS = {"int8": ".q8.npz", "float16": ".f16.npz"}
+
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+
+# Consultas de similitud que se conservan en memoria, entre todos los agentes.
+CAPACIDAD_CACHE = 1024
+
+
+def resolver_ruta(ruta):
+    """
+    Devuelve ``ruta`` tal cual si existe; si es relativa y no existe en el
+    directorio actual, la busca junto a este módulo.
+    """
+    if os.path.isabs(ruta) or os.path.exists(ruta):
+        return ruta
+    junto_al_modulo = os.path.join(DIRECTORIO_BASE, ruta)
+    return junto_al_modulo if os.path.exists(junto_al_modulo) else ruta
+
+
+def ruta_vectores(ruta_modelo):
+    """Ruta del artefacto de vectores que corresponde a un modelo Word2Vec."""
+    base, _ = os.path.splitext(ruta_modelo)
+    return base + EXTENSION_VECTORES
+
+
+def ruta_indice(ruta_modelo):
+    """Ruta del índice aproximado (``indice_ann``) que corresponde a un modelo."""
+    base, _ = os.path.splitext(ruta_modelo)
+    return base + EXTENSION_INDICE
+
+
+def ruta_cuantizada(ruta_modelo, tipo="int8"):
+    """Ruta de los vectores cuantizados (``cuantizacion``) de un modelo."""
+    base, _ = os.path.splitext(ruta_modelo)
+    return base + EXTENSIONES_CUANTIZADAS[tipo]
+
+
+def vectores_vigentes(ruta_modelo, ruta_kv=None):
+    """
+    Indica si existe un artefacto de vectores al menos tan reciente como el
+    modelo (o sin modelo con el que compararlo).
+    """
+    ruta_kv = ruta_kv or ruta_vectores(ruta_modelo)
+    if not os.path.exists(ruta_kv):
+        return False
+    if not os.path.exists(ruta_modelo):
+        return True
+    return os.path.getmtime(ruta_kv) >= os.path.getmtime(ruta_modelo)
+
+
+def exportar_vectores(ruta_modelo, ruta_kv=None):
+    """
+    Guarda solo los vectores de un modelo Word2Vec, con la matriz en un archivo
+    ``.npy`` separado para poder mapearla en memoria.
+
+    Returns:
+        str: Ruta del artefacto escrito.
+    """
+    from gensim.models import Word2Vec
+
+    ruta_kv = ruta_kv or ruta_vectores(ruta_modelo)
+    wv = Word2Vec.load(ruta_modelo).wv
+    # Sin normas precalculadas: se derivan al usarlas y no hace falta guardarlas.
+    wv.norms = None
+    wv.save(ruta_kv, separately=["vectors"])
+    return ruta_kv
+
+
+def cargar_vectores(ruta_kv, mmap="r"):
+    """
+    Carga un artefacto de ``exportar_vectores``. Con ``mmap="r"`` la matriz de
+    vectores queda mapeada en memoria de solo lectura en lugar de copiarse.
+    """
+    from gensim.models import KeyedVectors
+
+    return KeyedVectors.load(ruta_kv, mmap=mmap)
+
+
+def cargar_vectores_modelo(ruta_modelo):
+    """
+    Carga los vectores de un modelo, usando su artefacto mapeado en memoria si
+    está vigente y el modelo completo en caso contrario. Si ``ruta_modelo`` es
+    un artefacto cuantizado (``.q8.npz`` o ``.f16.npz``) se cargan esos
+    vectores, con la misma interfaz.
+
+    Returns:
+        tuple: (KeyedVectors, ruta efectivamente cargada).
+    """
+    ruta_modelo = resolver_ruta(ruta_modelo)
+    if ruta_modelo.endswith(tuple(EXTENSIONES_CUANTIZADAS.values())):
+        from cuantizacion import cargar_cuantizado
+
+        return cargar_cuantizado(ruta_modelo), ruta_modelo
+    ruta_kv = ruta_vectores(ruta_modelo)
+    if vectores_vigentes(ruta_modelo, ruta_kv):
+        return cargar_vectores(ruta_kv), ruta_kv
+
+    from gensim.models import Word2Vec
+
+    return Word2Vec.load(ruta_modelo).wv, ruta_modelo
+
+
+def huella_modelo(ruta_modelo):
+    """
+    Identifica la versión en disco de un modelo: ruta, fecha de modificación y
+    tamaño del modelo, de su artefacto de vectores y de su índice aproximado
+    (None si no existen).
+    """
+    ruta_modelo = resolver_ruta(ruta_modelo)
+    huella = []
+    for ruta in (ruta_modelo, ruta_vectores(ruta_modelo), ruta_indice(ruta_modelo)):
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            huella.append(None)
+        else:
+            huella.append((os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size))
+    return tuple(huella)
+
+
+class CacheConsultas:
+    """
+    Caché LRU de consultas ``most_similar``, con capacidad fija.
+
+    Las claves son ``(huella, positivos, negativos, topn)``; los resultados se
+    guardan como tuplas para que nadie los modifique después de cachearlos.
+
+    Attributes:
+        aciertos, fallos: Consultas servidas desde la caché y calculadas.
+        expulsiones: Entradas descartadas por falta de capacidad.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        if capacidad <= 0:
+            raise ValueError("La capacidad de la caché debe ser positiva.")
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def most_similar(self, huella, modelo, positivos, negativos=(), topn=10):
+        """
+        Devuelve ``modelo.most_similar(...)`` desde la caché o lo calcula y lo
+        guarda. Los errores (p. ej. ``KeyError`` por palabras fuera del
+        vocabulario) no se cachean.
+        """
+        # Las respuestas exactas y las del índice aproximado no se mezclan.
+        aproximado = getattr(modelo, "aproximado", False)
+        clave = (huella, tuple(positivos), tuple(negativos), topn, aproximado)
+        with self._candado:
+            resultado = self._entradas.get(clave)
+            if resultado is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return resultado
+            self.fallos += 1
+
+        resultado = tuple(
+            modelo.most_similar(
+                positive=list(positivos), negative=list(negativos), topn=topn
+            )
+        )
+        with self._candado:
+            self._entradas[clave] = resultado
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+        return resultado
+
+    def invalidar(self, huella=None):
+        """Descarta las entradas de ``huella``, o todas si es None."""
+        with self._candado:
+            if huella is None:
+                self._entradas.clear()
+                return
+            for clave in [c for c in self._entradas if c[0] == huella]:
+                del self._entradas[clave]
+
+    def estadisticas(self):
+        """Contadores de la caché como diccionario."""
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "capacidad": self.capacidad,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+CACHE_CONSULTAS = CacheConsultas()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python vectores.py <modelo.model> [salida.kv]")
+        sys.exit(1)
+
+    modelo = resolver_ruta(sys.argv[1])
+    salida = sys.argv[2] if len(sys.argv) > 2 else None
+
+    inicio = time.perf_counter()
+    salida = exportar_vectores(modelo, salida)
+    print(f"Vectores exportados a '{salida}' en {time.perf_counter() - inicio:.2f} s.")
+
+    from gensim.models import Word2Vec
+
+    inicio = time.perf_counter()
+    Word2Vec.load(modelo)
+    completo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    wv = cargar_vectores(salida)
+    mapeado = time.perf_counter() - inicio
+    print(
+        f"Carga del modelo completo: {completo * 1000:.1f} ms | "
+        f"vectores mapeados: {mapeado * 1000:.1f} ms "
+        f"({len(wv)} palabras × {wv.vector_size} dimensiones)."
+    )
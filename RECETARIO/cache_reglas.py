@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de la base de reglas extraída del PDF de recetas.
+
+Leer el PDF con PyPDF2 es casi todo el tiempo de arranque del SE-ARC. Las
+reglas ya analizadas se guardan junto al PDF (``recetas.reglas.json``) con el
+SHA-256 del PDF y la versión del analizador; si alguno de los dos cambia, la
+caché se ignora y se vuelve a leer el PDF.
+
+En el archivo cada cadena (condición, conclusión o id) aparece una sola vez en
+una tabla y las reglas la referencian por posición. Al cargar, las cadenas se
+internan con ``sys.intern``: todas las reglas que comparten una condición
+comparten el mismo objeto.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+# Cambiar al modificar cómo se analizan los bloques del PDF, para descartar
+# las cachés escritas por la versión anterior.
+VERSION_ANALIZADOR = 1
+
+EXTENSION_CACHE = ".reglas.json"
+
+
+def resumen_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for datos in iter(lambda: f.read(bloque), b""):
+            resumen.update(datos)
+    return resumen.hexdigest()
+
+
+def ruta_cache(ruta_pdf):
+    """Ruta de la caché de reglas de un PDF."""
+    base, _ = os.path.splitext(ruta_pdf)
+    return base + EXTENSION_CACHE
+
+
+def internar_regla(regla):
+    """Regla con todas sus cadenas internadas."""
+    id_regla, condiciones, conclusion = regla
+    return (sys.intern(id_regla), [sys.intern(c) for c in condiciones], sys.intern(conclusion))
+
+
+def leer_cache(ruta, resumen):
+    """
+    Reglas guardadas en ``ruta`` si corresponden al PDF con ``resumen`` y a
+    esta versión del analizador; None en cualquier otro caso.
+    """
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if datos.get("version") != VERSION_ANALIZADOR or datos.get("sha256") != resumen:
+        return None
+    cadenas = [sys.intern(c) for c in datos["cadenas"]]
+    return [
+        (cadenas[id_regla], [cadenas[c] for c in condiciones], cadenas[conclusion])
+        for id_regla, condiciones, conclusion in datos["reglas"]
+    ]
+
+
+def guardar_cache(ruta, resumen, reglas):
+    """Guarda ``reglas`` en ``ruta`` con su tabla de cadenas."""
+    posiciones = {}
+
+    def posicion(cadena):
+        return posiciones.setdefault(cadena, len(posiciones))
+
+    compactas = [
+        [posicion(id_regla), [posicion(c) for c in condiciones], posicion(conclusion)]
+        for id_regla, condiciones, conclusion in reglas
+    ]
+    datos = {
+        "version": VERSION_ANALIZADOR,
+        "sha256": resumen,
+        "cadenas": list(posiciones),
+        "reglas": compactas,
+    }
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporal, ruta)
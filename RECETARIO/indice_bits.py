@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de recetas a las que les faltan pocos ingredientes, con máscaras de
+bits.
+
+Cada hecho que aparece en las condiciones de las reglas recibe un bit (los más
+frecuentes, los primeros) y cada regla se guarda como tres máscaras: sus
+ingredientes, sus otras condiciones positivas y sus negaciones (``NO:``). Las
+máscaras están en arreglos de ``uint64`` ordenados por palabra, de modo que
+una consulta recorre la memoria en secuencia:
+
+    faltantes = popcount(ingredientes & ~despensa)
+
+para todas las recetas a la vez, con ``np.bitwise_count``. Las otras
+condiciones y las negaciones solo se revisan en las reglas que las tienen.
+
+Los costos con pesos por ingrediente (p. ej. su precio) se calculan solo para
+las candidatas que ya pasaron el filtro de faltantes.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from motor_reglas import es_ingrediente
+
+BITS = 64
+
+
+def _nombre(hecho):
+    """``Ingrediente(Huevo)`` -> ``Huevo``."""
+    return hecho.split('(', 1)[1].rstrip(')') if '(' in hecho else hecho
+
+
+class IndiceRecetas:
+    """
+    Máscaras de bits de las reglas ``(id, condiciones, conclusión)``.
+
+    Args:
+        reglas: Lista de reglas como las de ``cargar_base_conocimiento``.
+    """
+
+    def __init__(self, reglas):
+        self.reglas = reglas
+        self.conclusiones = [conclusion for _, _, conclusion in reglas]
+        self.es_plato = np.array([c.startswith('Plato(') for c in self.conclusiones], dtype=bool)
+
+        frecuencias = Counter()
+        condiciones_reglas = []
+        for _, condiciones, _ in reglas:
+            condiciones = list(dict.fromkeys(condiciones))
+            condiciones_reglas.append(condiciones)
+            frecuencias.update(c[3:] if c.startswith('NO:') else c for c in condiciones)
+        # Los hechos más comunes en las primeras palabras.
+        self.hechos = [hecho for hecho, _ in frecuencias.most_common()]
+        self.ids = {hecho: bit for bit, hecho in enumerate(self.hechos)}
+        self.n_palabras = max(1, -(-len(self.hechos) // BITS))
+
+        n = len(reglas)
+        ingredientes = np.zeros((n, self.n_palabras), dtype=np.uint64)
+        otras = {}
+        negadas = {}
+        for r, condiciones in enumerate(condiciones_reglas):
+            for condicion in condiciones:
+                if condicion.startswith('NO:'):
+                    self._marcar(negadas.setdefault(r, np.zeros(self.n_palabras, np.uint64)), condicion[3:])
+                elif es_ingrediente(condicion):
+                    self._marcar(ingredientes[r], condicion)
+                else:
+                    self._marcar(otras.setdefault(r, np.zeros(self.n_palabras, np.uint64)), condicion)
+
+        # Por palabra: ingredientes[w] es la palabra w de todas las reglas.
+        self.ingredientes = np.ascontiguousarray(ingredientes.T)
+        self._maximo = int(np.bitwise_count(ingredientes).sum(axis=1).max()) if n else 0
+        self._conteo = np.uint8 if self._maximo <= np.iinfo(np.uint8).max else np.uint16
+        self._todos_platos = bool(self.es_plato.all())
+        self._pos_otras, self._otras = self._apilar(otras)
+        self._pos_negadas, self._negadas = self._apilar(negadas)
+
+    def _marcar(self, mascara, hecho):
+        bit = self.ids[hecho]
+        mascara[bit // BITS] |= np.uint64(1 << (bit % BITS))
+
+    def _apilar(self, mascaras):
+        """
+        Máscaras de solo las reglas que las tienen y, por regla, su fila en
+        ellas (-1 si no tiene).
+        """
+        posiciones = np.full(len(self.reglas), -1, dtype=np.intp)
+        filas = sorted(mascaras)
+        posiciones[filas] = np.arange(len(filas))
+        apiladas = np.zeros((len(filas), self.n_palabras), dtype=np.uint64)
+        for i, r in enumerate(filas):
+            apiladas[i] = mascaras[r]
+        return posiciones, apiladas
+
+    def __len__(self):
+        return len(self.reglas)
+
+    def mascara(self, hechos):
+        """Máscara de una base de hechos; los hechos que ninguna regla usa se ignoran."""
+        mascara = np.zeros(self.n_palabras, dtype=np.uint64)
+        for hecho in hechos:
+            bit = self.ids.get(hecho)
+            if bit is not None:
+                mascara[bit // BITS] |= np.uint64(1 << (bit % BITS))
+        return mascara
+
+    def faltantes(self, mascara):
+        """Ingredientes que le faltan a cada regla con la despensa ``mascara``."""
+        ausentes = ~mascara
+        total = np.zeros(len(self), dtype=self._conteo)
+        tramo = np.empty(len(self), dtype=np.uint64)
+        conteo = np.empty(len(self), dtype=np.uint8)
+        for w in range(self.n_palabras):
+            if not ausentes[w]:
+                continue
+            np.bitwise_and(self.ingredientes[w], ausentes[w], out=tramo)
+            np.bitwise_count(tramo, out=conteo)
+            np.add(total, conteo, out=total)
+        return total
+
+    def aplicables(self, filas, mascara):
+        """
+        Cuáles de las reglas ``filas`` no tienen negaciones violadas y tienen
+        cumplidas todas sus condiciones que no son ingredientes.
+        """
+        validas = np.ones(len(filas), dtype=bool)
+        for posiciones, mascaras, negada in (
+            (self._pos_otras, self._otras, False),
+            (self._pos_negadas, self._negadas, True),
+        ):
+            if not len(mascaras):
+                continue
+            pos = posiciones[filas]
+            con = np.flatnonzero(pos >= 0)
+            if negada:
+                falla = (mascaras[pos[con]] & mascara).any(axis=1)
+            else:
+                falla = (mascaras[pos[con]] & ~mascara).any(axis=1)
+            validas[con[falla]] = False
+        return validas
+
+    def costos(self, filas, mascara, pesos, max_faltantes):
+        """
+        Suma de los pesos de los ingredientes que faltan en cada regla de
+        ``filas`` (a cada una le faltan a lo sumo ``max_faltantes``);
+        ``pesos`` es un arreglo con un peso por bit.
+        """
+        costos = np.zeros(len(filas), dtype=np.float64)
+        uno = np.uint64(1)
+        for w in range(self.n_palabras):
+            faltan = self.ingredientes[w][filas] & ~mascara[w]
+            # Se quita el bit más bajo que falta, una vez por faltante posible.
+            for _ in range(max_faltantes):
+                con = np.flatnonzero(faltan)
+                if not len(con):
+                    break
+                bajo = faltan[con] & (~faltan[con] + uno)
+                bits = np.log2(bajo).astype(np.intp) + w * BITS
+                costos[con] += pesos[bits]
+                faltan[con] ^= bajo
+        return costos
+
+    def pesos_bits(self, pesos):
+        """
+        Arreglo de pesos por bit a partir de ``{ingrediente: peso}``. Acepta el
+        hecho (``Ingrediente(Huevo)``) o solo el nombre (``Huevo``); los que no
+        se indican pesan 1.
+        """
+        por_bit = np.ones(len(self.hechos), dtype=np.float64)
+        for bit, hecho in enumerate(self.hechos):
+            if hecho in pesos:
+                por_bit[bit] = pesos[hecho]
+            elif _nombre(hecho) in pesos:
+                por_bit[bit] = pesos[_nombre(hecho)]
+        return por_bit
+
+    def candidatas(self, hechos, max_faltantes=2, k=None, pesos=None, minimo=1, solo_platos=True):
+        """
+        Reglas aplicables a las que les faltan entre ``minimo`` y
+        ``max_faltantes`` ingredientes, de menor a mayor costo.
+
+        Args:
+            hechos: Base de hechos (o una máscara de ``mascara``).
+            k: Devuelve solo las ``k`` mejores (todas si es None).
+            pesos: ``{ingrediente: peso}`` para el costo de lo que falta; sin
+                pesos, el costo es el número de faltantes.
+            solo_platos: Solo reglas cuya conclusión es ``Plato(...)``.
+
+        Returns:
+            list: Tuplas (índice de regla, faltantes, costo), ordenadas por
+            costo, faltantes e índice de regla.
+        """
+        mascara = hechos if isinstance(hechos, np.ndarray) else self.mascara(hechos)
+        # A ninguna regla le faltan más de self._maximo ingredientes.
+        tope = min(max_faltantes, self._maximo) - minimo
+        if tope < 0:
+            return []
+        faltan = self.faltantes(mascara)
+        # minimo <= faltan <= max_faltantes con una sola comparación: la resta
+        # sin signo da la vuelta para los valores menores que minimo, y quedan
+        # por encima de self._maximo - minimo, que nunca supera el tope.
+        seleccion = (faltan - self._conteo(minimo)) <= tope
+        if solo_platos and not self._todos_platos:
+            seleccion &= self.es_plato
+        filas = np.flatnonzero(seleccion)
+        if len(filas):
+            filas = filas[self.aplicables(filas, mascara)]
+        faltan = faltan[filas]
+        if not pesos:
+            # El costo es el número de faltantes: una sola clave entera, única
+            # por regla, ordena por (faltantes, regla).
+            clave = faltan.astype(np.int64) * len(self) + filas
+            if k is not None and k < len(filas):
+                mejores = np.argpartition(clave, k - 1)[:k]
+                orden = mejores[np.argsort(clave[mejores])]
+            else:
+                orden = np.argsort(clave)
+            faltan = faltan[orden].tolist()
+            return list(zip(filas[orden].tolist(), faltan, map(float, faltan)))
+
+        costos = self.costos(filas, mascara, self.pesos_bits(pesos), max_faltantes)
+        if k is not None and k < len(filas):
+            # Solo se ordenan las que pueden quedar entre las k mejores.
+            umbral = np.partition(costos, k - 1)[k - 1]
+            dentro = costos <= umbral
+            filas, faltan, costos = filas[dentro], faltan[dentro], costos[dentro]
+        orden = np.lexsort((filas, faltan, costos))
+        if k is not None:
+            orden = orden[:k]
+        return list(zip(filas[orden].tolist(), faltan[orden].tolist(), costos[orden].tolist()))
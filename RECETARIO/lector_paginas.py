@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura del PDF de recetas página por página y análisis incremental de reglas.
+
+Las páginas se extraen en paralelo en un ``ProcessPoolExecutor`` (PyPDF2 es
+Python puro y no libera el GIL), en tandas de ``PAGINAS_POR_TAREA``, y llegan
+en orden al analizador a medida que terminan. El analizador guarda solo el
+bloque de receta en curso: un bloque que empieza en una página y termina en la
+siguiente se une antes de analizarlo, y cada regla se entrega en cuanto se ve
+el marcador de la receta siguiente. Las reglas (ids incluidos) son las mismas
+que al analizar el texto completo del libro de una vez.
+
+Uso::
+
+    python lector_paginas.py ../recetas.pdf --procesos 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MARCA_RECETA = "###RECETA_INICIO###"
+MARCA_INGREDIENTES = "###INGREDIENTES###"
+
+# Páginas que extrae cada tarea. Cada tarea vuelve a abrir el PDF, lo que
+# cuesta más o menos lo mismo que extraer tres páginas.
+PAGINAS_POR_TAREA = 16
+
+# Con menos páginas no compensa arrancar procesos.
+MINIMO_PARALELO = 2 * PAGINAS_POR_TAREA
+
+
+def regla_de_bloque(i, bloque):
+    """
+    Regla ``(id, condiciones, conclusión)`` del bloque ``i`` del texto partido
+    por ``MARCA_RECETA``, o None si el bloque no tiene el formato esperado.
+    Al cambiar este análisis hay que subir ``VERSION_ANALIZADOR`` en
+    cache_reglas.py.
+    """
+    if not bloque.strip(): return None
+
+    partes = bloque.strip().split(MARCA_INGREDIENTES)
+    if len(partes) != 2: return None
+
+    condiciones_str = partes[0].replace('\n', ' ').strip()
+    conclusion_str = partes[1].replace('\n', ' ').strip()
+
+    # Limpieza y estructuración
+    condiciones = [c.strip() for c in condiciones_str.split(' Y ')]
+
+    if condiciones and conclusion_str:
+        return (f'PDF_R{i}', condiciones, conclusion_str)
+    return None
+
+
+def reglas_de_textos(textos):
+    """
+    Genera las reglas de una secuencia de textos (las páginas, en orden) como
+    si fueran un solo texto, entregando cada una en cuanto su bloque termina.
+    """
+    i = 0
+    pendiente = ""
+    for texto in textos:
+        pendiente += texto
+        if MARCA_RECETA not in texto and len(texto) >= len(MARCA_RECETA):
+            # La marca podría haber quedado partida entre páginas: solo se
+            # busca en la unión con el final de la página anterior.
+            union = pendiente[-(len(texto) + len(MARCA_RECETA) - 1):]
+            if MARCA_RECETA not in union:
+                continue
+        bloques = pendiente.split(MARCA_RECETA)
+        pendiente = bloques.pop()
+        for bloque in bloques:
+            regla = regla_de_bloque(i, bloque)
+            if regla is not None:
+                yield regla
+            i += 1
+    regla = regla_de_bloque(i, pendiente)
+    if regla is not None:
+        yield regla
+
+
+def _extraer_paginas(ruta_pdf, inicio, fin):
+    """Texto de las páginas ``inicio:fin`` del PDF (se ejecuta en otro proceso)."""
+    from PyPDF2 import PdfReader
+
+    with open(ruta_pdf, 'rb') as file:
+        reader = PdfReader(file)
+        return [reader.pages[n].extract_text() for n in range(inicio, fin)]
+
+
+def paginas_pdf(ruta_pdf, procesos=None, paginas_por_tarea=PAGINAS_POR_TAREA):
+    """
+    Genera el texto de cada página del PDF, en orden, extrayendo por tandas en
+    paralelo. Con un solo proceso (o un solo CPU) o un PDF corto se extrae en
+    este proceso.
+    """
+    from PyPDF2 import PdfReader
+
+    procesos = procesos or os.cpu_count() or 1
+    with open(ruta_pdf, 'rb') as file:
+        reader = PdfReader(file)
+        n_paginas = len(reader.pages)
+        if procesos == 1 or n_paginas < MINIMO_PARALELO:
+            for page in reader.pages:
+                yield page.extract_text()
+            return
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [
+            ejecutor.submit(_extraer_paginas, ruta_pdf, inicio, min(inicio + paginas_por_tarea, n_paginas))
+            for inicio in range(0, n_paginas, paginas_por_tarea)
+        ]
+        try:
+            for futuro in futuros:
+                yield from futuro.result()
+        finally:
+            # Si quien consume deja de pedir páginas, no se extraen las demás.
+            for futuro in futuros:
+                futuro.cancel()
+
+
+def reglas_pdf(ruta_pdf, procesos=None):
+    """Genera las reglas del PDF a medida que se extraen sus páginas."""
+    return reglas_de_textos(paginas_pdf(ruta_pdf, procesos))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extrae las reglas del PDF de recetas página por página.")
+    parser.add_argument("pdf", nargs="?", default="recetas.pdf")
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ Error: Archivo PDF no encontrado en '{args.pdf}'.")
+        sys.exit(1)
+    inicio = time.perf_counter()
+    primera = None
+    n = 0
+    for n, regla in enumerate(reglas_pdf(args.pdf, args.procesos), start=1):
+        if primera is None:
+            primera = time.perf_counter() - inicio
+    total = time.perf_counter() - inicio
+    if n:
+        print(f"{n} reglas en {total * 1000:.0f} ms (primera regla a los {primera * 1000:.0f} ms).")
+    else:
+        print("⚠️ El PDF no contenía recetas en el formato esperado.")
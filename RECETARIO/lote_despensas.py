@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluación por lotes de muchas despensas contra toda la base de reglas.
+
+El SE-ARC interactivo evalúa una despensa por ejecución. Para las
+recomendaciones nocturnas, ``MatrizRecetas`` compila las reglas en matrices de
+incidencia reglas × hechos (``float32``, una fila por regla y una columna por
+hecho que aparece en alguna condición) y evalúa un bloque de despensas a la
+vez con productos de matrices:
+
+    presentes = despensas @ incidencia.T    # (usuarios, reglas)
+
+da, para cada usuario y regla, cuántas condiciones tiene; comparando con el
+total de la regla salen las reglas listas y los ingredientes que faltan.
+
+El encadenamiento es por rondas: en cada una se disparan a la vez todas las
+reglas listas y sus conclusiones se agregan como hechos; a partir de la
+segunda ronda solo se recalculan las reglas que mencionan algún hecho que
+otra regla concluye. El resultado es el de ``MotorReglas`` salvo cuando una
+negación (``NO:``) se refiere a un hecho inferido: ahí el interactivo depende
+del orden de las reglas dentro de cada pasada y el lote no.
+
+Despensas de entrada:
+- JSONL: ``{"usuario": "ana", "ingredientes": ["Huevo", "Harina"]}`` por línea.
+- CSV: columnas ``usuario`` e ``ingredientes`` (separados por ``;``); un
+  usuario puede ocupar varias filas.
+
+Uso::
+
+    python lote_despensas.py despensas.jsonl --pdf ../recetas.pdf --salida recomendaciones.jsonl
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+from motor_reglas import es_ingrediente
+
+# Despensas que se evalúan juntas: cada producto ocupa usuarios × reglas
+# float32 (128 × 100 000 reglas son unos 50 MB).
+USUARIOS_POR_BLOQUE = 128
+
+# Lo que cuenta en los pendientes de una regla una condición que no es
+# ingrediente sin cumplir o una negación violada. Con ``max_faltantes`` menor,
+# una sola cuenta dice si la regla está lista (0 pendientes) o es candidata
+# (entre 1 y ``max_faltantes``), y los faltantes de una candidata son sus
+# pendientes.
+PESO_OTRAS = 1024
+
+
+def hecho_ingrediente(ingrediente):
+    """``Huevo`` -> ``Ingrediente(Huevo)``; un hecho ya escrito se deja igual."""
+    ingrediente = ingrediente.strip()
+    return ingrediente if '(' in ingrediente else f'Ingrediente({ingrediente})'
+
+
+def _nombre(hecho):
+    """``Plato(Tarta)`` -> ``Tarta``."""
+    return hecho.split('(', 1)[1].rstrip(')') if '(' in hecho else hecho
+
+
+class MatrizRecetas:
+    """
+    Reglas ``(id, condiciones, conclusión)`` compiladas en matrices de
+    incidencia para evaluar muchas despensas a la vez.
+
+    Args:
+        reglas: Lista de reglas como las de ``cargar_base_conocimiento``.
+        max_faltantes: Ingredientes que pueden faltar en una candidata.
+    """
+
+    def __init__(self, reglas, max_faltantes=2):
+        if max_faltantes >= PESO_OTRAS:
+            raise ValueError(f"max_faltantes debe ser menor que {PESO_OTRAS}.")
+        self.reglas = reglas
+        self.max_faltantes = max_faltantes
+        self.conclusiones = [conclusion for _, _, conclusion in reglas]
+        self.es_plato = np.array([c.startswith('Plato(') for c in self.conclusiones], dtype=bool)
+        # Cada conclusión distinta con un número, para filtrar por conclusión
+        # sin comparar cadenas.
+        self.ids_conclusion = {c: i for i, c in enumerate(dict.fromkeys(self.conclusiones))}
+        self.conclusion_regla = np.array([self.ids_conclusion[c] for c in self.conclusiones], dtype=np.intp)
+
+        condiciones_reglas = [list(dict.fromkeys(condiciones)) for _, condiciones, _ in reglas]
+        self.hechos = list(dict.fromkeys(
+            c[3:] if c.startswith('NO:') else c for condiciones in condiciones_reglas for c in condiciones
+        ))
+        self.ids = {hecho: j for j, hecho in enumerate(self.hechos)}
+        n, m = len(reglas), len(self.hechos)
+
+        self.incidencia = np.zeros((n, m), dtype=np.float32)
+        negadas = {}
+        self.ingredientes = []
+        for r, condiciones in enumerate(condiciones_reglas):
+            ingredientes = []
+            for condicion in condiciones:
+                if condicion.startswith('NO:'):
+                    negadas.setdefault(r, []).append(self.ids[condicion[3:]])
+                else:
+                    self.incidencia[r, self.ids[condicion]] = 1
+                    if es_ingrediente(condicion):
+                        ingredientes.append(condicion)
+            self.ingredientes.append(ingredientes)
+
+        # Peso de cada hecho en la cuenta de pendientes (ver PESO_OTRAS).
+        self.pesos = np.array([1 if es_ingrediente(h) else PESO_OTRAS for h in self.hechos], dtype=np.float32)
+        self.total = self.incidencia @ self.pesos
+
+        # Negaciones: solo las filas de las reglas que tienen.
+        self.filas_negadas = np.array(sorted(negadas), dtype=np.intp)
+        self.negadas = np.zeros((len(self.filas_negadas), m), dtype=np.float32)
+        for i, r in enumerate(self.filas_negadas.tolist()):
+            self.negadas[i, negadas[r]] = 1
+
+        # Columna de la conclusión de cada regla (-1 si ninguna regla la usa
+        # como condición: no puede activar otras reglas).
+        self.columna_conclusion = np.array([self.ids.get(c, -1) for c in self.conclusiones], dtype=np.intp)
+        derivables = np.zeros(m, dtype=bool)
+        derivables[self.columna_conclusion[self.columna_conclusion >= 0]] = True
+        # Reglas que pueden cambiar de estado después de la primera ronda.
+        mencionan = self.incidencia[:, derivables].any(axis=1)
+        if len(self.filas_negadas):
+            mencionan[self.filas_negadas[self.negadas[:, derivables].any(axis=1)]] = True
+        self.dependientes = np.flatnonzero(mencionan)
+
+    def __len__(self):
+        return len(self.reglas)
+
+    def matriz_despensas(self, despensas):
+        """Matriz usuarios × hechos de las despensas (conjuntos de hechos)."""
+        matriz = np.zeros((len(despensas), len(self.hechos)), dtype=np.float32)
+        for u, hechos in enumerate(despensas):
+            columnas = [self.ids[h] for h in hechos if h in self.ids]
+            matriz[u, columnas] = 1
+        return matriz
+
+    def _pendientes(self, matriz, filas=None):
+        """
+        Pendientes de las reglas ``filas`` (todas si es None) para cada
+        usuario: ingredientes que faltan más ``PESO_OTRAS`` por cada otra
+        condición sin cumplir y cada negación violada.
+        """
+        incidencia = self.incidencia if filas is None else self.incidencia[filas]
+        total = self.total if filas is None else self.total[filas]
+        pendientes = total - (matriz * self.pesos) @ incidencia.T
+        if len(self.filas_negadas):
+            todas = np.arange(len(self)) if filas is None else filas
+            _, posiciones, con = np.intersect1d(todas, self.filas_negadas, assume_unique=True, return_indices=True)
+            if len(con):
+                pendientes[:, posiciones] += PESO_OTRAS * (matriz @ self.negadas[con].T)
+        return pendientes
+
+    def evaluar_bloque(self, despensas, max_pasadas=10):
+        """
+        Encadena las reglas para un bloque de despensas.
+
+        Returns:
+            tuple: (disparadas, pendientes), matrices usuarios × reglas: reglas
+            disparadas y pendientes de cada regla con los hechos finales.
+        """
+        matriz = self.matriz_despensas(despensas)
+        pendientes = self._pendientes(matriz)
+        disparadas = np.zeros(pendientes.shape, dtype=bool)
+        filas = slice(None)
+        for _ in range(max_pasadas):
+            listas = pendientes[:, filas] == 0
+            nuevas = listas & ~disparadas[:, filas]
+            if not nuevas.any():
+                break
+            disparadas[:, filas] |= listas
+            usuarios, j = np.nonzero(nuevas)
+            reglas = np.arange(len(self))[filas][j]
+            columnas = self.columna_conclusion[reglas]
+            usuarios, columnas = usuarios[columnas >= 0], columnas[columnas >= 0]
+            if not len(columnas) or matriz[usuarios, columnas].all():
+                break
+            matriz[usuarios, columnas] = 1
+            # Solo cambian las reglas que mencionan hechos inferidos.
+            filas = self.dependientes
+            pendientes[:, filas] = self._pendientes(matriz, filas)
+        return disparadas, pendientes
+
+    def evaluar(self, despensas, k=None, max_pasadas=10, bloque=USUARIOS_POR_BLOQUE):
+        """
+        Evalúa una lista de despensas (conjuntos de hechos ``Ingrediente(...)``).
+
+        Returns:
+            list: Por despensa, un diccionario con ``completos`` (platos
+            inferidos, en orden de regla) y ``casi`` (``{plato: [ingredientes
+            faltantes]}`` ordenado por faltantes, a lo sumo ``k``).
+        """
+        resultados = []
+        for inicio in range(0, len(despensas), bloque):
+            lote = despensas[inicio:inicio + bloque]
+            disparadas, pendientes = self.evaluar_bloque(lote, max_pasadas)
+            # Entre 1 y max_faltantes pendientes: solo pueden ser ingredientes.
+            candidatas = (pendientes >= 1) & (pendientes <= self.max_faltantes) & self.es_plato
+            for u, despensa in enumerate(lote):
+                inferidas = np.flatnonzero(disparadas[u])
+                inferidos = [self.conclusiones[r] for r in inferidas.tolist()]
+                hechos = set(despensa).union(inferidos)
+                completos = list(dict.fromkeys(c for c in inferidos if c.startswith('Plato(')))
+                casi = {
+                    self.conclusiones[r]: [c for c in self.ingredientes[r] if c not in hechos]
+                    for r in self._mejores(np.flatnonzero(candidatas[u]), pendientes[u], inferidas, despensa, k)
+                }
+                resultados.append({"completos": completos, "casi": casi})
+        return resultados
+
+    def _mejores(self, filas, faltan, inferidas, despensa, k):
+        """
+        De las reglas candidatas ``filas`` de un usuario, las de conclusiones
+        que aún no tiene, la última regla de cada conclusión (como en el
+        original) y, de esas, las ``k`` con menos faltantes.
+        """
+        presentes = np.zeros(len(self.ids_conclusion), dtype=bool)
+        presentes[self.conclusion_regla[inferidas]] = True
+        presentes[[self.ids_conclusion[h] for h in despensa if h in self.ids_conclusion]] = True
+        filas = filas[~presentes[self.conclusion_regla[filas]]]
+        # np.unique da la primera aparición: recorriendo al revés, la última regla.
+        _, ultimas = np.unique(self.conclusion_regla[filas[::-1]], return_index=True)
+        filas = filas[::-1][ultimas]
+        clave = faltan[filas].astype(np.int64) * len(self) + filas
+        if k is not None and k < len(filas):
+            elegidas = np.argpartition(clave, k - 1)[:k]
+            filas, clave = filas[elegidas], clave[elegidas]
+        return filas[np.argsort(clave)].tolist()
+
+
+def leer_despensas(ruta):
+    """
+    Lee despensas de un JSONL o un CSV (según la extensión).
+
+    Returns:
+        dict: {usuario: conjunto de hechos ``Ingrediente(...)``}, en el orden
+        del archivo.
+    """
+    despensas = {}
+    with open(ruta, 'r', encoding='utf-8', newline='') as f:
+        if ruta.lower().endswith('.csv'):
+            for fila in csv.DictReader(f):
+                ingredientes = (fila.get('ingredientes') or '').split(';')
+                despensas.setdefault(fila['usuario'], set()).update(
+                    hecho_ingrediente(i) for i in ingredientes if i.strip()
+                )
+        else:
+            for numero, linea in enumerate(f, 1):
+                if not linea.strip(): continue
+                try:
+                    datos = json.loads(linea)
+                except ValueError as e:
+                    raise ValueError(f"Línea {numero} de '{ruta}' no es JSON válido: {e}") from None
+                despensas.setdefault(str(datos['usuario']), set()).update(
+                    hecho_ingrediente(i) for i in datos.get('ingredientes', ())
+                )
+    return despensas
+
+
+def escribir_recomendaciones(salida, usuarios, resultados):
+    """Escribe una línea JSON por usuario, con los nombres sin el tipo de hecho."""
+    for usuario, resultado in zip(usuarios, resultados):
+        salida.write(json.dumps({
+            "usuario": usuario,
+            "completos": [_nombre(p) for p in resultado["completos"]],
+            "casi": [
+                {"plato": _nombre(p), "faltan": [_nombre(f) for f in faltantes]}
+                for p, faltantes in resultado["casi"].items()
+            ],
+        }, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    from propuesta_experto_recetario import SistemaExpertoARC
+
+    parser = argparse.ArgumentParser(description="Evalúa muchas despensas contra la base de reglas del SE-ARC.")
+    parser.add_argument("despensas", help="JSONL o CSV con las despensas de los usuarios.")
+    parser.add_argument("--pdf", default="recetas.pdf")
+    parser.add_argument("--salida", help="JSONL de recomendaciones (por defecto, la salida estándar).")
+    parser.add_argument("--max-faltantes", type=int, default=2)
+    parser.add_argument("-k", type=int, default=10, help="Platos casi completos por usuario (0 para todos).")
+    parser.add_argument("--bloque", type=int, default=USUARIOS_POR_BLOQUE)
+    args = parser.parse_args(argv)
+
+    # Los mensajes de carga van a stderr para no mezclarse con el JSONL.
+    with contextlib.redirect_stdout(sys.stderr):
+        se_arc = SistemaExpertoARC(args.pdf)
+        se_arc.MAX_FALTANTES = args.max_faltantes
+        if not se_arc.cargar_base_conocimiento():
+            return 1
+    try:
+        despensas = leer_despensas(args.despensas)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error al leer las despensas: {e}", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    usuarios = list(despensas)
+    resultados = se_arc.evaluar_despensas(list(despensas.values()), args.k or None, args.bloque)
+    segundos = time.perf_counter() - inicio
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            escribir_recomendaciones(f, usuarios, resultados)
+    else:
+        escribir_recomendaciones(sys.stdout, usuarios, resultados)
+    print(f"✅ {len(usuarios)} despensas evaluadas contra {len(se_arc.reglas)} reglas en {segundos * 1000:.0f} ms.",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de encadenamiento hacia adelante indexado (al estilo Rete) para las
+reglas del SE-ARC.
+
+Las reglas se compilan una sola vez:
+- un índice invertido de cada hecho a las reglas que lo mencionan,
+- por regla, cuántas condiciones positivas (ingredientes y otras) tiene.
+
+Al evaluar, cada regla lleva tres contadores: ingredientes que faltan, otras
+condiciones positivas que faltan y condiciones negadas (``NO:``) cuyo hecho ya
+está presente. Agregar un hecho solo toca las reglas de su lista en el índice,
+y las candidatas con faltantes salen directamente de los contadores.
+
+El orden de disparo es el del algoritmo original: pasadas sucesivas sobre las
+reglas en orden (como mucho ``max_pasadas``), donde una regla que queda lista
+detrás de la posición actual se dispara en la pasada siguiente. Esto importa
+cuando una negación se refiere a un hecho que otra regla infiere después.
+"""
+
+import heapq
+from collections import defaultdict, namedtuple
+
+# Tipos de aparición de un hecho en una regla.
+INGREDIENTE, OTRA, NEGADA = 0, 1, 2
+
+Resultado = namedtuple("Resultado", "hechos disparadas candidatas pasadas")
+Resultado.__doc__ = """
+Resultado de ``MotorReglas.evaluar``.
+
+hechos: Conjunto final de hechos.
+disparadas: Lista de (id_regla, conclusión) en orden de disparo.
+candidatas: Diccionario {conclusión Plato(...): [ingredientes faltantes]},
+    ordenado por número de faltantes.
+pasadas: Pasadas sobre las reglas en las que se disparó alguna.
+"""
+
+
+def es_ingrediente(condicion):
+    return condicion.startswith('Ingrediente(')
+
+
+class MotorReglas:
+    """
+    Reglas de producción ``(id, condiciones, conclusión)`` compiladas para
+    evaluarlas contra distintas bases de hechos.
+
+    Args:
+        reglas: Lista de reglas como las de ``cargar_base_conocimiento``.
+        max_faltantes: Ingredientes que pueden faltar en una candidata.
+    """
+
+    def __init__(self, reglas, max_faltantes=2):
+        self.reglas = reglas
+        self.max_faltantes = max_faltantes
+        self.indice = defaultdict(list)
+        self.ingredientes = []
+        self.total_ingredientes = []
+        self.total_otras = []
+        self.conclusiones = [conclusion for _, _, conclusion in reglas]
+
+        for r, (_, condiciones, _) in enumerate(reglas):
+            ingredientes, otras = [], 0
+            # Una condición repetida cuenta una sola vez, como en el original.
+            for condicion in dict.fromkeys(condiciones):
+                if condicion.startswith('NO:'):
+                    self.indice[condicion[3:]].append((r, NEGADA))
+                elif es_ingrediente(condicion):
+                    ingredientes.append(condicion)
+                    self.indice[condicion].append((r, INGREDIENTE))
+                else:
+                    otras += 1
+                    self.indice[condicion].append((r, OTRA))
+            self.ingredientes.append(ingredientes)
+            self.total_ingredientes.append(len(ingredientes))
+            self.total_otras.append(otras)
+
+        # Reglas que ya son candidatas o están listas sin ningún hecho.
+        self._sin_hechos = [
+            r for r in range(len(reglas))
+            if self.total_otras[r] == 0 and self.total_ingredientes[r] <= max_faltantes
+        ]
+
+    def __len__(self):
+        return len(self.reglas)
+
+    def evaluar(self, hechos, max_pasadas=10):
+        """
+        Encadena hacia adelante desde ``hechos`` (no se modifica).
+
+        Returns:
+            Resultado: Hechos finales, reglas disparadas y candidatas.
+        """
+        iniciales = hechos
+        hechos = set()
+        faltan_ingredientes = list(self.total_ingredientes)
+        faltan_otras = list(self.total_otras)
+        negadas = [0] * len(self.reglas)
+        # Reglas con a lo sumo ``max_faltantes`` ingredientes pendientes: las
+        # únicas que pueden dispararse o ser candidatas.
+        tocadas = set(self._sin_hechos)
+        conclusiones = self.conclusiones
+        max_faltantes = self.max_faltantes
+
+        def lista(r):
+            return (
+                faltan_ingredientes[r] == 0 and faltan_otras[r] == 0
+                and negadas[r] == 0 and conclusiones[r] not in hechos
+            )
+
+        def afirmar(hecho):
+            """Agrega un hecho y devuelve las reglas que quedaron listas."""
+            if hecho in hechos:
+                return ()
+            hechos.add(hecho)
+            listas = []
+            for r, tipo in self.indice.get(hecho, ()):
+                if tipo == INGREDIENTE:
+                    faltan_ingredientes[r] -= 1
+                elif tipo == OTRA:
+                    faltan_otras[r] -= 1
+                else:
+                    # Una negación solo puede quitar reglas, nunca agregarlas.
+                    negadas[r] += 1
+                    continue
+                # Solo interesan las reglas que ya pueden ser candidatas.
+                if faltan_ingredientes[r] <= max_faltantes:
+                    tocadas.add(r)
+                    if faltan_ingredientes[r] == 0 and lista(r):
+                        listas.append(r)
+            return listas
+
+        for hecho in iniciales:
+            afirmar(hecho)
+        actual = [r for r in tocadas if lista(r)]
+        heapq.heapify(actual)
+
+        disparadas = []
+        pasadas = 0
+        while actual and pasadas < max_pasadas:
+            siguiente = []
+            while actual:
+                r = heapq.heappop(actual)
+                if not lista(r):
+                    continue
+                disparadas.append((self.reglas[r][0], conclusiones[r]))
+                for nueva in afirmar(conclusiones[r]):
+                    # Por delante de la posición actual: se ve en esta misma pasada.
+                    heapq.heappush(actual if nueva > r else siguiente, nueva)
+            pasadas += 1
+            actual = siguiente
+            heapq.heapify(actual)
+
+        candidatas = self._candidatas(hechos, tocadas, faltan_ingredientes, faltan_otras, negadas)
+        return Resultado(hechos, disparadas, candidatas, pasadas)
+
+    def _candidatas(self, hechos, tocadas, faltan_ingredientes, faltan_otras, negadas):
+        """
+        Platos a los que les faltan entre 1 y ``max_faltantes`` ingredientes,
+        sin negaciones violadas ni otras condiciones pendientes. Si varias
+        reglas concluyen el mismo plato, cuenta la última, como en el original.
+        """
+        elegidas = {}
+        for r in sorted(tocadas):
+            conclusion = self.conclusiones[r]
+            if (
+                conclusion.startswith('Plato(') and conclusion not in hechos
+                and faltan_otras[r] == 0 and negadas[r] == 0
+                and 1 <= faltan_ingredientes[r] <= self.max_faltantes
+            ):
+                elegidas[conclusion] = r
+        ordenadas = sorted(elegidas.items(), key=lambda item: (faltan_ingredientes[item[1]], item[1]))
+        return {
+            conclusion: [c for c in self.ingredientes[r] if c not in hechos]
+            for conclusion, r in ordenadas
+        }
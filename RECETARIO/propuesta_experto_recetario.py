@@ -6,8 +6,13 @@ SE-ARC Final: Flujo completo de ejecución.
 3. Inferencia Hacia Adelante con margen de 2 faltantes.
 """
 
-from PyPDF2 import PdfReader
 import os
+import time
+
+from cache_reglas import guardar_cache, internar_regla, leer_cache, resumen_archivo, ruta_cache
+from lector_paginas import reglas_pdf
+from motor_reglas import MotorReglas
+
 
 class SistemaExpertoARC:
     
@@ -15,6 +20,11 @@ class SistemaExpertoARC:
         self.hechos = set() 
         self.hechos_historial = set()
         self.reglas = []     
+        self.motor = None # Reglas compiladas (ver motor_reglas.py)
+        self.matriz = None # Reglas en matrices para evaluar por lotes (ver lote_despensas.py)
+        self.recetas = None # Reglas en máscaras de bits para buscar_recetas (ver indice_bits.py)
+        self.tiempos_carga = {}
+        self.origen_reglas = None
         self.ingredientes_maestros = self._get_master_ingredients()
         self.MAX_FALTANTES = 2 # Margen de error de 2 ingredientes
         self.ruta_pdf = ruta_pdf
@@ -30,50 +40,138 @@ class SistemaExpertoARC:
         ]
 
     # --- 2. Lógica para Leer PDF (Carga de la Base de Conocimiento) ---
-    def cargar_base_conocimiento(self):
-        """Lee el PDF, extrae el texto y lo convierte en reglas de producción."""
+    def cargar_base_conocimiento(self, usar_cache=True, procesos=None):
+        """
+        Lee el PDF, extrae el texto y lo convierte en reglas de producción.
+        Si hay una caché de reglas del mismo PDF (ver cache_reglas.py) se usa
+        en lugar de volver a leerlo. Los tiempos de cada etapa quedan en
+        ``self.tiempos_carga`` (segundos).
+        """
+        for _ in self.iterar_base_conocimiento(usar_cache, procesos):
+            pass
         
+        if self.reglas:
+            print(f"✅ Se cargaron {len(self.reglas)} reglas {self.origen_reglas}.")
+            return True
+        elif self.origen_reglas:
+            print("⚠️ El PDF no contenía recetas en el formato esperado.")
+        return False
+
+    def iterar_base_conocimiento(self, usar_cache=True, procesos=None):
+        """
+        Carga las reglas como ``cargar_base_conocimiento``, pero entrega cada
+        una en cuanto se agrega a ``self.reglas``: sin caché, las primeras
+        recetas se pueden consultar mientras el resto del PDF se sigue
+        extrayendo en paralelo (ver lector_paginas.py).
+        """
         ruta_absoluta = os.path.abspath(self.ruta_pdf)
         print(f"--- 📄 Leyendo PDF en: {ruta_absoluta} ---")
+        self.tiempos_carga = {}
+        self.origen_reglas = None
+        self.reglas = []
         
-        texto_pdf = ""
+        inicio = time.perf_counter()
         try:
-            with open(ruta_absoluta, 'rb') as file:
-                reader = PdfReader(file)
-                for page in reader.pages:
-                    texto_pdf += page.extract_text()
+            resumen = resumen_archivo(ruta_absoluta)
         except FileNotFoundError:
             print(f"❌ Error: Archivo PDF no encontrado en '{ruta_absoluta}'.")
-            return False
-        except Exception as e:
+            return
+        except OSError as e:
             print(f"❌ Error al leer PDF: {e}")
-            return False
+            return
+        self.tiempos_carga["hash"] = time.perf_counter() - inicio
         
-        reglas_extraidas = []
-        recetas_encontradas = texto_pdf.split("###RECETA_INICIO###")
+        inicio = time.perf_counter()
+        ruta_reglas = ruta_cache(ruta_absoluta)
+        reglas_cache = leer_cache(ruta_reglas, resumen) if usar_cache else None
+        if reglas_cache is not None:
+            self.tiempos_carga["cache"] = time.perf_counter() - inicio
+            self.origen_reglas = "de la caché"
+            self._mostrar_tiempos_carga()
+            for regla in reglas_cache:
+                self.reglas.append(regla)
+                yield regla
+            return
         
-        for i, bloque in enumerate(recetas_encontradas):
-            if not bloque.strip(): continue
-            
-            partes = bloque.strip().split("###INGREDIENTES###")
-            if len(partes) != 2: continue
-
-            condiciones_str = partes[0].replace('\n', ' ').strip()
-            conclusion_str = partes[1].replace('\n', ' ').strip()
-            
-            # Limpieza y estructuración
-            condiciones = [c.strip() for c in condiciones_str.split(' Y ')]
-            
-            if condiciones and conclusion_str:
-                reglas_extraidas.append((f'PDF_R{i}', condiciones, conclusion_str))
+        try:
+            for regla in reglas_pdf(ruta_absoluta, procesos):
+                regla = internar_regla(regla)
+                if not self.reglas:
+                    self.tiempos_carga["primera_regla"] = time.perf_counter() - inicio
+                self.reglas.append(regla)
+                yield regla
+        except Exception as e:
+            print(f"❌ Error al leer PDF: {e}")
+            self.reglas = []
+            return
+        self.tiempos_carga["lectura_pdf"] = time.perf_counter() - inicio
+        self.origen_reglas = "del PDF"
         
-        if reglas_extraidas:
-            self.reglas = reglas_extraidas
-            print(f"✅ Se cargaron {len(self.reglas)} reglas del PDF.")
-            return True
-        else:
-            print("⚠️ El PDF no contenía recetas en el formato esperado.")
-            return False
+        if self.reglas:
+            inicio = time.perf_counter()
+            try:
+                guardar_cache(ruta_reglas, resumen, self.reglas)
+                self.tiempos_carga["escritura_cache"] = time.perf_counter() - inicio
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar la caché de reglas: {e}")
+        self._mostrar_tiempos_carga()
+
+    def _mostrar_tiempos_carga(self):
+        print("⏱️ Tiempos de carga: " + " | ".join(
+            f"{etapa} {segundos * 1000:.1f} ms" for etapa, segundos in self.tiempos_carga.items()
+        ))
+
+    def _motor(self):
+        """
+        Reglas compiladas. Se compilan una vez; cada hecho nuevo solo revisa
+        las reglas que lo mencionan en lugar de recorrerlas todas en cada pasada.
+        """
+        if (self.motor is None or self.motor.reglas is not self.reglas
+                or len(self.motor) != len(self.reglas) or self.motor.max_faltantes != self.MAX_FALTANTES):
+            self.motor = MotorReglas(self.reglas, self.MAX_FALTANTES)
+        return self.motor
+
+    def buscar_recetas(self, k=10, max_faltantes=None, pesos=None):
+        """
+        Las ``k`` recetas más baratas de completar con los hechos actuales,
+        con cualquier número de faltantes (``MAX_FALTANTES`` por defecto) y
+        pesos opcionales por ingrediente (``{'Huevo': 0.3, ...}``; los demás
+        pesan 1). Encadena primero las reglas y luego consulta las máscaras de
+        bits de indice_bits.py sobre los hechos inferidos.
+
+        Returns:
+            list: Tuplas (plato, [ingredientes faltantes], costo).
+        """
+        # NumPy solo hace falta aquí y en evaluar_despensas.
+        from indice_bits import IndiceRecetas
+
+        motor = self._motor()
+        hechos = motor.evaluar(self.hechos).hechos
+        if max_faltantes is None:
+            max_faltantes = self.MAX_FALTANTES
+        if self.recetas is None or self.recetas.reglas is not self.reglas or len(self.recetas) != len(self.reglas):
+            self.recetas = IndiceRecetas(self.reglas)
+
+        recetas = []
+        for r, _, costo in self.recetas.candidatas(hechos, max_faltantes, k, pesos):
+            faltantes = [c for c in motor.ingredientes[r] if c not in hechos]
+            recetas.append((motor.conclusiones[r], faltantes, costo))
+        return recetas
+
+    def evaluar_despensas(self, despensas, k=None, bloque=None):
+        """
+        Evalúa muchas despensas (conjuntos de hechos ``Ingrediente(...)``)
+        contra toda la base de reglas a la vez, sin tocar ``self.hechos``.
+
+        Returns:
+            list: Por despensa, ``{"completos": [...], "casi": {plato: [faltantes]}}``.
+        """
+        from lote_despensas import USUARIOS_POR_BLOQUE, MatrizRecetas
+
+        if (self.matriz is None or self.matriz.reglas is not self.reglas
+                or len(self.matriz) != len(self.reglas) or self.matriz.max_faltantes != self.MAX_FALTANTES):
+            self.matriz = MatrizRecetas(self.reglas, self.MAX_FALTANTES)
+        return self.matriz.evaluar(despensas, k, bloque=bloque or USUARIOS_POR_BLOQUE)
 
     # --- 3. Lógica de Inferencia Hacia Adelante con Margen de Error ---
     def inferencia_hacia_adelante(self):
@@ -81,56 +179,13 @@ class SistemaExpertoARC:
         Aplica Inferencia Hacia Adelante y almacena los platos viables,
         respetando el MAX_FALTANTES.
         """
-        nuevos_hechos_inferidos = True
-        iteraciones = 0
-        candidatas_faltantes = {}
-        
         print("\n--- 🔎 Ejecutando Inferencia Hacia Adelante (Data-Driven) ---")
         
-        while nuevos_hechos_inferidos and iteraciones < 10:
-            nuevos_hechos_inferidos = False
-            hechos_anteriores = len(self.hechos)
-            
-            for id_regla, condiciones, conclusion in self.reglas:
-                
-                if conclusion not in self.hechos:
-                    
-                    ingredientes_faltantes = set()
-                    cumple_condiciones = True
-                    
-                    for condicion in condiciones:
-                        # Chequeo de Negación
-                        if condicion.startswith('NO:'):
-                            if condicion[3:] in self.hechos:
-                                cumple_condiciones = False
-                                break
-                        # Chequeo de Positivo
-                        elif condicion not in self.hechos:
-                            if condicion.startswith('Ingrediente('):
-                                ingredientes_faltantes.add(condicion)
-                            else:
-                                cumple_condiciones = False
-                                break 
-                    
-                    # Aplicar Regla y Tolerancia:
-                    num_faltantes = len(ingredientes_faltantes)
-
-                    if cumple_condiciones and num_faltantes <= self.MAX_FALTANTES:
-                        
-                        # A. Inferencia Completa (0 Faltantes)
-                        if num_faltantes == 0:
-                            self.hechos.add(conclusion)
-                            print(f"  [+] Regla {id_regla} activada: {conclusion} (Completo)")
-                            nuevos_hechos_inferidos = True
-                        
-                        # B. Almacenar Candidata (1 o 2 Faltantes)
-                        elif conclusion.startswith('Plato('):
-                            candidatas_faltantes[conclusion] = ingredientes_faltantes
-            
-            if len(self.hechos) > hechos_anteriores:
-                nuevos_hechos_inferidos = True
-                
-            iteraciones += 1
+        resultado = self._motor().evaluar(self.hechos)
+        self.hechos.update(resultado.hechos)
+        for id_regla, conclusion in resultado.disparadas:
+            print(f"  [+] Regla {id_regla} activada: {conclusion} (Completo)")
+        candidatas_faltantes = resultado.candidatas
 
         # --- Reporte Final ---
         salida = "\n" + "=" * 60
@@ -148,10 +203,8 @@ class SistemaExpertoARC:
         salida += "\n⚠️ Platos VIABLES con Tareas Pendientes (1 o 2 Faltantes):"
         
         if candidatas_faltantes:
-            # Ordenar por el menor número de ingredientes faltantes
-            candidatas_ordenadas = sorted(candidatas_faltantes.items(), key=lambda item: len(item[1]))
-            
-            for plato, faltantes in candidatas_ordenadas:
+            # Ya vienen ordenadas por el menor número de ingredientes faltantes
+            for plato, faltantes in candidatas_faltantes.items():
                 nombre_plato = plato.split('(')[1].replace(')', '')
                 faltantes_str = ", ".join([f.split('(')[1].replace(')', '') for f in faltantes])
                 salida += f"\n- {nombre_plato}: ¡COMPRAR {len(faltantes)}! (Faltan: {faltantes_str})"
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Comparación de ``MatrizRecetas`` con ``MotorReglas`` despensa por despensa.
+
+    python -m pytest test_lote_despensas.py
+"""
+
+import random
+import unittest
+
+from lote_despensas import MatrizRecetas
+from motor_reglas import MotorReglas
+from test_motor_reglas import MAX_FALTANTES, base_aleatoria
+
+
+class TestMatrizRecetas(unittest.TestCase):
+
+    def test_coincide_con_el_motor(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            # Sin negaciones de hechos inferidos: ahí el motor depende del
+            # orden de las reglas dentro de cada pasada y el lote no.
+            reglas, _ = base_aleatoria(rng, negaciones_inferidas=False)
+            despensas = [base_aleatoria(rng)[1] for _ in range(20)]
+            motor = MotorReglas(reglas, MAX_FALTANTES)
+            lote = MatrizRecetas(reglas, MAX_FALTANTES).evaluar(despensas, bloque=8)
+            for despensa, resultado in zip(despensas, lote):
+                esperado = motor.evaluar(despensa)
+                platos = {h for h in esperado.hechos if h.startswith('Plato(')}
+                self.assertEqual(set(resultado["completos"]), platos)
+                self.assertEqual(list(resultado["casi"].items()), list(esperado.candidatas.items()))
+
+    def test_k_mejores(self):
+        rng = random.Random(2)
+        for _ in range(50):
+            reglas, despensa = base_aleatoria(rng, negaciones_inferidas=False)
+            esperado = list(MotorReglas(reglas, MAX_FALTANTES).evaluar(despensa).candidatas.items())
+            resultado, = MatrizRecetas(reglas, MAX_FALTANTES).evaluar([despensa], k=3)
+            self.assertEqual(list(resultado["casi"].items()), esperado[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
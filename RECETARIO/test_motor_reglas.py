@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Comparación de ``MotorReglas`` con el bucle original del SE-ARC sobre bases de
+reglas aleatorias con encadenamientos y negaciones.
+
+    python -m pytest test_motor_reglas.py
+"""
+
+import random
+import unittest
+
+from motor_reglas import MotorReglas
+
+MAX_FALTANTES = 2
+MAX_PASADAS = 10
+
+
+def inferencia_original(reglas, hechos, max_faltantes=MAX_FALTANTES):
+    """
+    El bucle de ``inferencia_hacia_adelante`` anterior a ``MotorReglas``, sin
+    los mensajes: pasadas completas sobre las reglas hasta que no se infiere
+    nada nuevo (como mucho ``MAX_PASADAS``).
+
+    Returns:
+        tuple: (hechos, [(id_regla, conclusión)] en orden de disparo,
+        {plato: set de ingredientes faltantes}, pasadas).
+    """
+    hechos = set(hechos)
+    disparadas = []
+    candidatas = {}
+    nuevos = True
+    pasadas = 0
+    while nuevos and pasadas < MAX_PASADAS:
+        nuevos = False
+        for id_regla, condiciones, conclusion in reglas:
+            if conclusion in hechos: continue
+            faltantes = set()
+            cumple = True
+            for condicion in condiciones:
+                if condicion.startswith('NO:'):
+                    if condicion[3:] in hechos:
+                        cumple = False
+                        break
+                elif condicion not in hechos:
+                    if condicion.startswith('Ingrediente('):
+                        faltantes.add(condicion)
+                    else:
+                        cumple = False
+                        break
+            if cumple and len(faltantes) <= max_faltantes:
+                if not faltantes:
+                    hechos.add(conclusion)
+                    disparadas.append((id_regla, conclusion))
+                    nuevos = True
+                elif conclusion.startswith('Plato('):
+                    candidatas[conclusion] = faltantes
+        pasadas += 1
+    return hechos, disparadas, candidatas, pasadas
+
+
+def es_candidata(condiciones, conclusion, hechos, max_faltantes=MAX_FALTANTES):
+    """Si la regla es candidata con la base de hechos final."""
+    if not conclusion.startswith('Plato(') or conclusion in hechos:
+        return False
+    faltan = 0
+    for condicion in dict.fromkeys(condiciones):
+        if condicion.startswith('NO:'):
+            if condicion[3:] in hechos: return False
+        elif condicion not in hechos:
+            if not condicion.startswith('Ingrediente('): return False
+            faltan += 1
+    return 1 <= faltan <= max_faltantes
+
+
+def base_aleatoria(rng, n_reglas=30, n_ingredientes=12, n_bases=4, n_platos=8, negaciones_inferidas=True):
+    """
+    Reglas al azar: platos y bases intermedias a partir de ingredientes, con
+    bases o platos como condiciones (encadenamiento), negaciones y
+    conclusiones repetidas.
+    """
+    ingredientes = [f'Ingrediente(I{i})' for i in range(n_ingredientes)]
+    bases = [f'Base(B{i})' for i in range(n_bases)]
+    platos = [f'Plato(P{i})' for i in range(n_platos)]
+    reglas = []
+    for n in range(n_reglas):
+        condiciones = rng.sample(ingredientes, rng.randint(1, 4))
+        if rng.random() < 0.3:
+            condiciones.append(rng.choice(bases + platos))
+        if rng.random() < 0.25:
+            negables = ingredientes + bases + platos if negaciones_inferidas else ingredientes
+            condiciones.append('NO:' + rng.choice(negables))
+        if rng.random() < 0.1:
+            condiciones.append(condiciones[0])
+        conclusion = rng.choice(bases) if rng.random() < 0.3 else rng.choice(platos)
+        reglas.append((f'R{n}', condiciones, conclusion))
+    despensa = set(rng.sample(ingredientes, rng.randint(0, n_ingredientes)))
+    return reglas, despensa
+
+
+class TestMotorReglas(unittest.TestCase):
+
+    def test_coincide_con_el_bucle_original(self):
+        rng = random.Random(0)
+        comparadas = 0
+        for _ in range(1000):
+            reglas, despensa = base_aleatoria(rng)
+            hechos, disparadas, candidatas, pasadas = inferencia_original(reglas, despensa)
+            if pasadas >= MAX_PASADAS: continue  # El original se cortó a medias.
+            comparadas += 1
+            resultado = MotorReglas(reglas, MAX_FALTANTES).evaluar(despensa, MAX_PASADAS)
+
+            self.assertEqual(resultado.hechos, hechos)
+            self.assertEqual(resultado.disparadas, disparadas)
+
+            # Toda candidata del motor es la del original, con los mismos faltantes.
+            for plato, faltantes in resultado.candidatas.items():
+                self.assertIn(plato, candidatas)
+                self.assertEqual(set(faltantes), candidatas[plato])
+            faltan = [len(f) for f in resultado.candidatas.values()]
+            self.assertEqual(faltan, sorted(faltan))
+            # Las que solo tiene el original son entradas viejas: platos ya
+            # completos por otra regla o con una negación violada después.
+            for plato in set(candidatas) - set(resultado.candidatas):
+                self.assertFalse(any(
+                    conclusion == plato and es_candidata(condiciones, conclusion, hechos)
+                    for _, condiciones, conclusion in reglas
+                ))
+        self.assertGreater(comparadas, 900)
+
+    def test_no_modifica_los_hechos(self):
+        reglas = [('R1', ['Ingrediente(A)'], 'Plato(X)')]
+        despensa = {'Ingrediente(A)'}
+        MotorReglas(reglas).evaluar(despensa)
+        self.assertEqual(despensa, {'Ingrediente(A)'})
+
+
+if __name__ == '__main__':
+    unittest.main()